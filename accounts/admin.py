@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.models import User
-from .models import Profile
+from .models import Profile, UserRanking
 
 # Simple approach - just register Profile separately
 admin.site.register(Profile)
+admin.site.register(UserRanking)
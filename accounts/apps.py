@@ -8,4 +8,10 @@ class AccountsConfig(AppConfig):
     def ready(self):
         # Make email field unique for User model
         from django.contrib.auth.models import User
-        User._meta.get_field('email')._unique = True
\ No newline at end of file
+        User._meta.get_field('email')._unique = True
+
+        import accounts.signals  # noqa: F401
+        from accounts.utils import profile_photo_variant_names
+        from ncore.storage import register_media_references
+
+        register_media_references(profile_photo_variant_names)
\ No newline at end of file
@@ -0,0 +1,74 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import (
+    JWTAuthentication as BaseJWTAuthentication,
+)
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+
+class JWTAuthentication(BaseJWTAuthentication):
+    """
+    JWT authentication that decodes the bearer token at most once per request
+    and shares the result between SwaggerAuthenticationMiddleware and DRF.
+
+    Views that only need the user's id on reads can set
+    ``token_claims_user = True``: GET/HEAD requests then get a user built
+    from the token claims, with no database lookup at all.
+    """
+
+    def authenticate(self, request):
+        validated_token = self.get_request_token(request)
+        if validated_token is None:
+            return None
+
+        view = getattr(request, "parser_context", {}).get("view")
+        if request.method in SAFE_METHODS and getattr(view, "token_claims_user", False):
+            return self.get_claims_user(validated_token), validated_token
+
+        return self.get_request_user(request, validated_token), validated_token
+
+    def get_request_token(self, request):
+        """
+        Return the validated token of ``request`` (or None without a bearer
+        token); the outcome, including failures, is cached on the underlying
+        HttpRequest.
+        """
+        request = getattr(request, "_request", request)
+        if not hasattr(request, "_jwt_validated_token"):
+            try:
+                header = self.get_header(request)
+                raw_token = self.get_raw_token(header) if header else None
+                request._jwt_validated_token = (
+                    self.get_validated_token(raw_token) if raw_token else None
+                )
+            except AuthenticationFailed as exc:
+                request._jwt_validated_token = exc
+
+        if isinstance(request._jwt_validated_token, AuthenticationFailed):
+            raise request._jwt_validated_token
+        return request._jwt_validated_token
+
+    def get_request_user(self, request, validated_token):
+        """Load the user for ``validated_token`` once per request."""
+        request = getattr(request, "_request", request)
+        if not hasattr(request, "_jwt_user"):
+            request._jwt_user = self.get_user(validated_token)
+        return request._jwt_user
+
+    def get_claims_user(self, validated_token):
+        """
+        Build an unsaved-looking ``User`` carrying only the id from the token.
+        It compares equal to the real row and works in ORM filters, so read
+        endpoints can use it wherever they only need ``request.user``'s pk.
+        """
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        user = self.user_model(**{api_settings.USER_ID_FIELD: user_id})
+        user._state.adding = False
+        user.is_claims_only = True
+        return user
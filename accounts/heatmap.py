@@ -0,0 +1,98 @@
+"""
+Wire encodings of the dashboard heatmap.
+
+Every encoder takes the first day and two parallel per-day count lists
+(accepted submissions and concepts read) covering the whole range:
+
+``list``    the original list of ``{"date", "submissions_count",
+            "concepts_read_count"}`` objects, one per day.
+``arrays``  ``start_date`` plus the two count arrays.
+``rle``     ``start_date``, ``days`` and ``runs`` of
+            ``[length, submissions_count, concepts_read_count]``.
+``bitmap``  ``start_date``, ``days``, a base64 bitmap of active days (bit
+            ``i % 8`` of byte ``i // 8``) and the counts of active days only.
+"""
+
+import base64
+from datetime import timedelta
+
+from django.utils.http import parse_header_parameters
+
+DEFAULT_ENCODING = "list"
+
+
+def encode_list(start_date, submissions, concepts_read):
+    return [
+        {
+            "date": (start_date + timedelta(days=offset)).strftime("%Y-%m-%d"),
+            "submissions_count": submissions_count,
+            "concepts_read_count": concepts_read_count,
+        }
+        for offset, (submissions_count, concepts_read_count) in enumerate(
+            zip(submissions, concepts_read)
+        )
+    ]
+
+
+def encode_arrays(start_date, submissions, concepts_read):
+    return {
+        "encoding": "arrays",
+        "start_date": start_date.isoformat(),
+        "submissions_count": submissions,
+        "concepts_read_count": concepts_read,
+    }
+
+
+def encode_rle(start_date, submissions, concepts_read):
+    runs = []
+    for day in zip(submissions, concepts_read):
+        if runs and (runs[-1][1], runs[-1][2]) == day:
+            runs[-1][0] += 1
+        else:
+            runs.append([1, *day])
+    return {
+        "encoding": "rle",
+        "start_date": start_date.isoformat(),
+        "days": len(submissions),
+        "runs": runs,
+    }
+
+
+def encode_bitmap(start_date, submissions, concepts_read):
+    active = bytearray((len(submissions) + 7) // 8)
+    active_submissions = []
+    active_concepts_read = []
+    for offset, day in enumerate(zip(submissions, concepts_read)):
+        if any(day):
+            active[offset // 8] |= 1 << (offset % 8)
+            active_submissions.append(day[0])
+            active_concepts_read.append(day[1])
+    return {
+        "encoding": "bitmap",
+        "start_date": start_date.isoformat(),
+        "days": len(submissions),
+        "active": base64.b64encode(bytes(active)).decode(),
+        "submissions_count": active_submissions,
+        "concepts_read_count": active_concepts_read,
+    }
+
+
+HEATMAP_ENCODERS = {
+    "list": encode_list,
+    "arrays": encode_arrays,
+    "rle": encode_rle,
+    "bitmap": encode_bitmap,
+}
+
+
+def requested_encoding(request):
+    """
+    Encoding asked for with ``?encoding=`` or, failing that, an ``encoding``
+    parameter of the accepted media type
+    (``Accept: application/json; encoding=rle``).
+    """
+    encoding = request.query_params.get("encoding")
+    if encoding is None:
+        accepted_media_type = getattr(request, "accepted_media_type", None) or ""
+        encoding = parse_header_parameters(accepted_media_type)[1].get("encoding")
+    return encoding or DEFAULT_ENCODING
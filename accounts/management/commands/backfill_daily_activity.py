@@ -0,0 +1,75 @@
+import heapq
+from itertools import groupby
+from operator import itemgetter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+
+from accounts.models import UserDailyActivity
+from accounts.streaks import ACCEPTED_VERDICT
+from concepts.models import ConceptsRead
+from problems.models import Submission
+
+
+class Command(BaseCommand):
+    help = "Rebuild the UserDailyActivity rollup from Submission and ConceptsRead"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Rows fetched per query and rollup rows written per insert",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+
+        submissions = (
+            Submission.objects.annotate(day=TruncDate("created_timestamp"))
+            .values_list("user_id", "day")
+            .annotate(
+                submissions=Count("id"),
+                accepted=Count("id", filter=Q(verdict=ACCEPTED_VERDICT)),
+            )
+            .order_by("user_id", "day")
+        )
+        concepts_read = (
+            ConceptsRead.objects.annotate(day=TruncDate("read_timestamp"))
+            .values_list("user_id", "day")
+            .annotate(concepts_read=Count("id"))
+            .order_by("user_id", "day")
+        )
+        # Both aggregates stream sorted by (user, day); merging them yields
+        # each rollup row once without holding either side in memory.
+        rows = heapq.merge(
+            (
+                (user_id, day, {"submissions": total, "accepted": accepted})
+                for user_id, day, total, accepted in submissions.iterator(
+                    chunk_size=batch_size
+                )
+            ),
+            (
+                (user_id, day, {"concepts_read": total})
+                for user_id, day, total in concepts_read.iterator(chunk_size=batch_size)
+            ),
+            key=itemgetter(0, 1),
+        )
+
+        written = 0
+        with transaction.atomic():
+            UserDailyActivity.objects.all().delete()
+            batch = []
+            for (user_id, day), parts in groupby(rows, key=itemgetter(0, 1)):
+                counts = {}
+                for _, _, part in parts:
+                    counts.update(part)
+                batch.append(UserDailyActivity(user_id=user_id, date=day, **counts))
+                if len(batch) >= batch_size:
+                    written += len(UserDailyActivity.objects.bulk_create(batch))
+                    batch = []
+            written += len(UserDailyActivity.objects.bulk_create(batch))
+
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} daily activity rows"))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from accounts.models import Profile
+from accounts.utils import build_profile_photo_variants
+
+
+class Command(BaseCommand):
+    help = "Build resized variants for profile photos that do not have them yet"
+
+    def handle(self, *args, **kwargs):
+        profiles = (
+            Profile.objects.exclude(profile_photo="")
+            .exclude(profile_photo__isnull=True)
+            .filter(profile_photo_variants={})
+        )
+        built = 0
+        for profile in profiles.iterator():
+            try:
+                build_profile_photo_variants(profile)
+                built += 1
+            except Exception as e:
+                self.stderr.write(f"Profile {profile.pk}: {e}")
+
+        self.stdout.write(self.style.SUCCESS(f"Built variants for {built} profiles"))
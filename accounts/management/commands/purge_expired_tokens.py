@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+from accounts.models import UserSession
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired refresh tokens, their blacklist entries and sessions "
+        "in small batches. Meant to be run periodically (e.g. from cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of rows deleted per statement",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        now = timezone.now()
+
+        # Blacklist entries go with their outstanding token (on_delete=CASCADE)
+        tokens = self.purge(
+            OutstandingToken.objects.filter(expires_at__lte=now), batch_size
+        )
+        sessions = self.purge(
+            UserSession.objects.filter(expires_at__lte=now), batch_size
+        )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Purged {tokens} expired tokens and {sessions} expired sessions"
+            )
+        )
+
+    @staticmethod
+    def purge(queryset, batch_size):
+        """
+        Delete ``queryset`` in pk-ordered batches so that no single statement
+        holds locks on a large part of the table.
+        """
+        model = queryset.model
+        purged = 0
+        while True:
+            pks = list(
+                queryset.order_by("pk").values_list("pk", flat=True)[:batch_size]
+            )
+            if not pks:
+                return purged
+            model.objects.filter(pk__in=pks).delete()
+            purged += len(pks)
@@ -0,0 +1,112 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from accounts.models import UserRanking
+from accounts.rankings import RANKING_KEY
+from accounts.streaks import ACCEPTED_VERDICT
+from ncore.conditional import bump_content_version
+from problems.models import (
+    ConceptBasedProblem,
+    DatasetBasedProblem,
+    LeaderboardEntry,
+    Submission,
+)
+
+RANKING_FIELDS = ["score", *UserRanking.LEVEL_FIELDS.values()]
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute every user's ranking from accepted submissions and correct "
+        "rows that drifted from it. Meant to be run nightly (e.g. from cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Rows fetched per query and rankings written per query",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report the rankings that drifted",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        weights = settings.RANKING_LEVEL_WEIGHTS
+
+        levels = {}
+        problem_levels = set()
+        for model in (ConceptBasedProblem, DatasetBasedProblem):
+            content_type = ContentType.objects.get_for_model(model)
+            for problem_id, level in model.objects.values_list("id", "level"):
+                levels[content_type.id, problem_id] = level
+                problem_levels.add((model, content_type, level))
+
+        expected = defaultdict(lambda: dict.fromkeys(RANKING_FIELDS, 0))
+        solved = (
+            Submission.objects.filter(verdict=ACCEPTED_VERDICT)
+            .values_list("user_id", "content_type_id", "object_id")
+            .distinct()
+            .order_by()
+        )
+        for user_id, content_type_id, object_id in solved.iterator(
+            chunk_size=batch_size
+        ):
+            level = levels.get((content_type_id, object_id))
+            if level not in weights:
+                continue
+            counts = expected[user_id]
+            counts[UserRanking.LEVEL_FIELDS[level]] += 1
+            counts["score"] += weights[level]
+
+        drifted = []
+        stored = UserRanking.objects.values_list("user_id", *RANKING_FIELDS)
+        for user_id, *values in stored.iterator(chunk_size=batch_size):
+            counts = expected.pop(user_id, dict.fromkeys(RANKING_FIELDS, 0))
+            if list(counts.values()) != values:
+                drifted.append(UserRanking(user_id=user_id, **counts))
+        # Users who solved problems but have no row yet
+        missing = [
+            UserRanking(user_id=user_id, **counts)
+            for user_id, counts in expected.items()
+        ]
+
+        # Entries are debited at the level they were credited with, so they
+        # must agree with the rebuilt rankings
+        stale_entries = [
+            (
+                LeaderboardEntry.objects.filter(
+                    content_type=content_type,
+                    object_id__in=model.objects.filter(level=level).values("id"),
+                ).exclude(level=level, weight=weights.get(level, 0)),
+                level,
+            )
+            for model, content_type, level in problem_levels
+        ]
+        restamped = sum(entries.count() for entries, _ in stale_entries)
+
+        if not options["dry_run"]:
+            with transaction.atomic():
+                UserRanking.objects.bulk_update(
+                    drifted, RANKING_FIELDS, batch_size=batch_size
+                )
+                UserRanking.objects.bulk_create(missing, batch_size=batch_size)
+                for entries, level in stale_entries:
+                    entries.update(level=level, weight=weights.get(level, 0))
+            bump_content_version(RANKING_KEY)
+
+        verb = "Found" if options["dry_run"] else "Corrected"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{verb} {len(drifted) + len(missing)} drifted rankings "
+                f"({len(missing)} missing) and {restamped} leaderboard entries"
+            )
+        )
@@ -0,0 +1,106 @@
+import heapq
+from itertools import groupby
+from operator import itemgetter
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+
+from accounts.models import Profile
+from accounts.projections import profile_projection_key
+from accounts.streaks import (
+    ACCEPTED_VERDICT,
+    CONCEPT_READ,
+    PROBLEM_SOLVED,
+    advance_streak,
+    local_date,
+)
+from concepts.models import ConceptsRead
+from problems.models import Submission
+
+STREAK_FIELDS = [
+    "current_streak",
+    "longest_streak",
+    "last_activity_date",
+    "current_day_concept_read",
+    "current_day_problem_solved",
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute every profile's streaks from Submission and ConceptsRead "
+        "history in a single streaming pass"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Rows fetched per query and profiles written per update",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+
+        # Both histories come sorted by (user, time) and are merged lazily,
+        # so memory does not grow with the number of events.
+        solved = (
+            (user_id, moment, PROBLEM_SOLVED)
+            for user_id, moment in Submission.objects.filter(verdict=ACCEPTED_VERDICT)
+            .order_by("user_id", "created_timestamp")
+            .values_list("user_id", "created_timestamp")
+            .iterator(chunk_size=batch_size)
+        )
+        read = (
+            (user_id, moment, CONCEPT_READ)
+            for user_id, moment in ConceptsRead.objects.order_by(
+                "user_id", "read_timestamp"
+            )
+            .values_list("user_id", "read_timestamp")
+            .iterator(chunk_size=batch_size)
+        )
+        events = groupby(
+            heapq.merge(solved, read, key=itemgetter(0, 1)), key=itemgetter(0)
+        )
+        next_user = next(events, None)
+
+        updated = 0
+        batch = []
+        profiles = Profile.objects.order_by("user_id").only(
+            "user_id", "timezone", *STREAK_FIELDS
+        )
+        for profile in profiles.iterator(chunk_size=batch_size):
+            # Skip activity of users without a profile
+            while next_user is not None and next_user[0] < profile.user_id:
+                next_user = next(events, None)
+
+            before = [getattr(profile, field) for field in STREAK_FIELDS]
+            profile.current_streak = profile.longest_streak = 0
+            profile.last_activity_date = None
+            profile.current_day_concept_read = False
+            profile.current_day_problem_solved = False
+            if next_user is not None and next_user[0] == profile.user_id:
+                for _, moment, activity in next_user[1]:
+                    advance_streak(
+                        profile, local_date(moment, profile.timezone), activity
+                    )
+                next_user = next(events, None)
+
+            if [getattr(profile, field) for field in STREAK_FIELDS] != before:
+                batch.append(profile)
+            if len(batch) >= batch_size:
+                updated += self.save(batch)
+                batch = []
+
+        updated += self.save(batch)
+        self.stdout.write(self.style.SUCCESS(f"Updated streaks of {updated} profiles"))
+
+    @staticmethod
+    def save(profiles):
+        Profile.objects.bulk_update(profiles, STREAK_FIELDS)
+        # bulk_update sends no post_save, so drop the cached projections here
+        cache.delete_many(
+            [profile_projection_key(profile.user_id) for profile in profiles]
+        )
+        return len(profiles)
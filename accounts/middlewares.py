@@ -2,10 +2,18 @@ from rest_framework_simplejwt.token_blacklist.models import (
     OutstandingToken,
     BlacklistedToken,
 )
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.utils import datetime_from_epoch
 from rest_framework.authentication import SessionAuthentication
 from rest_framework.exceptions import AuthenticationFailed
+from django.contrib.auth.models import AnonymousUser, User
+from django.db import transaction
+from django.utils import timezone
 from django.utils.deprecation import MiddlewareMixin
+from django.utils.functional import SimpleLazyObject
+
+from accounts.authentication import JWTAuthentication
+from accounts.models import UserSession
+from accounts.tokens import RefreshToken, blacklist_index
 
 
 class MaxRefreshTokenMiddleware:
@@ -13,15 +21,61 @@ class MaxRefreshTokenMiddleware:
 
     @staticmethod
     def check_and_manage_sessions(user):
-        # Get all non-blacklisted tokens for the user
-        active_tokens = OutstandingToken.objects.filter(
-            user=user, blacklistedtoken__isnull=True
-        ).order_by("created_at")
-        if active_tokens.count() >= MaxRefreshTokenMiddleware.MAX_SESSIONS:
-            # Blacklist the oldest token to enforce the limit
-            oldest_token = active_tokens.first()
-            if oldest_token:
-                BlacklistedToken.objects.create(token=oldest_token)
+        # Make room for the session that is about to be created
+        MaxRefreshTokenMiddleware.evict_sessions(
+            user, MaxRefreshTokenMiddleware.MAX_SESSIONS - 1
+        )
+
+    @staticmethod
+    def evict_sessions(user, keep):
+        """
+        Drop expired sessions of ``user`` and blacklist all but the ``keep``
+        newest live ones. Only touches the user's own (bounded) session rows.
+        """
+        UserSession.objects.filter(user=user, expires_at__lte=timezone.now()).delete()
+        evicted = dict(
+            UserSession.objects.filter(user=user)
+            .order_by("-created_at", "-pk")
+            .values_list("jti", "expires_at")[keep:]
+        )
+        if not evicted:
+            return
+
+        BlacklistedToken.objects.bulk_create(
+            [
+                BlacklistedToken(token_id=token_id)
+                for token_id in OutstandingToken.objects.filter(
+                    jti__in=evicted
+                ).values_list("pk", flat=True)
+            ],
+            ignore_conflicts=True,
+        )
+        # bulk_create sends no post_save, so index the evicted tokens here
+        for jti, expires_at in evicted.items():
+            blacklist_index.add(jti, expires_at.timestamp())
+        UserSession.objects.filter(jti__in=evicted).delete()
+
+    @staticmethod
+    def start_session(user):
+        """Issue a refresh token for ``user`` within the session limit."""
+        with transaction.atomic():
+            # Serialize concurrent logins of the same user
+            User.objects.select_for_update().filter(pk=user.pk).exists()
+            MaxRefreshTokenMiddleware.check_and_manage_sessions(user)
+            refresh = RefreshToken.for_user(user)
+            UserSession.objects.create(
+                user=user,
+                jti=refresh["jti"],
+                created_at=datetime_from_epoch(refresh["iat"]),
+                expires_at=datetime_from_epoch(refresh["exp"]),
+            )
+        return refresh
+
+    @staticmethod
+    def end_session(refresh):
+        """Blacklist ``refresh`` and forget its session."""
+        refresh.blacklist()
+        UserSession.objects.filter(jti=refresh["jti"]).delete()
 
 
 # Middlewares.py
@@ -38,11 +92,21 @@ class SwaggerAuthenticationMiddleware(MiddlewareMixin):
             except AuthenticationFailed:
                 request.user = None
         else:
-            # Use JWTAuthentication for other requests
+            # Decode the JWT once; DRF's JWTAuthentication reuses the result.
+            # The user row is only loaded if something actually reads it.
             jwt_auth = JWTAuthentication()
             try:
-                user = jwt_auth.authenticate(request)
-                if user is not None:
-                    request.user = user[0]
+                validated_token = jwt_auth.get_request_token(request)
+                if validated_token is not None:
+                    request.user = SimpleLazyObject(
+                        lambda: self.get_jwt_user(jwt_auth, request, validated_token)
+                    )
             except AuthenticationFailed:
                 request.user = None
+
+    @staticmethod
+    def get_jwt_user(jwt_auth, request, validated_token):
+        try:
+            return jwt_auth.get_request_user(request, validated_token)
+        except AuthenticationFailed:
+            return AnonymousUser()
@@ -0,0 +1,75 @@
+# Generated by Django 5.1.2 on 2026-10-19 10:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_sessions(apps, schema_editor):
+    OutstandingToken = apps.get_model("token_blacklist", "OutstandingToken")
+    UserSession = apps.get_model("accounts", "UserSession")
+    tokens = OutstandingToken.objects.filter(
+        user__isnull=False,
+        blacklistedtoken__isnull=True,
+        expires_at__gt=timezone.now(),
+    ).order_by("pk")
+    UserSession.objects.bulk_create(
+        [
+            UserSession(
+                user_id=token.user_id,
+                jti=token.jti,
+                created_at=token.created_at or token.expires_at,
+                expires_at=token.expires_at,
+            )
+            for token in tokens.iterator()
+        ],
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0001_initial"),
+        ("token_blacklist", "0012_alter_outstandingtoken_user"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UserSession",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("jti", models.CharField(max_length=255, unique=True)),
+                ("created_at", models.DateTimeField()),
+                ("expires_at", models.DateTimeField(db_index=True)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="sessions",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["user", "created_at"],
+                        name="accounts_us_user_id_ab8ad3_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_sessions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.2 on 2026-10-19 10:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0002_usersession"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="profile",
+            name="profile_photo_variants",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.2 on 2026-10-19 10:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0003_profile_photo_variants"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="profile",
+            name="last_activity_date",
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="profile",
+            name="timezone",
+            field=models.CharField(default="UTC", max_length=64),
+        ),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 5.1.2 on 2026-10-19 10:34
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+
+
+def backfill_daily_activity(apps, schema_editor):
+    Submission = apps.get_model("problems", "Submission")
+    ConceptsRead = apps.get_model("concepts", "ConceptsRead")
+    UserDailyActivity = apps.get_model("accounts", "UserDailyActivity")
+
+    rows = {}
+    submissions = (
+        Submission.objects.annotate(day=TruncDate("created_timestamp"))
+        .values_list("user_id", "day")
+        .annotate(submissions=Count("id"), accepted=Count("id", filter=Q(verdict=3)))
+        .order_by()
+    )
+    for user_id, day, total, accepted in submissions:
+        rows[user_id, day] = UserDailyActivity(
+            user_id=user_id, date=day, submissions=total, accepted=accepted
+        )
+    concepts_read = (
+        ConceptsRead.objects.annotate(day=TruncDate("read_timestamp"))
+        .values_list("user_id", "day")
+        .annotate(concepts_read=Count("id"))
+        .order_by()
+    )
+    for user_id, day, total in concepts_read:
+        row = rows.setdefault(
+            (user_id, day), UserDailyActivity(user_id=user_id, date=day)
+        )
+        row.concepts_read = total
+    UserDailyActivity.objects.bulk_create(rows.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0004_streak_activity"),
+        ("concepts", "0001_initial"),
+        ("problems", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UserDailyActivity",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("submissions", models.PositiveIntegerField(default=0)),
+                ("accepted", models.PositiveIntegerField(default=0)),
+                ("concepts_read", models.PositiveIntegerField(default=0)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_activity",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("user", "date")},
+            },
+        ),
+        migrations.RunPython(backfill_daily_activity, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 5.1.2 on 2026-10-19 11:16
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_user_rankings(apps, schema_editor):
+    ContentType = apps.get_model("contenttypes", "ContentType")
+    Submission = apps.get_model("problems", "Submission")
+    UserRanking = apps.get_model("accounts", "UserRanking")
+
+    levels = {}
+    for model_name in ("conceptbasedproblem", "datasetbasedproblem"):
+        content_type = ContentType.objects.filter(
+            app_label="problems", model=model_name
+        ).first()
+        if content_type is None:
+            continue
+        problems = apps.get_model("problems", model_name).objects
+        for problem_id, level in problems.values_list("id", "level"):
+            levels[content_type.id, problem_id] = level
+
+    rankings = {}
+    solved = (
+        Submission.objects.filter(verdict=3)
+        .values_list("user_id", "content_type_id", "object_id")
+        .distinct()
+        .order_by()
+    )
+    weights = settings.RANKING_LEVEL_WEIGHTS
+    for user_id, content_type_id, object_id in solved:
+        level = levels.get((content_type_id, object_id))
+        if level not in weights:
+            continue
+        ranking = rankings.setdefault(user_id, UserRanking(user_id=user_id))
+        field = f"{level}_solved"
+        setattr(ranking, field, getattr(ranking, field) + 1)
+        ranking.score += weights[level]
+    UserRanking.objects.bulk_create(rankings.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0005_userdailyactivity"),
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("problems", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UserRanking",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="ranking",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("score", models.PositiveIntegerField(default=0)),
+                ("easy_solved", models.PositiveIntegerField(default=0)),
+                ("medium_solved", models.PositiveIntegerField(default=0)),
+                ("hard_solved", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["-score", "user"], name="ranking_score_idx")
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_user_rankings, migrations.RunPython.noop),
+    ]
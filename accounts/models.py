@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Greatest
 from django.contrib.auth.models import User
 from django.utils.translation import gettext_lazy as _
 from accounts.constants import LANGUAGE_CHOICES
@@ -18,6 +20,8 @@ class Profile(models.Model):
         null=True,
         help_text="Profile photo (max 2MB)"
     )
+    # Resized copies of profile_photo: {"<size>": {"webp": name, "jpeg": name}}
+    profile_photo_variants = models.JSONField(default=dict, blank=True, editable=False)
     is_premium_user = models.BooleanField(default=False)
     bio = models.TextField(blank=True, null=True)
     occupation = models.CharField(max_length=255, blank=True, null=True)
@@ -33,8 +37,109 @@ class Profile(models.Model):
     current_day_problem_solved = models.BooleanField(default=False)
     current_streak = models.IntegerField(default=0)
     longest_streak = models.IntegerField(default=0)
+    # Day the streak fields above were last updated for (see accounts.streaks)
+    last_activity_date = models.DateField(blank=True, null=True)
+    timezone = models.CharField(max_length=64, default="UTC")
     is_onboarding_complete = models.BooleanField(default=False)
     is_email_verified = models.BooleanField(default=False)
 
     def __str__(self):
         return f"{self.user.username}'s Profile"
+
+
+class UserSession(models.Model):
+    """
+    One row per live refresh token. Rows are removed on logout, eviction and
+    expiry, so a user never has more than ``MAX_SESSIONS`` of them and the
+    session limit can be enforced without scanning the token tables.
+    """
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="sessions")
+    jti = models.CharField(max_length=255, unique=True)
+    created_at = models.DateTimeField()
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["user", "created_at"])]
+
+    def __str__(self):
+        return f"Session {self.jti} for {self.user_id}"
+
+
+class UserDailyActivity(models.Model):
+    """
+    Per-user, per-day activity counts backing the dashboard heatmap. Kept up
+    to date incrementally by the receivers in ``accounts.signals``; rebuilt
+    from history by the ``backfill_daily_activity`` command.
+    """
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="daily_activity"
+    )
+    date = models.DateField()
+    submissions = models.PositiveIntegerField(default=0)
+    accepted = models.PositiveIntegerField(default=0)
+    concepts_read = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("user", "date")
+
+    @classmethod
+    def adjust(cls, user_id, date, **deltas):
+        """Add ``deltas`` (e.g. ``accepted=1``) to the counts of one day."""
+        deltas = {field: delta for field, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        if any(delta > 0 for delta in deltas.values()):
+            cls.objects.bulk_create(
+                [cls(user_id=user_id, date=date)], ignore_conflicts=True
+            )
+        cls.objects.filter(user_id=user_id, date=date).update(
+            **{field: F(field) + delta for field, delta in deltas.items()}
+        )
+
+
+class UserRanking(models.Model):
+    """
+    Distinct problems a user has solved, by level, and their weighted score
+    (``RANKING_LEVEL_WEIGHTS``). Kept up to date incrementally by the
+    receivers in ``accounts.signals``; rebuilt from history by the
+    ``rebuild_rankings`` command.
+    """
+
+    LEVEL_FIELDS = {
+        "easy": "easy_solved",
+        "medium": "medium_solved",
+        "hard": "hard_solved",
+    }
+
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name="ranking"
+    )
+    score = models.PositiveIntegerField(default=0)
+    easy_solved = models.PositiveIntegerField(default=0)
+    medium_solved = models.PositiveIntegerField(default=0)
+    hard_solved = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [models.Index(fields=["-score", "user"], name="ranking_score_idx")]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.score}"
+
+    @classmethod
+    def adjust(cls, user_id, level, delta, weight):
+        """
+        Add ``delta`` solved problems of ``level``, each worth ``weight``.
+        Returns the new score.
+        """
+        if delta > 0:
+            cls.objects.bulk_create([cls(user_id=user_id)], ignore_conflicts=True)
+        field = cls.LEVEL_FIELDS[level]
+        rankings = cls.objects.filter(user_id=user_id)
+        # Clamped so that drift left for rebuild_rankings never fails a write
+        rankings.update(
+            score=Greatest(F("score") + delta * weight, 0),
+            **{field: Greatest(F(field) + delta, 0)},
+        )
+        return rankings.values_list("score", flat=True).first() or 0
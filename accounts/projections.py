@@ -0,0 +1,131 @@
+import json
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+
+from accounts.models import Profile
+from accounts.streaks import seconds_until_day_end, streak_state
+from ncore.conditional import make_etag
+
+PROFILE_PROJECTION_KEY_PREFIX = "profile-projection"
+
+
+def profile_projection_key(user_id):
+    return f"{PROFILE_PROJECTION_KEY_PREFIX}:{user_id}"
+
+
+def get_profile_projection(user_id):
+    """
+    Return the cached ``{"header": ..., "user": ..., "etag": ...}`` view of a
+    user's profile, building it on a miss.
+
+    Media URLs are stored relative to the site; ``absolute_profile_urls``
+    completes them for the current request. Entries are dropped by
+    ``invalidate_profile_projection`` whenever the User or Profile is saved.
+    """
+    key = profile_projection_key(user_id)
+    projection = cache.get(key)
+    if projection is None:
+        projection = build_profile_projection(user_id)
+        cache.set(key, projection, timeout=projection["ttl"])
+    return projection
+
+
+def invalidate_profile_projection(user_id):
+    cache.delete(profile_projection_key(user_id))
+
+
+def build_profile_projection(user_id):
+    try:
+        user = User.objects.get(pk=user_id, is_active=True)
+    except User.DoesNotExist:
+        # Claims-only requests reach this with a token of a deleted user
+        raise AuthenticationFailed(_("User not found"), code="user_not_found")
+    profile, created = Profile.objects.get_or_create(user=user)
+
+    profile_photo_url = profile.profile_photo.url if profile.profile_photo else ""
+    profile_photo_variants = {
+        size: {
+            file_format: default_storage.url(name)
+            for file_format, name in formats.items()
+        }
+        for size, formats in profile.profile_photo_variants.items()
+    }
+
+    streaks = streak_state(profile)
+    header = {
+        **streaks,
+        "language_selected": profile.language_selected,
+        "is_premium_user": profile.is_premium_user,
+        "first_name": user.first_name,
+        "last_name": user.last_name,
+        "profile_photo_url": profile_photo_url,
+        "email": user.email,
+        "username": user.username,
+    }
+    user_data = {
+        "username": user.username,
+        "first_name": user.first_name,
+        "last_name": user.last_name,
+        "email": user.email,
+        "phone_number": profile.phone_number or "",
+        "organisation_name": profile.organisation_name or "",
+        "address": profile.address or "",
+        "language_selected": profile.language_selected or "",
+        "profile_photo_url": profile_photo_url,
+        "profile_photo_variants": profile_photo_variants,
+        "is_premium_user": profile.is_premium_user,
+        "bio": profile.bio or "",
+        "occupation": profile.occupation or "",
+        "kaggle_profile_url": profile.kaggle_profile_url or "",
+        "github": profile.github or "",
+        "twitter": profile.twitter or "",
+        "portfolio": profile.portfolio or "",
+        "linkedin": profile.linkedin or "",
+        "pronouns": profile.pronouns or "",
+        "interests": profile.interests or "",
+        "date_of_birth": (
+            profile.date_of_birth.strftime("%Y-%m-%d") if profile.date_of_birth else ""
+        ),
+        "current_streak": streaks["current_streak"],
+        "longest_streak": streaks["longest_streak"],
+        "location": profile.address or "",
+        "timezone": profile.timezone,
+    }
+
+    projection = {"header": header, "user": user_data}
+    projection["etag"] = make_etag(json.dumps(projection, sort_keys=True))
+    # Streaks and day flags change at the user's midnight
+    projection["ttl"] = min(
+        settings.PROFILE_PROJECTION_TIMEOUT, seconds_until_day_end(profile.timezone)
+    )
+    return projection
+
+
+def absolute_profile_urls(request, data):
+    """Copy of a projection shape with its media URLs made absolute."""
+    data = dict(data)
+    if data.get("profile_photo_url"):
+        data["profile_photo_url"] = request.build_absolute_uri(
+            data["profile_photo_url"]
+        )
+    if "profile_photo_variants" in data:
+        data["profile_photo_variants"] = {
+            size: {
+                file_format: request.build_absolute_uri(url)
+                for file_format, url in formats.items()
+            }
+            for size, formats in data["profile_photo_variants"].items()
+        }
+    return data
+
+
+def profile_projection_validators(request, *args, **kwargs):
+    """``conditional_response`` validators for the projection endpoints."""
+    etag = get_profile_projection(request.user.pk)["etag"]
+    # Media URLs in the body are absolute, so they depend on the host
+    return (etag, request.get_host()), None
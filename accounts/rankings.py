@@ -0,0 +1,191 @@
+"""
+Global user ranking by solved problems.
+
+Each user's ``UserRanking`` row counts the distinct problems they have
+solved, by level, and weights them into a score. It is adjusted when a
+user's first accepted submission to a problem creates their
+``LeaderboardEntry`` and when deleting their last one removes it, so a rank
+never needs the accepted problems of every user counted. The
+``rebuild_rankings`` command recomputes every row from ``Submission``.
+
+Ranks are served like problem leaderboards (``problems.leaderboards``):
+each process keeps every ranked user's ``(-score, user_id)`` key in a
+sorted list tagged with a shared content version, so rank, percentile and
+neighbours are binary searches. Users with equal scores share a rank.
+"""
+
+import threading
+from bisect import bisect_left, insort
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+
+from accounts.models import UserRanking
+from ncore.conditional import bump_content_version, get_content_version
+from problems.models import LeaderboardEntry
+
+RANKING_KEY = "ranking:global"
+
+# Most neighbours served on each side of a user
+MAX_NEIGHBORS = 10
+
+
+class Ranking:
+    """Ranked users, highest score first, then oldest account."""
+
+    def __init__(self, version, rows):
+        self.version = version
+        self.keys = []
+        self.scores = {}
+        for score, user_id in rows:
+            self.keys.append((-score, user_id))
+            self.scores[user_id] = score
+
+    def __len__(self):
+        return len(self.keys)
+
+    def rank_of_score(self, score):
+        """1-based rank of ``score``: one more than the users above it."""
+        return bisect_left(self.keys, (-score,)) + 1
+
+    def rank(self, user_id):
+        """Rank of ``user_id``, ``None`` before they solve a problem."""
+        score = self.scores.get(user_id)
+        if score is None:
+            return None
+        return self.rank_of_score(score)
+
+    def percentile(self, user_id):
+        """Percentage of ranked users with a lower score than ``user_id``."""
+        score = self.scores.get(user_id)
+        if score is None:
+            return None
+        below = len(self.keys) - bisect_left(self.keys, (-score + 1,))
+        return round(below * 100 / len(self.keys), 2)
+
+    def neighbors(self, user_id, count):
+        """
+        ``(rank, user_id, score)`` of up to ``count`` users on each side of
+        ``user_id``, and of ``user_id`` itself, in rank order.
+        """
+        score = self.scores.get(user_id)
+        if score is None:
+            return []
+        position = bisect_left(self.keys, (-score, user_id))
+        window = self.keys[max(position - count, 0) : position + count + 1]
+        return [
+            (self.rank_of_score(-negated), neighbor_id, -negated)
+            for negated, neighbor_id in window
+        ]
+
+    def update(self, user_id, score):
+        old_score = self.scores.pop(user_id, None)
+        if old_score is not None:
+            del self.keys[bisect_left(self.keys, (-old_score, user_id))]
+        if score > 0:
+            insort(self.keys, (-score, user_id))
+            self.scores[user_id] = score
+
+
+class RankingIndex:
+    """Per-process ``Ranking``, checked against its shared version on reads."""
+
+    def __init__(self):
+        self.ranking = None
+        self.lock = threading.Lock()
+
+    def clear_local(self):
+        with self.lock:
+            self.ranking = None
+
+    def get(self):
+        version = get_content_version(RANKING_KEY)
+        with self.lock:
+            if self.ranking is not None and self.ranking.version == version:
+                return self.ranking
+
+        rows = (
+            UserRanking.objects.filter(score__gt=0)
+            .order_by("-score", "user_id")
+            .values_list("score", "user_id")
+        )
+        ranking = Ranking(version, rows.iterator(chunk_size=10000))
+        with self.lock:
+            self.ranking = ranking
+        return ranking
+
+    def changed(self, user_id, score):
+        """
+        Publish the new ``score`` of ``user_id`` once the current transaction
+        commits, like ``LeaderboardIndex.changed``.
+        """
+        transaction.on_commit(lambda: self.publish(user_id, score))
+
+    def publish(self, user_id, score):
+        """Bump the ranking version, updating the local copy."""
+        bump_content_version(RANKING_KEY)
+        version = get_content_version(RANKING_KEY)
+        with self.lock:
+            if self.ranking is not None and self.ranking.version + 1 == version:
+                self.ranking.update(user_id, score)
+                self.ranking.version = version
+
+
+ranking_index = RankingIndex()
+
+
+def problem_level(content_type_id, object_id):
+    model = ContentType.objects.get_for_id(content_type_id).model_class()
+    return model.objects.filter(pk=object_id).values_list("level", flat=True).first()
+
+
+def record_solved(entry, delta):
+    """
+    Count the problem of a created (``delta=1``) or deleted (``delta=-1``)
+    leaderboard entry towards its user's ranking, at the level and weight
+    it was credited with.
+    """
+    if delta > 0:
+        # Remembered on the entry: the problem's level or the weights may
+        # change before it is debited
+        entry.level = problem_level(entry.content_type_id, entry.object_id) or ""
+        entry.weight = settings.RANKING_LEVEL_WEIGHTS.get(entry.level, 0)
+        LeaderboardEntry.objects.filter(pk=entry.pk).update(
+            level=entry.level, weight=entry.weight
+        )
+    if not entry.weight:
+        return
+    score = UserRanking.adjust(entry.user_id, entry.level, delta, entry.weight)
+    ranking_index.changed(entry.user_id, score)
+
+
+def ranking_data(user, neighbor_count):
+    ranking = ranking_index.get()
+    solved = (
+        UserRanking.objects.filter(user=user)
+        .values("score", *UserRanking.LEVEL_FIELDS.values())
+        .first()
+    ) or {"score": 0, **{field: 0 for field in UserRanking.LEVEL_FIELDS.values()}}
+
+    neighbors = ranking.neighbors(user.id, neighbor_count)
+    usernames = dict(
+        User.objects.filter(
+            pk__in=[neighbor_id for _, neighbor_id, _ in neighbors]
+        ).values_list("id", "username")
+    )
+    return {
+        "rank": ranking.rank(user.id),
+        "percentile": ranking.percentile(user.id),
+        "total": len(ranking),
+        "score": solved["score"],
+        "solved": {
+            level: solved[field] for level, field in UserRanking.LEVEL_FIELDS.items()
+        },
+        "neighbors": [
+            {"rank": rank, "username": usernames[neighbor_id], "score": score}
+            for rank, neighbor_id, score in neighbors
+            if neighbor_id in usernames
+        ],
+    }
@@ -1,4 +1,5 @@
 import os
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 from django.contrib.auth.models import User
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
@@ -6,8 +7,12 @@ from google.auth.transport import requests
 from google.oauth2 import id_token
 from rest_framework import serializers
 from rest_framework.validators import UniqueValidator
+from rest_framework_simplejwt.serializers import (
+    TokenRefreshSerializer as BaseTokenRefreshSerializer,
+)
 
 from .models import Profile
+from .tokens import RefreshToken
 
 GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
 
@@ -129,6 +134,10 @@ class LogoutSerializer(serializers.Serializer):
     refresh = serializers.CharField(required=True)
 
 
+class TokenRefreshSerializer(BaseTokenRefreshSerializer):
+    token_class = RefreshToken
+
+
 class OnboardingSerializer(serializers.ModelSerializer):
     organisation_name = serializers.CharField(
         required=False, allow_blank=True, allow_null=True
@@ -181,8 +190,19 @@ class UserDetailSerializer(serializers.ModelSerializer):
             "pronouns",
             "interests",
             "date_of_birth",
+            "timezone",
         ]
 
+    def validate_timezone(self, value):
+        """
+        Validate the IANA timezone name streak days are counted in
+        """
+        try:
+            ZoneInfo(value)
+        except (ZoneInfoNotFoundError, ValueError):
+            raise serializers.ValidationError("Unknown timezone.")
+        return value
+
     def validate_profile_photo(self, value):
         """
         Validate profile photo file size and type
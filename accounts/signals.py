@@ -0,0 +1,119 @@
+from django.contrib.auth.models import User
+from django.db.models import DEFERRED
+from django.db.models.signals import (
+    post_delete,
+    post_init,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from accounts.models import Profile, UserDailyActivity
+from accounts.projections import invalidate_profile_projection
+from accounts.rankings import record_solved
+from accounts.streaks import (
+    ACCEPTED_VERDICT,
+    CONCEPT_READ,
+    PROBLEM_SOLVED,
+    record_activity,
+)
+from accounts.tokens import blacklist_index
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def blacklisted_token_saved(sender, instance, created, **kwargs):
+    # No post_delete counterpart: it would stop purge_expired_tokens from
+    # fast-deleting blacklist rows, and only expired tokens are removed.
+    if created:
+        blacklist_index.add(instance.token.jti, instance.token.expires_at.timestamp())
+
+
+@receiver([post_save, post_delete], sender=User)
+def user_changed(sender, instance, **kwargs):
+    invalidate_profile_projection(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Profile)
+def profile_changed(sender, instance, **kwargs):
+    invalidate_profile_projection(instance.user_id)
+
+
+@receiver(post_init, sender="problems.Submission")
+def submission_loaded(sender, instance, **kwargs):
+    # Remembered so that a verdict change can be applied to the rollup. A
+    # deferred verdict is not loaded here, which would cost a query per row
+    # of every projected queryset; it is looked up only before a write.
+    instance._saved_verdict = instance.__dict__.get("verdict", DEFERRED)
+
+
+@receiver([pre_save, pre_delete], sender="problems.Submission")
+def submission_writing(sender, instance, **kwargs):
+    if instance._saved_verdict is not DEFERRED or instance.pk is None:
+        return
+    saved_verdict = (
+        sender.objects.filter(pk=instance.pk).values_list("verdict", flat=True).first()
+    )
+    instance._saved_verdict = saved_verdict
+    # Kept so that post_delete receivers can read it after the row is gone
+    instance.__dict__.setdefault("verdict", saved_verdict)
+
+
+@receiver(post_save, sender="problems.Submission")
+def submission_saved(sender, instance, created, **kwargs):
+    accepted = instance.verdict == ACCEPTED_VERDICT
+    was_accepted = not created and instance._saved_verdict == ACCEPTED_VERDICT
+    UserDailyActivity.adjust(
+        instance.user_id,
+        timezone.localdate(instance.created_timestamp),
+        submissions=int(created),
+        accepted=int(accepted) - int(was_accepted),
+    )
+    instance._saved_verdict = instance.verdict
+
+    if accepted:
+        record_activity(instance.user_id, PROBLEM_SOLVED, instance.created_timestamp)
+
+
+@receiver(post_delete, sender="problems.Submission")
+def submission_deleted(sender, instance, **kwargs):
+    UserDailyActivity.adjust(
+        instance.user_id,
+        timezone.localdate(instance.created_timestamp),
+        submissions=-1,
+        accepted=-int(instance._saved_verdict == ACCEPTED_VERDICT),
+    )
+
+
+@receiver(post_save, sender="problems.LeaderboardEntry")
+def leaderboard_entry_saved(sender, instance, created, **kwargs):
+    # An entry is created by its user's first accepted submission to a problem
+    if created:
+        record_solved(instance, 1)
+
+
+@receiver(post_delete, sender="problems.LeaderboardEntry")
+def leaderboard_entry_deleted(sender, instance, **kwargs):
+    record_solved(instance, -1)
+
+
+@receiver(post_save, sender="concepts.ConceptsRead")
+def concept_read_saved(sender, instance, created, **kwargs):
+    if created:
+        UserDailyActivity.adjust(
+            instance.user_id,
+            timezone.localdate(instance.read_timestamp),
+            concepts_read=1,
+        )
+        record_activity(instance.user_id, CONCEPT_READ, instance.read_timestamp)
+
+
+@receiver(post_delete, sender="concepts.ConceptsRead")
+def concept_read_deleted(sender, instance, **kwargs):
+    UserDailyActivity.adjust(
+        instance.user_id,
+        timezone.localdate(instance.read_timestamp),
+        concepts_read=-1,
+    )
@@ -0,0 +1,99 @@
+from datetime import datetime, time, timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.models import Profile
+
+ACCEPTED_VERDICT = 3  # "Accepted" in Submission.STATUS_CHOICES
+
+CONCEPT_READ = "concept_read"
+PROBLEM_SOLVED = "problem_solved"
+
+ACTIVITY_FLAGS = {
+    CONCEPT_READ: "current_day_concept_read",
+    PROBLEM_SOLVED: "current_day_problem_solved",
+}
+
+
+def get_zone(name):
+    try:
+        return ZoneInfo(name or "UTC")
+    except (ZoneInfoNotFoundError, ValueError):
+        return ZoneInfo("UTC")
+
+
+def local_date(moment, zone_name):
+    """The calendar day ``moment`` falls on in the ``zone_name`` timezone."""
+    return timezone.localtime(moment, get_zone(zone_name)).date()
+
+
+def seconds_until_day_end(zone_name, now=None):
+    """Seconds until the current day ends in the ``zone_name`` timezone."""
+    zone = get_zone(zone_name)
+    now = timezone.localtime(now or timezone.now(), zone)
+    midnight = datetime.combine(now.date() + timedelta(days=1), time.min, zone)
+    return max(int((midnight - now).total_seconds()), 1)
+
+
+def advance_streak(state, day, activity):
+    """
+    Fold one activity on ``day`` into ``state`` (a Profile or any object with
+    the streak fields) in O(1). Activity older than ``last_activity_date``
+    cannot change the streaks and is ignored.
+    """
+    last_day = state.last_activity_date
+    if last_day is not None and day < last_day:
+        return False
+
+    if last_day != day:
+        if last_day is not None and day - last_day == timedelta(days=1):
+            state.current_streak += 1
+        else:
+            state.current_streak = 1
+        state.longest_streak = max(state.longest_streak, state.current_streak)
+        state.last_activity_date = day
+        state.current_day_concept_read = False
+        state.current_day_problem_solved = False
+
+    setattr(state, ACTIVITY_FLAGS[activity], True)
+    return True
+
+
+def record_activity(user_id, activity, moment):
+    """
+    Update the streak fields of ``user_id`` for an accepted submission or a
+    concept read at ``moment``. The profile row is locked for the update, so
+    concurrent activity of the same user cannot lose an increment.
+    """
+    with transaction.atomic():
+        profile, _ = Profile.objects.select_for_update().get_or_create(user_id=user_id)
+        if advance_streak(profile, local_date(moment, profile.timezone), activity):
+            profile.save(
+                update_fields=[
+                    "current_streak",
+                    "longest_streak",
+                    "last_activity_date",
+                    "current_day_concept_read",
+                    "current_day_problem_solved",
+                ]
+            )
+
+
+def streak_state(profile, now=None):
+    """
+    Streak fields of ``profile`` as of today in the user's timezone: the
+    stored values describe ``last_activity_date``, so a streak whose last
+    day is before yesterday has lapsed and the day flags only hold today.
+    """
+    today = local_date(now or timezone.now(), profile.timezone)
+    last_day = profile.last_activity_date
+    is_today = last_day == today
+    alive = last_day is not None and today - last_day <= timedelta(days=1)
+    return {
+        "current_day_concept_read": is_today and profile.current_day_concept_read,
+        "current_day_problem_solved": is_today and profile.current_day_problem_solved,
+        "current_streak": profile.current_streak if alive else 0,
+        "longest_streak": profile.longest_streak,
+    }
@@ -2,6 +2,8 @@ from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status
 
+from ncore.swagger_schemas import projection_parameters
+
 from .serializers import (
     ForgotPasswordSerializer,
     GoogleAuthSerializer,
@@ -267,6 +269,31 @@ header_data_swagger_schema = swagger_auto_schema(
     }
 )
 
+me_schema = swagger_auto_schema(
+    operation_description="Get the header data and user details of the "
+    "authenticated user in one response. Supports If-None-Match.",
+    responses={
+        200: openapi.Response(
+            description="Header data and user details",
+            schema=openapi.Schema(
+                type=openapi.TYPE_OBJECT,
+                properties={
+                    "header": openapi.Schema(
+                        type=openapi.TYPE_OBJECT,
+                        description="Same shape as header-data",
+                    ),
+                    "user": openapi.Schema(
+                        type=openapi.TYPE_OBJECT,
+                        description="Same shape as user-detail's user",
+                    ),
+                },
+            ),
+        ),
+        304: openapi.Response(description="Not modified"),
+        401: openapi.Response(description="Unauthorized - User not authenticated"),
+    },
+)
+
 user_heatmap_schema = swagger_auto_schema(
     manual_parameters=[
         openapi.Parameter(
@@ -291,6 +318,11 @@ user_heatmap_schema = swagger_auto_schema(
                             "profile_photo_url": openapi.Schema(
                                 type=openapi.TYPE_STRING, format=openapi.FORMAT_URI
                             ),
+                            "profile_photo_variants": openapi.Schema(
+                                type=openapi.TYPE_OBJECT,
+                                description="Resized photo URLs by size, then "
+                                "format (webp, jpeg)",
+                            ),
                             "current_streak": openapi.Schema(type=openapi.TYPE_INTEGER),
                             "longest_streak": openapi.Schema(type=openapi.TYPE_INTEGER),
                             "organisation_name": openapi.Schema(
@@ -340,6 +372,16 @@ user_heatmap_schema = swagger_auto_schema(
                         "username": "john_doe",
                         "name": "John Doe",
                         "profile_photo_url": "https://example.com/photo.jpg",
+                        "profile_photo_variants": {
+                            "64": {
+                                "webp": "https://example.com/photo_64.webp",
+                                "jpeg": "https://example.com/photo_64.jpg",
+                            },
+                            "256": {
+                                "webp": "https://example.com/photo_256.webp",
+                                "jpeg": "https://example.com/photo_256.jpg",
+                            },
+                        },
                         "current_streak": 5,
                         "longest_streak": 10,
                         "organisation_name": "Tech Corp",
@@ -393,6 +435,23 @@ user_heatmap_data_schema = swagger_auto_schema(
             required=False,
             description="End date for heatmap data in YYYY-MM-DD format. Defaults to current date if not provided.",
         ),
+        openapi.Parameter(
+            name="encoding",
+            in_=openapi.IN_QUERY,
+            type=openapi.TYPE_STRING,
+            enum=["list", "arrays", "rle", "bitmap"],
+            required=False,
+            description=(
+                "Wire format of the heatmap, also accepted as a media type parameter "
+                "(Accept: application/json; encoding=rle). Defaults to list, one object per day. "
+                'arrays: {"encoding", "start_date", "submissions_count": [...], "concepts_read_count": [...]} '
+                "with one entry per day. "
+                'rle: {"encoding", "start_date", "days", "runs": [[length, submissions_count, concepts_read_count], ...]}. '
+                'bitmap: {"encoding", "start_date", "days", "active", "submissions_count", "concepts_read_count"} '
+                "where active is a base64 bitmap of days with activity (bit i % 8 of byte i // 8) "
+                "and the count arrays hold active days only."
+            ),
+        ),
     ],
     responses={
         200: openapi.Response(
@@ -435,7 +494,7 @@ user_heatmap_data_schema = swagger_auto_schema(
             },
         ),
         400: openapi.Response(
-            description="Bad Request - Invalid date format or start_date after end_date",
+            description="Bad Request - start_date after end_date or unknown encoding",
             schema=openapi.Schema(
                 type=openapi.TYPE_OBJECT,
                 properties={"error": openapi.Schema(type=openapi.TYPE_STRING)},
@@ -456,6 +515,94 @@ user_heatmap_data_schema = swagger_auto_schema(
     },
 )
 
+user_rank_schema = swagger_auto_schema(
+    operation_description=(
+        "Global rank of a user by distinct problems solved, weighted by level. "
+        "Users with equal scores share a rank; users without a solved problem "
+        "have no rank."
+    ),
+    manual_parameters=[
+        openapi.Parameter(
+            name="username",
+            in_=openapi.IN_PATH,
+            type=openapi.TYPE_STRING,
+            required=True,
+            description="Username",
+        ),
+        openapi.Parameter(
+            name="neighbors",
+            in_=openapi.IN_QUERY,
+            type=openapi.TYPE_INTEGER,
+            required=False,
+            description="Users listed on each side of this user (0-10, default 2)",
+        ),
+    ],
+    responses={
+        200: openapi.Response(
+            description="User rank retrieved successfully",
+            schema=openapi.Schema(
+                type=openapi.TYPE_OBJECT,
+                properties={
+                    "rank": openapi.Schema(type=openapi.TYPE_INTEGER),
+                    "percentile": openapi.Schema(
+                        type=openapi.TYPE_NUMBER,
+                        description="Percentage of ranked users with a lower score",
+                    ),
+                    "total": openapi.Schema(type=openapi.TYPE_INTEGER),
+                    "score": openapi.Schema(type=openapi.TYPE_INTEGER),
+                    "solved": openapi.Schema(
+                        type=openapi.TYPE_OBJECT,
+                        properties={
+                            "easy": openapi.Schema(type=openapi.TYPE_INTEGER),
+                            "medium": openapi.Schema(type=openapi.TYPE_INTEGER),
+                            "hard": openapi.Schema(type=openapi.TYPE_INTEGER),
+                        },
+                    ),
+                    "neighbors": openapi.Schema(
+                        type=openapi.TYPE_ARRAY,
+                        items=openapi.Schema(
+                            type=openapi.TYPE_OBJECT,
+                            properties={
+                                "rank": openapi.Schema(type=openapi.TYPE_INTEGER),
+                                "username": openapi.Schema(type=openapi.TYPE_STRING),
+                                "score": openapi.Schema(type=openapi.TYPE_INTEGER),
+                            },
+                        ),
+                    ),
+                },
+            ),
+            examples={
+                "application/json": {
+                    "rank": 12,
+                    "percentile": 87.5,
+                    "total": 96,
+                    "score": 14,
+                    "solved": {"easy": 4, "medium": 2, "hard": 1},
+                    "neighbors": [
+                        {"rank": 11, "username": "ada", "score": 15},
+                        {"rank": 12, "username": "alan", "score": 14},
+                        {"rank": 13, "username": "grace", "score": 11},
+                    ],
+                }
+            },
+        ),
+        400: openapi.Response(
+            description="Bad Request - neighbors out of range",
+            schema=openapi.Schema(
+                type=openapi.TYPE_OBJECT,
+                properties={"error": openapi.Schema(type=openapi.TYPE_STRING)},
+            ),
+        ),
+        404: openapi.Response(
+            description="User not found",
+            schema=openapi.Schema(
+                type=openapi.TYPE_OBJECT,
+                properties={"error": openapi.Schema(type=openapi.TYPE_STRING)},
+            ),
+        ),
+    },
+)
+
 problems_attempted_schema = swagger_auto_schema(
     manual_parameters=[
         openapi.Parameter(
@@ -570,6 +717,7 @@ concepts_read_schema = swagger_auto_schema(
             required=False,
             description="Number of items per page",
         ),
+        *projection_parameters(["id", "title", "description", "slug", "last_read"]),
     ],
     responses={
         200: openapi.Response(
@@ -652,6 +800,17 @@ submissions_schema = swagger_auto_schema(
             required=False,
             description="Number of items per page",
         ),
+        *projection_parameters(
+            [
+                "id",
+                "verdict",
+                "verdict_display",
+                "created_timestamp",
+                "time_taken",
+                "memory_taken",
+                "problem",
+            ]
+        ),
     ],
     responses={
         200: openapi.Response(
@@ -1,14 +1,60 @@
+import json
+import threading
+import time
+from datetime import date, datetime, timedelta
+from datetime import timezone as dt_timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO, StringIO
+from tempfile import TemporaryDirectory
+from urllib.parse import parse_qs
 from unittest.mock import MagicMock, patch
 
 from django.contrib.auth.models import User
-from django.test import TestCase
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
 from rest_framework import status
 from rest_framework.test import APITestCase
-from rest_framework_simplejwt.tokens import RefreshToken
-
-from accounts.models import Profile
-from accounts.utils import download_and_save_profile_photo, verify_recaptcha_token
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken,
+)
+
+from accounts.authentication import JWTAuthentication
+from accounts.middlewares import MaxRefreshTokenMiddleware
+from accounts.models import Profile, UserDailyActivity, UserRanking, UserSession
+from accounts.rankings import RANKING_KEY, ranking_index
+from accounts.streaks import (
+    CONCEPT_READ,
+    PROBLEM_SOLVED,
+    record_activity,
+    streak_state,
+)
+from accounts.tokens import RefreshToken, blacklist_index
+from accounts.utils import (
+    build_profile_photo_variants,
+    download_and_save_profile_photo,
+    ingest_profile_photo,
+    verify_recaptcha_token,
+)
+from concepts.models import Concept, ConceptsRead
+from ncore.conditional import get_content_version
+from ncore.tests import LOCMEM_CACHES
+from problems.leaderboards import leaderboard_index
+from problems.models import ConceptBasedProblem, Submission
+
+
+def make_image_bytes(size=(400, 200), file_format="PNG"):
+    buffer = BytesIO()
+    Image.new("RGB", size, "red").save(buffer, file_format)
+    return buffer.getvalue()
 
 
 class PublicAuthViewSetTests(APITestCase):
@@ -266,6 +312,10 @@ class AuthenticatedUserViewSetTests(APITestCase):
 class UtilsTests(TestCase):
     """Test cases for utility functions"""
 
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+
     @patch("requests.post")
     def test_verify_recaptcha_token_success(self, mock_post):
         """Test successful reCAPTCHA verification"""
@@ -299,21 +349,116 @@ class UtilsTests(TestCase):
 
         self.assertFalse(result)
 
+    def photo_response(self, content):
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.iter_content.return_value = [content]
+        mock_response.__enter__.return_value = mock_response
+        return mock_response
+
     @patch("requests.get")
     def test_download_and_save_profile_photo_success(self, mock_get):
         """Test successful profile photo download"""
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.content = b"fake_image_content"
-        mock_get.return_value = mock_response
+        mock_get.return_value = self.photo_response(make_image_bytes())
+        user = User.objects.create_user(username="testuser", email="t@example.com")
+        profile = Profile.objects.create(user=user)
+
+        with TemporaryDirectory() as media_root, self.settings(MEDIA_ROOT=media_root):
+            saved = download_and_save_profile_photo(
+                profile, "https://example.com/photo.jpg", user.id
+            )
+            profile.refresh_from_db()
+
+            self.assertTrue(saved)
+            mock_get.assert_called_once_with(
+                "https://example.com/photo.jpg", timeout=10, stream=True
+            )
+            self.assertTrue(profile.profile_photo.name.endswith(".png"))
+            self.assertEqual(set(profile.profile_photo_variants), {"64", "256"})
+            with Image.open(
+                default_storage.path(profile.profile_photo_variants["64"]["webp"])
+            ) as variant:
+                self.assertEqual(variant.format, "WEBP")
+                self.assertEqual(variant.size, (64, 32))
+
+    @patch("requests.get")
+    def test_download_and_save_profile_photo_keeps_other_updates(self, mock_get):
+        """Test profile updates made during the download are not overwritten"""
+        user = User.objects.create_user(username="testuser", email="t@example.com")
+        profile = Profile.objects.create(user=user)
+
+        def get(*args, **kwargs):
+            Profile.objects.filter(pk=profile.pk).update(occupation="Engineer")
+            return self.photo_response(make_image_bytes())
+
+        mock_get.side_effect = get
+        with TemporaryDirectory() as media_root, self.settings(MEDIA_ROOT=media_root):
+            saved = download_and_save_profile_photo(
+                profile, "https://example.com/photo.jpg", user.id
+            )
+
+        self.assertTrue(saved)
+        profile.refresh_from_db()
+        self.assertEqual(profile.occupation, "Engineer")
+        self.assertTrue(profile.profile_photo.name.endswith(".png"))
+
+    def test_variants_shared_between_profiles_kept(self):
+        """Test rebuilding variants keeps files another profile still uses"""
+        profiles = [
+            Profile.objects.create(
+                user=User.objects.create_user(
+                    username=f"user{index}", email=f"user{index}@example.com"
+                )
+            )
+            for index in range(2)
+        ]
+
+        with TemporaryDirectory() as media_root, self.settings(MEDIA_ROOT=media_root):
+            for profile in profiles:
+                profile.profile_photo.save(
+                    "avatar.png", ContentFile(make_image_bytes()), save=False
+                )
+                build_profile_photo_variants(profile)
+            self.assertEqual(
+                profiles[0].profile_photo_variants, profiles[1].profile_photo_variants
+            )
+
+            profiles[0].profile_photo.save(
+                "avatar.png", ContentFile(make_image_bytes(size=(300, 300))), save=False
+            )
+            build_profile_photo_variants(profiles[0])
+
+            profiles[1].refresh_from_db()
+            for formats in profiles[1].profile_photo_variants.values():
+                for name in formats.values():
+                    self.assertTrue(default_storage.exists(name))
 
+    @patch("requests.get")
+    def test_download_and_save_profile_photo_too_large(self, mock_get):
+        """Test oversized downloads are abandoned"""
+        mock_get.return_value = self.photo_response(make_image_bytes())
         profile = MagicMock()
-        profile.profile_photo.save = MagicMock()
 
-        download_and_save_profile_photo(profile, "https://example.com/photo.jpg", 1)
+        with self.settings(PROFILE_PHOTO_MAX_SIZE=10):
+            saved = download_and_save_profile_photo(
+                profile, "https://example.com/photo.jpg", 1
+            )
+
+        self.assertFalse(saved)
+        profile.profile_photo.save.assert_not_called()
+
+    @patch("requests.get")
+    def test_download_and_save_profile_photo_not_an_image(self, mock_get):
+        """Test downloads Pillow cannot read are discarded"""
+        mock_get.return_value = self.photo_response(b"fake_image_content")
+        profile = MagicMock()
+
+        saved = download_and_save_profile_photo(
+            profile, "https://example.com/photo.jpg", 1
+        )
 
-        mock_get.assert_called_once_with("https://example.com/photo.jpg", timeout=10)
-        profile.profile_photo.save.assert_called_once()
+        self.assertFalse(saved)
+        profile.profile_photo.save.assert_not_called()
 
     @patch("requests.get")
     def test_download_and_save_profile_photo_failure(self, mock_get):
@@ -328,6 +473,28 @@ class UtilsTests(TestCase):
         mock_get.assert_called_once()
         profile.profile_photo.save.assert_not_called()
 
+    @patch("accounts.utils.profile_photo_executor")
+    @patch("accounts.serializers.GoogleAuthSerializer.validate")
+    def test_google_auth_enqueues_photo(self, mock_validate, mock_executor):
+        """Test google_auth hands the photo download to the background pool"""
+        mock_validate.return_value = {
+            "email": "test@example.com",
+            "first_name": "Test",
+            "last_name": "User",
+            "profile_photo_url": "https://example.com/photo.jpg",
+        }
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("public-auth-google-auth"), {"token": "token"}
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        profile = Profile.objects.get(user__email="test@example.com")
+        mock_executor.submit.assert_called_once_with(
+            ingest_profile_photo, profile.pk, "https://example.com/photo.jpg"
+        )
+
 
 class SerializerTests(TestCase):
     """Test cases for serializers"""
@@ -410,3 +577,857 @@ class ModelTests(TestCase):
 
         # Test reverse relationship
         self.assertEqual(user.profile, profile)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ProfileProjectionTests(APITestCase):
+    """Test cases for the cached header and user detail data"""
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser",
+            email="test@example.com",
+            password="testpass123",
+            first_name="Test",
+        )
+        self.profile = Profile.objects.create(
+            user=self.user, current_streak=3, last_activity_date=timezone.localdate()
+        )
+        access_token = str(RefreshToken.for_user(self.user).access_token)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access_token}")
+        self.me_url = reverse("authenticated-user-me")
+        self.header_url = reverse("authenticated-user-header-data")
+
+    def test_repeated_header_loads_without_queries(self):
+        """Test header data is served from the projection without queries"""
+        self.client.get(self.header_url)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.header_url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["current_streak"], 3)
+
+    def test_me_combines_both_shapes(self):
+        """Test the combined endpoint matches header-data and user-detail"""
+        response = self.client.get(self.me_url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["header"], self.client.get(self.header_url).data)
+        self.assertEqual(
+            response.data["user"],
+            self.client.get(reverse("authenticated-user-user-detail")).data["user"],
+        )
+
+    def test_me_not_modified(self):
+        """Test the combined endpoint answers If-None-Match with 304"""
+        response = self.client.get(self.me_url)
+
+        response = self.client.get(self.me_url, HTTP_IF_NONE_MATCH=response["ETag"])
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_invalidated_on_save(self):
+        """Test profile and user saves are visible on the next read"""
+        etag = self.client.get(self.me_url)["ETag"]
+
+        self.profile.current_streak = 4
+        self.profile.save()
+        self.user.first_name = "Changed"
+        self.user.save()
+        response = self.client.get(self.me_url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["header"]["current_streak"], 4)
+        self.assertEqual(response.data["user"]["first_name"], "Changed")
+
+
+class StreakTests(APITestCase):
+    """Test cases for the streak engine"""
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        self.profile = Profile.objects.create(user=self.user)
+        self.concept = Concept.objects.create(
+            title="Gradient Descent",
+            description="Long description",
+            one_liner_desc="Short description",
+            level="Easy",
+            preview_image_url="https://example.com/preview.png",
+            author=self.user,
+        )
+        self.problem = ConceptBasedProblem.objects.create(
+            title="Linear Regression", level="easy", author=self.user
+        )
+
+    def record(self, activity, moment):
+        record_activity(self.user.id, activity, moment)
+        self.profile.refresh_from_db()
+
+    def test_consecutive_days(self):
+        """Test streaks grow on consecutive days and reset after a gap"""
+        self.record(PROBLEM_SOLVED, datetime(2025, 1, 1, 10, tzinfo=dt_timezone.utc))
+        self.record(CONCEPT_READ, datetime(2025, 1, 2, 10, tzinfo=dt_timezone.utc))
+        self.record(CONCEPT_READ, datetime(2025, 1, 2, 12, tzinfo=dt_timezone.utc))
+        self.assertEqual(self.profile.current_streak, 2)
+        self.assertTrue(self.profile.current_day_concept_read)
+        self.assertFalse(self.profile.current_day_problem_solved)
+
+        self.record(PROBLEM_SOLVED, datetime(2025, 1, 5, 10, tzinfo=dt_timezone.utc))
+        self.assertEqual(self.profile.current_streak, 1)
+        self.assertEqual(self.profile.longest_streak, 2)
+
+    def test_days_follow_user_timezone(self):
+        """Test activity is assigned to days in the user's timezone"""
+        self.profile.timezone = "Asia/Kolkata"
+        self.profile.save()
+
+        self.record(PROBLEM_SOLVED, datetime(2025, 1, 1, 10, tzinfo=dt_timezone.utc))
+        # 20:00 UTC is already the next day in India
+        self.record(PROBLEM_SOLVED, datetime(2025, 1, 1, 20, tzinfo=dt_timezone.utc))
+
+        self.assertEqual(self.profile.current_streak, 2)
+        self.assertEqual(self.profile.last_activity_date, date(2025, 1, 2))
+
+    def test_lapsed_streak_reads_as_zero(self):
+        """Test a streak not continued yesterday or today reads as zero"""
+        self.record(CONCEPT_READ, timezone.now() - timedelta(days=3))
+
+        state = streak_state(self.profile)
+
+        self.assertEqual(state["current_streak"], 0)
+        self.assertEqual(state["longest_streak"], 1)
+        self.assertFalse(state["current_day_concept_read"])
+
+    def test_activity_signals(self):
+        """Test accepted submissions and concept reads update the streak"""
+        Submission.objects.create(
+            user=self.user, content_object=self.problem, verdict=4
+        )
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.current_streak, 0)
+
+        Submission.objects.create(
+            user=self.user, content_object=self.problem, verdict=3
+        )
+        ConceptsRead.objects.create(user=self.user, concept=self.concept)
+        self.profile.refresh_from_db()
+
+        state = streak_state(self.profile)
+        self.assertEqual(state["current_streak"], 1)
+        self.assertTrue(state["current_day_problem_solved"])
+        self.assertTrue(state["current_day_concept_read"])
+
+    def test_recompute_streaks(self):
+        """Test the recompute command rebuilds streaks from history"""
+        read = ConceptsRead.objects.create(user=self.user, concept=self.concept)
+        submission = Submission.objects.create(
+            user=self.user, content_object=self.problem, verdict=3
+        )
+        now = timezone.now()
+        ConceptsRead.objects.filter(pk=read.pk).update(
+            read_timestamp=now - timedelta(days=1)
+        )
+        Submission.objects.filter(pk=submission.pk).update(created_timestamp=now)
+        Profile.objects.filter(pk=self.profile.pk).update(
+            current_streak=9, longest_streak=9
+        )
+
+        call_command("recompute_streaks", batch_size=1, stdout=StringIO())
+        self.profile.refresh_from_db()
+
+        self.assertEqual(self.profile.current_streak, 2)
+        self.assertEqual(self.profile.longest_streak, 2)
+        self.assertTrue(self.profile.current_day_problem_solved)
+        self.assertFalse(self.profile.current_day_concept_read)
+
+
+class DailyActivityTests(APITestCase):
+    """Test cases for the daily activity rollup and heatmap"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        Profile.objects.create(user=self.user)
+        self.concept = Concept.objects.create(
+            title="Gradient Descent",
+            description="Long description",
+            one_liner_desc="Short description",
+            level="Easy",
+            preview_image_url="https://example.com/preview.png",
+            author=self.user,
+        )
+        self.problem = ConceptBasedProblem.objects.create(
+            title="Linear Regression", level="easy", author=self.user
+        )
+        self.url = reverse("dashboard-user-heatmap", args=[self.user.username])
+
+    def today(self):
+        return UserDailyActivity.objects.get(user=self.user, date=timezone.localdate())
+
+    def test_rollup_maintained_on_write(self):
+        """Test submissions, verdict changes and reads adjust the rollup"""
+        submission = Submission.objects.create(
+            user=self.user, content_object=self.problem, verdict=1
+        )
+        Submission.objects.create(
+            user=self.user, content_object=self.problem, verdict=3
+        )
+        ConceptsRead.objects.create(user=self.user, concept=self.concept)
+        submission = Submission.objects.get(pk=submission.pk)
+        submission.verdict = 3
+        submission.save()
+
+        activity = self.today()
+        self.assertEqual(
+            (activity.submissions, activity.accepted, activity.concepts_read),
+            (2, 2, 1),
+        )
+
+        submission.delete()
+        activity = self.today()
+        self.assertEqual((activity.submissions, activity.accepted), (1, 1))
+
+    def test_heatmap_reads_rollup(self):
+        """Test the heatmap is built from rollup rows in constant queries"""
+        today = timezone.localdate()
+        UserDailyActivity.objects.create(
+            user=self.user, date=today, submissions=5, accepted=2, concepts_read=1
+        )
+        start = (today - timedelta(days=364)).isoformat()
+
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                self.url, {"start_date": start, "end_date": today.isoformat()}
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 365)
+        self.assertEqual(
+            response.data[-1],
+            {
+                "date": today.isoformat(),
+                "submissions_count": 2,
+                "concepts_read_count": 1,
+            },
+        )
+
+    def test_projected_submissions_skip_verdict(self):
+        """Test loading submissions without their verdict adds no queries"""
+        for _ in range(5):
+            Submission.objects.create(
+                user=self.user, content_object=self.problem, verdict=4
+            )
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        url = reverse(
+            "authenticated-problems-submissions", args=["concept", self.problem.slug]
+        )
+
+        with self.assertNumQueries(2):
+            response = self.client.get(url, {"fields": "created_timestamp"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 5)
+
+        # A verdict deferred at load time is still applied to the rollup
+        submission = Submission.objects.defer("verdict").first()
+        submission.verdict = 3
+        submission.save()
+        self.assertEqual(self.today().accepted, 1)
+        Submission.objects.defer("verdict").get(pk=submission.pk).delete()
+        self.assertEqual((self.today().submissions, self.today().accepted), (4, 0))
+
+    def test_backfill_daily_activity(self):
+        """Test the backfill command rebuilds the rollup from history"""
+        Submission.objects.create(
+            user=self.user, content_object=self.problem, verdict=3
+        )
+        Submission.objects.create(
+            user=self.user, content_object=self.problem, verdict=4
+        )
+        ConceptsRead.objects.create(user=self.user, concept=self.concept)
+        UserDailyActivity.objects.all().delete()
+
+        call_command("backfill_daily_activity", batch_size=1, stdout=StringIO())
+
+        activity = self.today()
+        self.assertEqual(
+            (activity.submissions, activity.accepted, activity.concepts_read),
+            (2, 1, 1),
+        )
+
+    def test_heatmap_compact_encodings(self):
+        """Test the compact heatmap encodings describe the same days"""
+        start = date(2024, 1, 1)
+        UserDailyActivity.objects.create(
+            user=self.user, date=start, accepted=2, concepts_read=1
+        )
+        UserDailyActivity.objects.create(
+            user=self.user, date=start + timedelta(days=9), accepted=1
+        )
+        params = {"start_date": "2024-01-01", "end_date": "2024-01-10"}
+
+        response = self.client.get(self.url, {**params, "encoding": "arrays"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["start_date"], "2024-01-01")
+        self.assertEqual(response.data["submissions_count"], [2] + [0] * 8 + [1])
+        self.assertEqual(response.data["concepts_read_count"], [1] + [0] * 9)
+
+        response = self.client.get(self.url, {**params, "encoding": "rle"})
+        self.assertEqual(response.data["days"], 10)
+        self.assertEqual(response.data["runs"], [[1, 2, 1], [8, 0, 0], [1, 1, 0]])
+
+        response = self.client.get(self.url, {**params, "encoding": "bitmap"})
+        self.assertEqual(response.data["active"], "AQI=")
+        self.assertEqual(response.data["submissions_count"], [2, 1])
+        self.assertEqual(response.data["concepts_read_count"], [1, 0])
+
+    def test_heatmap_encoding_from_accept_header(self):
+        """Test the encoding can be negotiated through the Accept header"""
+        response = self.client.get(
+            self.url, HTTP_ACCEPT="application/json; encoding=rle"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["encoding"], "rle")
+
+        response = self.client.get(self.url, {"encoding": "csv"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_heatmap_compact_payload_size(self):
+        """Test a sparse year encodes far smaller than the list format"""
+        today = timezone.localdate()
+        UserDailyActivity.objects.create(
+            user=self.user, date=today, accepted=3, concepts_read=2
+        )
+
+        sizes = {
+            encoding: len(self.client.get(self.url, {"encoding": encoding}).content)
+            for encoding in ("list", "rle", "bitmap")
+        }
+        self.assertLess(sizes["rle"] * 10, sizes["list"])
+        self.assertLess(sizes["bitmap"] * 10, sizes["list"])
+
+
+class RankingTests(APITestCase):
+    """Test cases for the global user ranking"""
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        ranking_index.clear_local()
+        leaderboard_index.clear_local()
+        self.users = [
+            User.objects.create_user(
+                username=f"user{index}",
+                email=f"user{index}@example.com",
+                password="testpass123",
+            )
+            for index in range(4)
+        ]
+        self.problems = {
+            level: ConceptBasedProblem.objects.create(
+                title=f"{level} problem", level=level, author=self.users[0]
+            )
+            for level in ("easy", "medium", "hard")
+        }
+
+    def solve(self, user, level, verdict=3):
+        # Ranking changes are published when the transaction commits
+        with self.captureOnCommitCallbacks(execute=True):
+            return Submission.objects.create(
+                user=user, content_object=self.problems[level], verdict=verdict
+            )
+
+    def rank(self, user, **params):
+        return self.client.get(
+            reverse("dashboard-user-rank", args=[user.username]), params
+        )
+
+    def test_first_acceptance_adds_weighted_score(self):
+        """Test only the first accepted submission of a problem is counted"""
+        self.solve(self.users[0], "easy")
+        self.solve(self.users[0], "easy")
+        self.solve(self.users[0], "hard", verdict=4)
+        ranking = UserRanking.objects.get(user=self.users[0])
+        self.assertEqual((ranking.score, ranking.easy_solved), (1, 1))
+
+        self.solve(self.users[0], "hard")
+        ranking.refresh_from_db()
+        self.assertEqual((ranking.score, ranking.hard_solved), (6, 1))
+
+    def test_rank_percentile_and_neighbors(self):
+        """Test ties share a rank and neighbours come from both sides"""
+        self.solve(self.users[0], "hard")
+        self.solve(self.users[1], "medium")
+        self.solve(self.users[2], "medium")
+        self.solve(self.users[3], "easy")
+
+        response = self.rank(self.users[2], neighbors=1)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["rank"], 2)
+        self.assertEqual(response.data["total"], 4)
+        self.assertEqual(response.data["percentile"], 25.0)
+        self.assertEqual(response.data["score"], 3)
+        self.assertEqual(response.data["solved"], {"easy": 0, "medium": 1, "hard": 0})
+        self.assertEqual(
+            [(row["rank"], row["username"]) for row in response.data["neighbors"]],
+            [(2, "user1"), (2, "user2"), (4, "user3")],
+        )
+
+        # The cached ranking follows later solves
+        self.solve(self.users[3], "hard")
+        response = self.rank(self.users[3], neighbors=0)
+        self.assertEqual(response.data["rank"], 1)
+        self.assertEqual(response.data["percentile"], 75.0)
+
+    def test_changes_published_on_commit(self):
+        """Test the ranking version is bumped only once the score commits"""
+        version = get_content_version(RANKING_KEY)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Submission.objects.create(
+                user=self.users[0], content_object=self.problems["easy"], verdict=3
+            )
+            # A process reloading now would not see the new score yet
+            self.assertEqual(get_content_version(RANKING_KEY), version)
+
+        self.assertEqual(get_content_version(RANKING_KEY), version + 1)
+
+    def test_unranked_user(self):
+        """Test users without a solved problem have no rank"""
+        self.solve(self.users[0], "easy")
+        response = self.rank(self.users[1])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(response.data["rank"])
+        self.assertEqual(response.data["total"], 1)
+        self.assertEqual(response.data["neighbors"], [])
+
+        self.assertEqual(
+            self.rank(self.users[1], neighbors=11).status_code,
+            status.HTTP_400_BAD_REQUEST,
+        )
+        response = self.client.get(reverse("dashboard-user-rank", args=["missing"]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_deleting_last_acceptance_removes_problem(self):
+        """Test a problem stops counting when its last acceptance is deleted"""
+        first = self.solve(self.users[0], "medium")
+        second = self.solve(self.users[0], "medium")
+        first.delete()
+        self.assertEqual(UserRanking.objects.get(user=self.users[0]).score, 3)
+
+        second.delete()
+        self.assertEqual(UserRanking.objects.get(user=self.users[0]).score, 0)
+        self.assertIsNone(self.rank(self.users[0]).data["rank"])
+
+    def test_removal_debits_credited_level(self):
+        """Test a problem is debited at the level it was credited with"""
+        submission = self.solve(self.users[0], "easy")
+        ConceptBasedProblem.objects.filter(pk=self.problems["easy"].pk).update(
+            level="hard"
+        )
+        submission.delete()
+        ranking = UserRanking.objects.get(user=self.users[0])
+        self.assertEqual((ranking.score, ranking.easy_solved), (0, 0))
+
+        # A rebuild credits the new level, which is then what gets debited
+        submission = self.solve(self.users[0], "medium")
+        ConceptBasedProblem.objects.filter(pk=self.problems["medium"].pk).update(
+            level="hard"
+        )
+        out = StringIO()
+        call_command("rebuild_rankings", stdout=out)
+        self.assertIn("Corrected 1 drifted rankings (0 missing) and 1", out.getvalue())
+        ranking.refresh_from_db()
+        self.assertEqual((ranking.score, ranking.hard_solved), (5, 1))
+        submission.delete()
+        ranking.refresh_from_db()
+        self.assertEqual((ranking.score, ranking.hard_solved), (0, 0))
+
+    def test_rebuild_corrects_drift(self):
+        """Test the rebuild command restores rankings from submissions"""
+        self.solve(self.users[0], "easy")
+        self.solve(self.users[0], "hard")
+        self.solve(self.users[1], "medium")
+        UserRanking.objects.filter(user=self.users[0]).update(score=1, hard_solved=0)
+        UserRanking.objects.filter(user=self.users[1]).delete()
+
+        out = StringIO()
+        call_command("rebuild_rankings", "--dry-run", stdout=out)
+        self.assertIn("Found 2 drifted rankings (1 missing)", out.getvalue())
+        self.assertEqual(UserRanking.objects.count(), 1)
+
+        call_command("rebuild_rankings", stdout=StringIO())
+        self.assertEqual(
+            dict(UserRanking.objects.values_list("user__username", "score")),
+            {"user0": 6, "user1": 3},
+        )
+        self.assertEqual(self.rank(self.users[1]).data["rank"], 2)
+
+        out = StringIO()
+        call_command("rebuild_rankings", "--dry-run", stdout=out)
+        self.assertIn("Found 0 drifted rankings", out.getvalue())
+
+
+class DashboardConceptsReadTests(APITestCase):
+    """Test cases for the dashboard concepts read listing"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        Profile.objects.create(user=self.user)
+        self.concepts = [
+            Concept.objects.create(
+                title=f"Concept {index}",
+                description="Long description",
+                one_liner_desc="Short description",
+                level="Easy",
+                preview_image_url="https://example.com/preview.png",
+                author=self.user,
+            )
+            for index in range(3)
+        ]
+        for concept in self.concepts:
+            ConceptsRead.objects.create(user=self.user, concept=concept)
+        self.url = reverse("dashboard-concepts-read", args=[self.user.username])
+
+    def test_concepts_read_single_query(self):
+        """Test the page is resolved with one joined query, newest first"""
+        # User lookup, count and page, independent of the page length
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data["results"]
+        self.assertEqual(
+            [row["id"] for row in results],
+            [concept.id for concept in reversed(self.concepts)],
+        )
+        self.assertEqual(
+            set(results[0]), {"id", "title", "description", "slug", "last_read"}
+        )
+
+    def test_concepts_read_fields_projection(self):
+        """Test fields= narrows the response and the selected columns"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, {"fields": "id,title,last_read"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data["results"][0]), {"id", "title", "last_read"})
+        self.assertNotIn('"description"', queries.captured_queries[-1]["sql"])
+
+        response = self.client.get(self.url, {"fields": "id,code"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class SessionManagementTests(APITestCase):
+    """Test cases for refresh token session management"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+
+    def test_session_limit_enforced(self):
+        """Test the oldest sessions are blacklisted beyond MAX_SESSIONS"""
+        max_sessions = MaxRefreshTokenMiddleware.MAX_SESSIONS
+        tokens = [
+            MaxRefreshTokenMiddleware.start_session(self.user)
+            for _ in range(max_sessions + 2)
+        ]
+
+        self.assertEqual(self.user.sessions.count(), max_sessions)
+        blacklisted = set(BlacklistedToken.objects.values_list("token__jti", flat=True))
+        self.assertEqual(blacklisted, {token["jti"] for token in tokens[:2]})
+
+    def test_excess_sessions_evicted_at_once(self):
+        """Test every session over the limit is evicted on the next login"""
+        for _ in range(MaxRefreshTokenMiddleware.MAX_SESSIONS + 3):
+            refresh = RefreshToken.for_user(self.user)
+            UserSession.objects.create(
+                user=self.user,
+                jti=refresh["jti"],
+                created_at=timezone.now(),
+                expires_at=timezone.now() + timedelta(days=1),
+            )
+
+        MaxRefreshTokenMiddleware.start_session(self.user)
+
+        self.assertEqual(
+            self.user.sessions.count(), MaxRefreshTokenMiddleware.MAX_SESSIONS
+        )
+        self.assertEqual(BlacklistedToken.objects.count(), 4)
+
+    def test_logout_ends_session(self):
+        """Test logout blacklists the token and removes its session"""
+        refresh = MaxRefreshTokenMiddleware.start_session(self.user)
+        self.client.force_authenticate(user=self.user)
+
+        url = reverse("authenticated-user-logout")
+        response = self.client.post(url, {"refresh": str(refresh)}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(self.user.sessions.exists())
+        self.assertTrue(
+            BlacklistedToken.objects.filter(token__jti=refresh["jti"]).exists()
+        )
+
+    def test_purge_expired_tokens(self):
+        """Test the purge command removes only expired tokens and sessions"""
+        live = MaxRefreshTokenMiddleware.start_session(self.user)
+        expired = MaxRefreshTokenMiddleware.start_session(self.user)
+        expired.blacklist()
+        past = timezone.now() - timedelta(days=1)
+        OutstandingToken.objects.filter(jti=expired["jti"]).update(expires_at=past)
+        UserSession.objects.filter(jti=expired["jti"]).update(expires_at=past)
+
+        call_command("purge_expired_tokens", batch_size=1, stdout=StringIO())
+
+        self.assertEqual(
+            list(OutstandingToken.objects.values_list("jti", flat=True)),
+            [live["jti"]],
+        )
+        self.assertFalse(BlacklistedToken.objects.exists())
+        self.assertEqual(
+            list(self.user.sessions.values_list("jti", flat=True)), [live["jti"]]
+        )
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class BlacklistIndexTests(APITestCase):
+    """Test cases for cached token blacklist lookups"""
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        blacklist_index.clear_local()
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        self.refresh = MaxRefreshTokenMiddleware.start_session(self.user)
+        self.url = reverse("token_refresh")
+
+    def test_refresh_check_cached(self):
+        """Test only the first refresh of a live token queries the blacklist"""
+        with self.assertNumQueries(1):
+            response = self.client.post(self.url, {"refresh": str(self.refresh)})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(0):
+            response = self.client.post(self.url, {"refresh": str(self.refresh)})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_logout_visible_immediately(self):
+        """Test a logged out token is rejected from the index"""
+        self.client.post(self.url, {"refresh": str(self.refresh)})
+        MaxRefreshTokenMiddleware.end_session(RefreshToken(str(self.refresh)))
+        blacklist_index.clear_local()
+
+        with self.assertNumQueries(0):
+            response = self.client.post(self.url, {"refresh": str(self.refresh)})
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_evicted_token_rejected(self):
+        """Test tokens evicted by the session limit are indexed"""
+        for _ in range(MaxRefreshTokenMiddleware.MAX_SESSIONS):
+            MaxRefreshTokenMiddleware.start_session(self.user)
+
+        with self.assertNumQueries(0):
+            response = self.client.post(self.url, {"refresh": str(self.refresh)})
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class JWTAuthenticationTests(APITestCase):
+    """Test cases for the shared JWT authentication path"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        self.profile = Profile.objects.create(user=self.user)
+        self.concept = Concept.objects.create(
+            title="Gradient Descent",
+            description="Long description",
+            one_liner_desc="Short description",
+            level="Easy",
+            preview_image_url="https://example.com/preview.png",
+            author=self.user,
+        )
+        access_token = str(RefreshToken.for_user(self.user).access_token)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access_token}")
+
+    def user_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # Only the authentication lookup by id, not lookups by username or
+        # joins through related tables
+        return [
+            query["sql"]
+            for query in context
+            if 'FROM "auth_user" WHERE "auth_user"."id"' in query["sql"]
+        ]
+
+    def test_token_decoded_once_per_request(self):
+        """Test middleware and DRF share a single token decode"""
+        url = reverse("authenticated-user-header-data")
+        with patch.object(
+            JWTAuthentication,
+            "get_validated_token",
+            autospec=True,
+            side_effect=JWTAuthentication.get_validated_token,
+        ) as mock_validate:
+            self.client.get(url)
+
+        self.assertEqual(mock_validate.call_count, 1)
+
+    def test_single_user_lookup(self):
+        """Test endpoints needing the full user load it only once"""
+        queries = self.user_queries(
+            reverse("dashboard-dashboard", args=[self.user.username])
+        )
+
+        self.assertEqual(len(queries), 1)
+
+    def test_claims_user_on_read_endpoints(self):
+        """Test opted-in read endpoints authenticate without user queries"""
+        queries = self.user_queries(reverse("concept-detail", args=[self.concept.slug]))
+
+        self.assertEqual(queries, [])
+
+    def test_invalid_token_rejected(self):
+        """Test an invalid token is rejected on claims-only endpoints"""
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer invalid")
+
+        response = self.client.get(reverse("concepts-by-date"))
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class StubRecaptchaHandler(BaseHTTPRequestHandler):
+    """Local stand-in for Google's siteverify endpoint"""
+
+    def do_POST(self):
+        self.server.hits += 1
+        time.sleep(self.server.delay)
+        length = int(self.headers["Content-Length"])
+        token = parse_qs(self.rfile.read(length).decode())["response"][0]
+        body = json.dumps({"success": token == "valid_token"}).encode()
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up waiting (timeout tests)
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class RecaptchaLoginTests(APITestCase):
+    """Test cases for login against a local reCAPTCHA verifier"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubRecaptchaHandler)
+        cls.server.daemon_threads = True
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.verify_url = f"http://127.0.0.1:{cls.server.server_port}/siteverify"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.server.hits = 0
+        self.server.delay = 0
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        self.url = reverse("public-auth-login")
+        self.login_data = {
+            "email": "test@example.com",
+            "password": "testpass123",
+            "captchaToken": "valid_token",
+        }
+
+    def login(self, **settings):
+        with self.settings(RECAPTCHA_VERIFY_URL=self.verify_url, **settings):
+            started = time.perf_counter()
+            response = self.client.post(self.url, self.login_data, format="json")
+            return response, time.perf_counter() - started
+
+    def test_login_latency(self):
+        """Test login p99 stays close to the verifier latency"""
+        self.server.delay = 0.05
+        latencies = []
+        for attempt in range(10):
+            cache.clear()
+            self.login_data["captchaToken"] = "valid_token"
+            response, elapsed = self.login()
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            latencies.append(elapsed)
+
+        # With this few samples p99 is the slowest login
+        self.assertLess(max(latencies), 1)
+
+    def test_reused_token_rejected(self):
+        """Test a token can only be used for a single login"""
+        response, _ = self.login()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response, _ = self.login()
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("Invalid CAPTCHA", response.data["message"])
+        self.assertEqual(self.server.hits, 1)
+
+    def test_invalid_token_rejected(self):
+        """Test an invalid token is rejected by the verifier"""
+        self.login_data["captchaToken"] = "invalid_token"
+
+        response, _ = self.login()
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("Invalid CAPTCHA", response.data["message"])
+
+    def test_slow_verifier_fails_closed(self):
+        """Test a slow verifier is abandoned after the timeout"""
+        self.server.delay = 2
+
+        response, elapsed = self.login(RECAPTCHA_TIMEOUT=0.2)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertLess(elapsed, 1.5)
+
+    def test_slow_verifier_fails_open(self):
+        """Test logins pass through a slow verifier when failing open"""
+        self.server.delay = 2
+
+        response, elapsed = self.login(RECAPTCHA_TIMEOUT=0.2, RECAPTCHA_FAIL_OPEN=True)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertLess(elapsed, 1.5)
@@ -0,0 +1,83 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import RefreshToken as BaseRefreshToken
+
+BLACKLIST_KEY_PREFIX = "token-blacklist"
+
+
+class BlacklistIndex:
+    """
+    Blacklist lookups by jti, answered from memory before the database.
+
+    Blacklisted jtis are kept both in a bounded per-process LRU and in the
+    shared cache until the token expires; after that the token is rejected
+    on ``exp`` alone, so the entry is no longer needed. Tokens found *not*
+    to be blacklisted are only remembered in the shared cache, and only for
+    ``TOKEN_BLACKLIST_NEGATIVE_TTL`` seconds: ``add`` overwrites that entry,
+    so a logout is seen by every worker straight away.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def cache_key(jti):
+        return f"{BLACKLIST_KEY_PREFIX}:{jti}"
+
+    def add(self, jti, exp):
+        """Record ``jti`` as blacklisted until ``exp`` (epoch seconds)."""
+        ttl = int(exp - time.time())
+        if ttl <= 0:
+            return
+        with self.lock:
+            self.entries[jti] = exp
+            self.entries.move_to_end(jti)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+        cache.set(self.cache_key(jti), True, timeout=ttl)
+
+    def clear_local(self):
+        with self.lock:
+            self.entries.clear()
+
+    def is_blacklisted(self, jti, exp):
+        with self.lock:
+            if jti in self.entries:
+                self.entries.move_to_end(jti)
+                return True
+
+        blacklisted = cache.get(self.cache_key(jti))
+        if blacklisted is None:
+            blacklisted = BlacklistedToken.objects.filter(token__jti=jti).exists()
+            if not blacklisted:
+                cache.add(
+                    self.cache_key(jti),
+                    False,
+                    timeout=settings.TOKEN_BLACKLIST_NEGATIVE_TTL,
+                )
+
+        if blacklisted:
+            self.add(jti, exp)
+        return blacklisted
+
+
+blacklist_index = BlacklistIndex(settings.TOKEN_BLACKLIST_LOCAL_SIZE)
+
+
+class RefreshToken(BaseRefreshToken):
+    """Refresh token whose blacklist checks go through ``blacklist_index``."""
+
+    def check_blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        if blacklist_index.is_blacklisted(jti, self.payload["exp"]):
+            raise TokenError(_("Token is blacklisted"))
@@ -1,12 +1,50 @@
+import hashlib
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from io import BytesIO
+
 import requests
+from django import db
 from django.conf import settings
+from django.core.cache import cache
+from django.core.files import File
 from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from accounts.models import Profile
+
+PROFILE_PHOTO_EXTENSIONS = {"JPEG": "jpg", "PNG": "png", "GIF": "gif", "WEBP": "webp"}
+
+# Verifications run here so that a login can look the user up while Google
+# answers; the pool size bounds the number of outstanding verify calls.
+recaptcha_executor = ThreadPoolExecutor(
+    max_workers=settings.RECAPTCHA_MAX_WORKERS, thread_name_prefix="recaptcha"
+)
+
+# Profile photo downloads and resizing happen off the request path
+profile_photo_executor = ThreadPoolExecutor(
+    max_workers=settings.PROFILE_PHOTO_MAX_WORKERS, thread_name_prefix="profile-photo"
+)
+
+
+def recaptcha_cache_key(captcha_token):
+    digest = hashlib.sha256(captcha_token.encode()).hexdigest()
+    return f"recaptcha:{digest}"
 
 
 def verify_recaptcha_token(captcha_token: str, secret_key: str) -> bool:
     """
     Verifies the reCAPTCHA token using Google's reCAPTCHA API.
 
+    Tokens are single-use: a token is marked consumed for
+    ``RECAPTCHA_CACHE_TIMEOUT`` seconds before it is sent to Google, and a
+    token already marked is rejected without a verify call. When Google
+    cannot be reached in ``RECAPTCHA_TIMEOUT`` seconds the result is
+    ``RECAPTCHA_FAIL_OPEN``.
+
     Args:
         captcha_token (str): The token received from the frontend reCAPTCHA widget.
         secret_key (str): Your Google reCAPTCHA secret key.
@@ -14,24 +52,55 @@ def verify_recaptcha_token(captcha_token: str, secret_key: str) -> bool:
     Returns:
         bool: True if the token is valid, False otherwise.
     """
-    verify_url = "https://www.google.com/recaptcha/api/siteverify"
+    if not captcha_token:
+        return False
+
+    # add() is atomic, so of two concurrent logins replaying a token only one
+    # gets to verify it
+    if not cache.add(
+        recaptcha_cache_key(captcha_token),
+        True,
+        timeout=settings.RECAPTCHA_CACHE_TIMEOUT,
+    ):
+        return False
+
     data = {
         "secret": secret_key,
         "response": captcha_token,
     }
 
     try:
-        response = requests.post(verify_url, data=data)
+        response = requests.post(
+            settings.RECAPTCHA_VERIFY_URL, data=data, timeout=settings.RECAPTCHA_TIMEOUT
+        )
         result = response.json()
-        return result.get("success", False)
     except Exception as e:
         print(f"Error verifying reCAPTCHA: {e}")
-        return False
+        return settings.RECAPTCHA_FAIL_OPEN
+
+    return bool(result.get("success", False))
+
+
+def wait_for_recaptcha(future) -> bool:
+    """
+    Result of a verification submitted to ``recaptcha_executor``, waiting at
+    most ``RECAPTCHA_TIMEOUT`` seconds.
+    """
+    try:
+        return future.result(timeout=settings.RECAPTCHA_TIMEOUT)
+    except FutureTimeoutError:
+        future.cancel()
+        print("Error verifying reCAPTCHA: timed out")
+        return settings.RECAPTCHA_FAIL_OPEN
 
 
 def download_and_save_profile_photo(profile, profile_photo_url, user_id):
     """
-    Download and save profile photo from Google.
+    Download and save profile photo from Google, then build its variants.
+
+    The download is streamed to a temporary file and abandoned once it
+    exceeds ``PROFILE_PHOTO_MAX_SIZE`` bytes; anything Pillow cannot open
+    is discarded.
 
     Args:
         profile: Profile instance to save the photo to
@@ -42,16 +111,121 @@ def download_and_save_profile_photo(profile, profile_photo_url, user_id):
         bool: True if photo was successfully downloaded and saved, False otherwise
     """
     try:
-        response = requests.get(profile_photo_url, timeout=10)
-        response.raise_for_status()
+        with requests.get(profile_photo_url, timeout=10, stream=True) as response:
+            response.raise_for_status()
+            with tempfile.TemporaryFile() as photo:
+                size = 0
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    size += len(chunk)
+                    if size > settings.PROFILE_PHOTO_MAX_SIZE:
+                        raise ValueError("Profile photo exceeds the size limit")
+                    photo.write(chunk)
 
-        file_extension = profile_photo_url.split(".")[-1].split("?")[0]
-        if file_extension not in ["jpg", "jpeg", "png", "gif"]:
-            file_extension = "jpg"
+                photo.seek(0)
+                with Image.open(photo) as image:
+                    image.verify()
+                    file_extension = PROFILE_PHOTO_EXTENSIONS.get(image.format)
+                if file_extension is None:
+                    raise ValueError("Unsupported profile photo format")
 
-        filename = f"google_profile_{user_id}.{file_extension}"
+                photo.seek(0)
+                filename = f"google_profile_{user_id}.{file_extension}"
+                profile.profile_photo.save(filename, File(photo), save=False)
 
-        profile.profile_photo.save(filename, ContentFile(response.content), save=True)
+        build_profile_photo_variants(profile)
+        return True
     except Exception as e:
         if settings.DEBUG:
             print(f"Failed to download profile photo: {e}")
+        return False
+
+
+def build_profile_photo_variants(profile):
+    """
+    Render ``profile.profile_photo`` as square-bounded WebP and JPEG images of
+    each ``PROFILE_PHOTO_VARIANT_SIZES`` and save them with the photo.
+
+    ``profile_photo_variants`` maps the size to the storage name of each
+    format, e.g. ``{"64": {"webp": ..., "jpeg": ...}}``. The previous
+    variants are left in place: storage names are content-hashed, so another
+    profile with the same photo may refer to them. ``gc_media`` removes them
+    once unreferenced.
+    """
+    variants = {}
+    if profile.profile_photo:
+        stem = os.path.splitext(os.path.basename(profile.profile_photo.name))[0]
+        with profile.profile_photo.open("rb") as photo, Image.open(photo) as image:
+            image = ImageOps.exif_transpose(image).convert("RGB")
+            for size in settings.PROFILE_PHOTO_VARIANT_SIZES:
+                variant = image.copy()
+                variant.thumbnail((size, size), Image.LANCZOS)
+                variants[str(size)] = {
+                    file_format.lower(): save_image(
+                        variant,
+                        file_format,
+                        f"profile_photos/variants/{stem}_{size}.{extension}",
+                    )
+                    for file_format, extension in (("WEBP", "webp"), ("JPEG", "jpg"))
+                }
+
+    profile.profile_photo_variants = variants
+    # Only the photo columns: this runs in the background on a profile loaded
+    # before the download, and must not overwrite updates made meanwhile
+    profile.save(update_fields=["profile_photo", "profile_photo_variants"])
+
+
+def save_image(image, file_format, name):
+    buffer = BytesIO()
+    image.save(buffer, file_format, quality=85)
+    return default_storage.save(name, ContentFile(buffer.getvalue()))
+
+
+def ingest_profile_photo(profile_id, profile_photo_url=None):
+    """
+    Background job: download ``profile_photo_url`` into the profile (if
+    given) or rebuild the variants of its current photo.
+    """
+    try:
+        profile = Profile.objects.select_related("user").get(pk=profile_id)
+        if profile_photo_url:
+            download_and_save_profile_photo(profile, profile_photo_url, profile.user_id)
+        else:
+            build_profile_photo_variants(profile)
+    except Exception as e:
+        if settings.DEBUG:
+            print(f"Failed to ingest profile photo: {e}")
+    finally:
+        # The worker thread opened its own connection
+        db.connection.close()
+
+
+def enqueue_profile_photo_ingestion(profile, profile_photo_url=None):
+    """
+    Run ``ingest_profile_photo`` on ``profile_photo_executor`` once the
+    current transaction commits, so the request does not wait for it.
+    """
+    db.transaction.on_commit(
+        lambda: profile_photo_executor.submit(
+            ingest_profile_photo, profile.pk, profile_photo_url
+        )
+    )
+
+
+def profile_photo_variant_urls(request, profile):
+    """Absolute URLs of the profile photo variants, by size and format."""
+    return {
+        size: {
+            file_format: request.build_absolute_uri(default_storage.url(name))
+            for file_format, name in formats.items()
+        }
+        for size, formats in profile.profile_photo_variants.items()
+    }
+
+
+def profile_photo_variant_names():
+    """Storage names of every profile photo variant, for ``gc_media``."""
+    for variants in Profile.objects.exclude(profile_photo_variants={}).values_list(
+        "profile_photo_variants", flat=True
+    ):
+        for formats in variants.values():
+            yield from formats.values()
@@ -1,5 +1,6 @@
 import os
 from datetime import datetime, timedelta
+from operator import attrgetter, methodcaller
 
 from django.conf import settings
 from django.contrib.auth import authenticate
@@ -7,7 +8,6 @@ from django.contrib.auth.models import User
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
 from django.core.mail import send_mail
 from django.db.models import Count, Max
-from django.db.models.functions import TruncDate
 from django.utils import timezone
 from rest_framework import serializers, status
 from rest_framework.decorators import action
@@ -16,10 +16,16 @@ from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.viewsets import ViewSet
-from rest_framework_simplejwt.tokens import RefreshToken
 
+from accounts.heatmap import HEATMAP_ENCODERS, requested_encoding
 from accounts.middlewares import MaxRefreshTokenMiddleware
-from accounts.models import Profile
+from accounts.models import Profile, UserDailyActivity
+from accounts.projections import (
+    absolute_profile_urls,
+    get_profile_projection,
+    profile_projection_validators,
+)
+from accounts.rankings import MAX_NEIGHBORS, ranking_data
 from accounts.serializers import (
     ForgotPasswordSerializer,
     GoogleAuthSerializer,
@@ -29,6 +35,7 @@ from accounts.serializers import (
     ResetPasswordSerializer,
     UserDetailSerializer,
 )
+from accounts.streaks import streak_state
 from accounts.swagger_schemas import (
     concepts_read_schema,
     forgot_password_schema,
@@ -36,6 +43,7 @@ from accounts.swagger_schemas import (
     header_data_swagger_schema,
     login_schema,
     logout_schema,
+    me_schema,
     onboarding_schema,
     problems_attempted_schema,
     register_schema,
@@ -44,10 +52,21 @@ from accounts.swagger_schemas import (
     update_user_detail_schema,
     user_heatmap_data_schema,
     user_heatmap_schema,
+    user_rank_schema,
+)
+from accounts.tokens import RefreshToken
+from accounts.utils import (
+    enqueue_profile_photo_ingestion,
+    profile_photo_variant_urls,
+    recaptcha_executor,
+    verify_recaptcha_token,
+    wait_for_recaptcha,
 )
-from accounts.utils import download_and_save_profile_photo, verify_recaptcha_token
-from concepts.models import Concept, ConceptsRead
+from concepts.models import Concept
+from ncore.conditional import conditional_response
+from ncore.projection import FieldProjection
 from problems.models import ConceptBasedProblem, DatasetBasedProblem, Submission
+from problems.utils import problem_prefetch
 
 RECAPTCHA_SECRET_KEY = os.getenv("RECAPTCHA_SECRET_KEY")
 
@@ -100,18 +119,24 @@ class PublicAuthViewSet(ViewSet):
         captcha_token = request.data.get("captchaToken")
         secret_key = RECAPTCHA_SECRET_KEY
 
-        if not verify_recaptcha_token(captcha_token, secret_key):
-            return Response(
-                {"message": "Invalid CAPTCHA"}, status=status.HTTP_400_BAD_REQUEST
-            )
+        # Look the user up while Google verifies the captcha; the password
+        # check itself still only runs once the captcha has passed.
+        captcha_check = recaptcha_executor.submit(
+            verify_recaptcha_token, captcha_token, secret_key
+        )
 
         email = request.data.get("email")
         password = request.data.get("password")
+        username = (
+            User.objects.filter(email=email).values_list("username", flat=True).first()
+        )
 
-        try:
-            user_obj = User.objects.get(email=email)
-            username = user_obj.username
-        except User.DoesNotExist:
+        if not wait_for_recaptcha(captcha_check):
+            return Response(
+                {"message": "Invalid CAPTCHA"}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if username is None:
             raise serializers.ValidationError("User with this email does not exist")
 
         user = authenticate(username=username, password=password)
@@ -120,8 +145,7 @@ class PublicAuthViewSet(ViewSet):
                 {"message": "Invalid credentials"}, status=status.HTTP_400_BAD_REQUEST
             )
 
-        MaxRefreshTokenMiddleware.check_and_manage_sessions(user)
-        refresh = RefreshToken.for_user(user)
+        refresh = MaxRefreshTokenMiddleware.start_session(user)
         request.session["user_id"] = user.id
         return Response(
             {
@@ -155,9 +179,9 @@ class PublicAuthViewSet(ViewSet):
         profile = Profile.objects.create(user=user) if user_created else user.profile
 
         if profile_photo_url and (user_created or not profile.profile_photo):
-            download_and_save_profile_photo(profile, profile_photo_url, user.id)
+            enqueue_profile_photo_ingestion(profile, profile_photo_url)
 
-        refresh = RefreshToken.for_user(user)
+        refresh = MaxRefreshTokenMiddleware.start_session(user)
         return Response(
             {
                 "refresh": str(refresh),
@@ -223,9 +247,42 @@ class DashboardPagination(PageNumberPagination):
     max_page_size = 100
 
 
+def submission_problem_summary(submission):
+    """Short description of the problem a submission was made to"""
+    content_obj = submission.content_object
+    if not content_obj:
+        return None
+    return {
+        "id": content_obj.id,
+        "title": content_obj.title,
+        "type": content_obj.problem_type,  # DL, ML
+        "problem_type": (
+            "concept"  # concept, dataset
+            if isinstance(content_obj, ConceptBasedProblem)
+            else "dataset"
+        ),
+        "level": content_obj.level,
+        "slug": content_obj.slug,
+    }
+
+
 class DashboardViewSet(ViewSet):
     permission_classes = [AllowAny]
     pagination_class = DashboardPagination
+    CONCEPTS_READ_FIELDS = ["id", "title", "description", "slug", "last_read"]
+    SUBMISSION_FIELDS = {
+        "id": attrgetter("id"),
+        "verdict": attrgetter("verdict"),
+        "verdict_display": methodcaller("get_verdict_display"),
+        "created_timestamp": attrgetter("created_timestamp"),
+        "time_taken": attrgetter("time_taken"),
+        "memory_taken": attrgetter("memory_taken"),
+        "problem": submission_problem_summary,
+    }
+    SUBMISSION_COLUMNS = {
+        "verdict_display": ("verdict",),
+        "problem": ("content_type", "object_id"),
+    }
 
     def get_user(self, username):
         """Helper method to get user with error handling"""
@@ -269,74 +326,28 @@ class DashboardViewSet(ViewSet):
         except ValueError:
             return default
 
-    def _generate_heatmap_data(self, user, start_date, end_date):
-        """Generate heatmap data for the user using efficient database aggregation"""
+    def _generate_heatmap_data(self, user, start_date, end_date, encoding="list"):
+        """Generate heatmap data for the user from the daily activity rollup"""
         # Normalize dates to start of day for consistent filtering
-        if hasattr(start_date, "replace"):
-            start_date = start_date.replace(hour=0, minute=0, second=0, microsecond=0)
-        if hasattr(end_date, "replace"):
-            end_date = end_date.replace(hour=0, minute=0, second=0, microsecond=0)
-
-        # For database query, use end of day for end_date to include the entire day
-        end_date_for_query = (
-            end_date.replace(hour=23, minute=59, second=59, microsecond=999999)
-            if hasattr(end_date, "replace")
-            else end_date
-        )
-
-        # Use database aggregation to get counts grouped by date in a single query
-        # This is much more efficient than querying each day individually
-        # Instead of 2 queries per day (360+ queries for 6 months), we now have just 2 queries total
-        submissions_by_date = (
-            Submission.objects.filter(
-                user=user,
-                verdict=3,
-                created_timestamp__gte=start_date,
-                created_timestamp__lte=end_date_for_query,
-            )
-            .annotate(date=TruncDate("created_timestamp"))
-            .values("date")
-            .annotate(count=Count("id"))
-            .order_by("date")
-        )
-
-        concepts_read_by_date = (
-            ConceptsRead.objects.filter(
-                user=user,
-                read_timestamp__gte=start_date,
-                read_timestamp__lte=end_date_for_query,
-            )
-            .annotate(date=TruncDate("read_timestamp"))
-            .values("date")
-            .annotate(count=Count("id"))
-            .order_by("date")
-        )
-
-        # Convert to dictionaries for fast lookup
-        submissions_dict = {item["date"]: item["count"] for item in submissions_by_date}
-        concepts_dict = {item["date"]: item["count"] for item in concepts_read_by_date}
-
-        # Generate heatmap data for all dates in range
-        heatmap_data = []
-        current_date = start_date
-
-        while current_date <= end_date:
-            # Convert date to date object for dictionary lookup (TruncDate returns date objects)
-            date_key = (
-                current_date.date() if hasattr(current_date, "date") else current_date
-            )
-
-            heatmap_data.append(
-                {
-                    "date": current_date.strftime("%Y-%m-%d"),
-                    "submissions_count": submissions_dict.get(date_key, 0),
-                    "concepts_read_count": concepts_dict.get(date_key, 0),
-                }
-            )
-
-            current_date = current_date + timedelta(days=1)
-
-        return heatmap_data
+        if hasattr(start_date, "date"):
+            start_date = start_date.date()
+        if hasattr(end_date, "date"):
+            end_date = end_date.date()
+
+        # Parallel per-day count arrays; days without a rollup row stay 0
+        days = (end_date - start_date).days + 1
+        submissions = [0] * days
+        concepts_read = [0] * days
+
+        # One narrow rollup row per active day, read off the (user, date) index
+        for day, accepted, concepts_read_count in UserDailyActivity.objects.filter(
+            user=user, date__gte=start_date, date__lte=end_date
+        ).values_list("date", "accepted", "concepts_read"):
+            offset = (day - start_date).days
+            submissions[offset] = accepted
+            concepts_read[offset] = concepts_read_count
+
+        return HEATMAP_ENCODERS[encoding](start_date, submissions, concepts_read)
 
     @action(
         detail=False,
@@ -371,20 +382,55 @@ class DashboardViewSet(ViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        heatmap_data = self._generate_heatmap_data(user, start_date, end_date)
+        encoding = requested_encoding(request)
+        if encoding not in HEATMAP_ENCODERS:
+            return Response(
+                {"error": "encoding must be one of " + ", ".join(HEATMAP_ENCODERS)},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        heatmap_data = self._generate_heatmap_data(user, start_date, end_date, encoding)
         return Response(heatmap_data)
 
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="(?P<username>[^/.]+)/rank",
+        url_name="user-rank",
+    )
+    @user_rank_schema
+    def rank(self, request, username=None):
+        user = self.get_user(username)
+        if not user:
+            return Response(
+                {"error": "User not found"}, status=status.HTTP_404_NOT_FOUND
+            )
+
+        try:
+            neighbors = int(request.query_params.get("neighbors", 2))
+        except ValueError:
+            neighbors = -1
+        if not 0 <= neighbors <= MAX_NEIGHBORS:
+            return Response(
+                {"error": f"neighbors must be between 0 and {MAX_NEIGHBORS}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        return Response(ranking_data(user, neighbors))
+
     def _get_profile_data(self, user, request):
         """Get user profile data"""
         profile = user.profile
+        streaks = streak_state(profile)
         return {
             "username": user.username,
             "name": user.get_full_name(),
             "profile_photo_url": request.build_absolute_uri(profile.profile_photo.url)
             if profile.profile_photo
             else None,
-            "current_streak": profile.current_streak,
-            "longest_streak": profile.longest_streak,
+            "profile_photo_variants": profile_photo_variant_urls(request, profile),
+            "current_streak": streaks["current_streak"],
+            "longest_streak": streaks["longest_streak"],
             "organisation_name": profile.organisation_name,
             "location": profile.address,
             "occupation": profile.occupation,
@@ -425,8 +471,8 @@ class DashboardViewSet(ViewSet):
 
     def _get_problem_solved_data(self, user):
         """Get problem solved statistics"""
-        submissions = Submission.objects.filter(user=user, verdict=3).select_related(
-            "content_type"
+        submissions = Submission.objects.filter(user=user, verdict=3).prefetch_related(
+            problem_prefetch()
         )
 
         difficulty_counts = {"easy": 0, "medium": 0, "hard": 0}
@@ -473,26 +519,6 @@ class DashboardViewSet(ViewSet):
 
         return problems_list
 
-    def _build_concepts_list(self, concept_data_list):
-        """Build concepts list from concept data"""
-        concepts_list = []
-        for concept_data in concept_data_list:
-            concept_id = concept_data["concept_id"]
-            last_read = concept_data["last_read"]
-            concept = Concept.objects.get(id=concept_id)
-
-            concepts_list.append(
-                {
-                    "id": concept.id,
-                    "title": concept.title,
-                    "description": concept.description,
-                    "slug": concept.slug,
-                    "last_read": last_read,
-                }
-            )
-
-        return concepts_list
-
     @action(detail=False, methods=["get"], url_path="(?P<username>[^/.]+)/problems")
     @problems_attempted_schema
     def problems_attempted(self, request, username=None):
@@ -510,6 +536,7 @@ class DashboardViewSet(ViewSet):
             Submission.objects.filter(user=user)
             .order_by("content_type", "object_id", "-created_timestamp")
             .distinct("content_type", "object_id")
+            .prefetch_related(problem_prefetch())
         )
 
         paginator = self.pagination_class()
@@ -533,14 +560,18 @@ class DashboardViewSet(ViewSet):
                 {"error": "User not found"}, status=status.HTTP_404_NOT_FOUND
             )
 
-        # Get unique concepts read by user using database-level query
+        projection = FieldProjection.from_request(
+            request, self.CONCEPTS_READ_FIELDS, {"id": (), "last_read": ()}
+        )
 
-        # Get unique concepts with their latest read timestamp
+        # One joined query; only the requested concept columns are selected,
+        # so the description text is not read unless it is asked for
         unique_concepts_read = (
-            ConceptsRead.objects.filter(user=user)
-            .values("concept_id")
-            .annotate(last_read=Max("read_timestamp"))
-            .order_by("-last_read")
+            Concept.objects.filter(concepts_read__user=user)
+            .values("id")
+            .annotate(last_read=Max("concepts_read__read_timestamp"))
+            .values("id", *projection.columns(), "last_read")
+            .order_by("-last_read", "-id")
         )
 
         # Apply pagination at database level
@@ -548,13 +579,12 @@ class DashboardViewSet(ViewSet):
         page = paginator.paginate_queryset(unique_concepts_read, request)
 
         if page is not None:
-            # Process only the paginated results
-            concepts_list = self._build_concepts_list(page)
-            return paginator.get_paginated_response(concepts_list)
+            return paginator.get_paginated_response(
+                [projection.project(row) for row in page]
+            )
 
         # Fallback for non-paginated requests
-        concepts_list = self._build_concepts_list(unique_concepts_read)
-        return Response(concepts_list)
+        return Response([projection.project(row) for row in unique_concepts_read])
 
     @action(detail=False, methods=["get"], url_path="(?P<username>[^/.]+)/submissions")
     @submissions_schema
@@ -566,49 +596,35 @@ class DashboardViewSet(ViewSet):
                 {"error": "User not found"}, status=status.HTTP_404_NOT_FOUND
             )
 
-        # Get all submissions by user, ordered by creation timestamp
-        submissions = (
-            Submission.objects.filter(user=user)
-            .select_related("content_type")
-            .order_by("-created_timestamp")
+        projection = FieldProjection.from_request(
+            request, self.SUBMISSION_FIELDS, self.SUBMISSION_COLUMNS
         )
 
-        submissions_list = []
-        for submission in submissions:
-            content_obj = submission.content_object
-            submissions_list.append(
-                {
-                    "id": submission.id,
-                    "verdict": submission.verdict,
-                    "verdict_display": submission.get_verdict_display(),
-                    "created_timestamp": submission.created_timestamp,
-                    "time_taken": submission.time_taken,
-                    "memory_taken": submission.memory_taken,
-                    "problem": {
-                        "id": content_obj.id if content_obj else None,
-                        "title": content_obj.title if content_obj else "Unknown",
-                        "type": content_obj.problem_type  # DL, ML
-                        if content_obj
-                        else "Unknown",
-                        "problem_type": "concept"  # concept, dataset
-                        if isinstance(content_obj, ConceptBasedProblem)
-                        else "dataset",
-                        "level": content_obj.level if content_obj else "Unknown",
-                        "slug": content_obj.slug if content_obj else None,
-                    }
-                    if content_obj
-                    else None,
-                }
-            )
+        # Get all submissions by user, ordered by creation timestamp
+        submissions = projection.apply(
+            Submission.objects.filter(user=user).order_by("-created_timestamp")
+        )
+        if "problem" in projection:
+            submissions = submissions.prefetch_related(problem_prefetch())
 
-        # Apply pagination
+        # Apply pagination at database level
         paginator = self.pagination_class()
-        page = paginator.paginate_queryset(submissions_list, request)
+        page = paginator.paginate_queryset(submissions, request)
 
         if page is not None:
-            return paginator.get_paginated_response(page)
+            return paginator.get_paginated_response(
+                [
+                    projection.serialize(submission, self.SUBMISSION_FIELDS)
+                    for submission in page
+                ]
+            )
 
-        return Response(submissions_list)
+        return Response(
+            [
+                projection.serialize(submission, self.SUBMISSION_FIELDS)
+                for submission in submissions
+            ]
+        )
 
 
 class AuthenticatedUserViewSet(ViewSet):
@@ -617,6 +633,8 @@ class AuthenticatedUserViewSet(ViewSet):
     """
 
     permission_classes = [IsAuthenticated]
+    # Reads are served from the cached profile projection by user id
+    token_claims_user = True
     parser_classes = [
         JSONParser,
         MultiPartParser,
@@ -633,7 +651,7 @@ class AuthenticatedUserViewSet(ViewSet):
         refresh_token = serializer.validated_data["refresh"]
         try:
             token = RefreshToken(refresh_token)
-            token.blacklist()
+            MaxRefreshTokenMiddleware.end_session(token)
             request.session.flush()
             return Response({"message": "Successfully logged out"})
         except Exception:
@@ -665,46 +683,11 @@ class AuthenticatedUserViewSet(ViewSet):
     @action(
         detail=False, methods=["get"], url_path="user-detail", url_name="user-detail"
     )
+    @conditional_response(profile_projection_validators)
     def get_user_detail(self, request):
         """GET /user-detail/"""
-        user = request.user
-        profile, _ = Profile.objects.get_or_create(user=user)
-
-        profile_photo_url = ""
-        if profile.profile_photo:
-            profile_photo_url = request.build_absolute_uri(profile.profile_photo.url)
-
-        user_data = {
-            "username": user.username,
-            "first_name": user.first_name,
-            "last_name": user.last_name,
-            "email": user.email,
-            "phone_number": profile.phone_number or "",
-            "organisation_name": profile.organisation_name or "",
-            "address": profile.address or "",
-            "language_selected": profile.language_selected or "",
-            "profile_photo_url": profile_photo_url,
-            "is_premium_user": profile.is_premium_user,
-            "bio": profile.bio or "",
-            "occupation": profile.occupation or "",
-            "kaggle_profile_url": profile.kaggle_profile_url or "",
-            "github": profile.github or "",
-            "twitter": profile.twitter or "",
-            "portfolio": profile.portfolio or "",
-            "linkedin": profile.linkedin or "",
-            "pronouns": profile.pronouns or "",
-            "interests": profile.interests or "",
-            "date_of_birth": (
-                profile.date_of_birth.strftime("%Y-%m-%d")
-                if profile.date_of_birth
-                else ""
-            ),
-            "current_streak": profile.current_streak or 0,
-            "longest_streak": profile.longest_streak or 0,
-            "location": profile.address or "",
-        }
-
-        return Response({"user": user_data})
+        projection = get_profile_projection(request.user.pk)
+        return Response({"user": absolute_profile_urls(request, projection["user"])})
 
     @action(
         detail=False,
@@ -738,33 +721,29 @@ class AuthenticatedUserViewSet(ViewSet):
 
         # Save Profile model with remaining fields
         serializer.save()
+        if "profile_photo" in validated_data:
+            enqueue_profile_photo_ingestion(profile)
         return Response({"message": "User details updated successfully"})
 
     @action(
         detail=False, methods=["get"], url_path="header-data", url_name="header-data"
     )
     @header_data_swagger_schema
+    @conditional_response(profile_projection_validators)
     def get_header_data(self, request):
         """GET /header-data/"""
-        user = request.user
-        profile, _ = Profile.objects.get_or_create(user=user)
-
-        profile_photo_url = ""
-        if profile.profile_photo:
-            profile_photo_url = request.build_absolute_uri(profile.profile_photo.url)
-
-        response_data = {
-            "current_day_concept_read": profile.current_day_concept_read,
-            "current_day_problem_solved": profile.current_day_problem_solved,
-            "current_streak": profile.current_streak,
-            "longest_streak": profile.longest_streak,
-            "language_selected": profile.language_selected,
-            "is_premium_user": profile.is_premium_user,
-            "first_name": user.first_name,
-            "last_name": user.last_name,
-            "profile_photo_url": profile_photo_url,
-            "email": user.email,
-            "username": user.username,
-        }
-
-        return Response(response_data)
+        projection = get_profile_projection(request.user.pk)
+        return Response(absolute_profile_urls(request, projection["header"]))
+
+    @action(detail=False, methods=["get"], url_path="me", url_name="me")
+    @me_schema
+    @conditional_response(profile_projection_validators)
+    def me(self, request):
+        """GET /me/"""
+        projection = get_profile_projection(request.user.pk)
+        return Response(
+            {
+                "header": absolute_profile_urls(request, projection["header"]),
+                "user": absolute_profile_urls(request, projection["user"]),
+            }
+        )
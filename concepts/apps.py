@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ConceptsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "concepts"
+
+    def ready(self):
+        import concepts.signals  # noqa: F401
@@ -14,6 +14,7 @@ class Concept(Tagged, Slugged, models.Model):
         ("ML", "Machine Learning"),
         ("DL", "Deep Learning"),
     ]
+    tag_catalog = "concepts"
 
     description = models.TextField()
     one_liner_desc = models.CharField(max_length=255)
@@ -0,0 +1,43 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from concepts.models import Concept, ConceptsRead
+from ncore.conditional import (
+    bump_content_version,
+    catalog_key,
+    m2m_owner_pks,
+    touch_rows,
+    user_state_key,
+)
+
+
+@receiver(post_save, sender=Concept)
+@receiver(post_delete, sender=Concept)
+def concept_changed(sender, **kwargs):
+    bump_content_version(catalog_key("concepts"))
+
+
+@receiver(m2m_changed, sender=Concept.tags.through)
+def concept_tags_changed(sender, instance, action, reverse, model, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    touch_rows(
+        Concept, m2m_owner_pks(instance, reverse, pk_set), "last_updated_timestamp"
+    )
+    bump_content_version(catalog_key("concepts"))
+
+
+@receiver(m2m_changed, sender=Concept.saved_by.through)
+def concept_saved_by_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    # Forward changes (concept.saved_by.add(user)) carry user ids in pk_set,
+    # reverse ones are sent with the user as the instance.
+    user_ids = {instance.pk} if reverse else set(pk_set or ())
+    bump_content_version(*(user_state_key(user_id) for user_id in user_ids))
+
+
+@receiver(post_save, sender=ConceptsRead)
+@receiver(post_delete, sender=ConceptsRead)
+def concept_read_changed(sender, instance, **kwargs):
+    bump_content_version(user_state_key(instance.user_id))
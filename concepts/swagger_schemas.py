@@ -2,6 +2,8 @@
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
+from ncore.swagger_schemas import projection_parameters
+
 get_concepts_docs = swagger_auto_schema(
     operation_summary="Get List of Concepts",
     manual_parameters=[
@@ -17,6 +19,17 @@ get_concepts_docs = swagger_auto_schema(
             description="Number of items per page",
             type=openapi.TYPE_INTEGER,
         ),
+        *projection_parameters(
+            [
+                "id",
+                "title",
+                "slug",
+                "preview_image_url",
+                "creation_timestamp",
+                "tags",
+                "short_description",
+            ]
+        ),
     ],
     responses={
         200: openapi.Response(
@@ -97,6 +110,9 @@ get_filtered_concepts_docs = swagger_auto_schema(
             description="Show only saved concepts",
             type=openapi.TYPE_BOOLEAN,
         ),
+        *projection_parameters(
+            ["id", "title", "slug", "creation_timestamp", "tags", "description"]
+        ),
     ],
     responses={
         200: openapi.Response(
@@ -121,7 +137,14 @@ get_filtered_concepts_docs = swagger_auto_schema(
                                 "description": openapi.Schema(type=openapi.TYPE_STRING),
                             },
                         ),
-                    )
+                    ),
+                    "tag_counts": openapi.Schema(
+                        type=openapi.TYPE_OBJECT,
+                        description="Number of concepts per tag, largest first",
+                        additional_properties=openapi.Schema(
+                            type=openapi.TYPE_INTEGER
+                        ),
+                    ),
                 },
             ),
         )
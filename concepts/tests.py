@@ -1,3 +1,98 @@
-from django.test import TestCase
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
 
-# Create your tests here.
+from concepts.models import Concept
+
+
+class ConceptConditionalRequestTests(APITestCase):
+    """Test cases for ETag/Last-Modified handling on concept endpoints"""
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        self.concept = Concept.objects.create(
+            title="Gradient Descent",
+            description="Long description",
+            one_liner_desc="Short description",
+            level="Easy",
+            preview_image_url="https://example.com/preview.png",
+            author=self.user,
+        )
+        self.detail_url = reverse("concept-detail", args=[self.concept.slug])
+        self.list_url = reverse("concepts")
+
+    def test_detail_not_modified(self):
+        """Test concept detail returns 304 for a matching ETag"""
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("ETag", response)
+        self.assertIn("Last-Modified", response)
+
+        response = self.client.get(
+            self.detail_url, HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_detail_modified_after_save(self):
+        """Test concept detail ETag changes when the concept is updated"""
+        etag = self.client.get(self.detail_url)["ETag"]
+
+        self.concept.description = "Updated description"
+        self.concept.save()
+
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["description"], "Updated description")
+
+    def test_detail_modified_after_tag_change(self):
+        """Test concept detail ETag changes when tags are updated"""
+        etag = self.client.get(self.detail_url)["ETag"]
+
+        self.concept.set_tags_list(["optimization"])
+
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["tags"], ["optimization"])
+
+    def test_detail_per_user_validators(self):
+        """Test authenticated responses skip Last-Modified and track saves"""
+        access_token = str(RefreshToken.for_user(self.user).access_token)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access_token}")
+
+        response = self.client.get(self.detail_url)
+        self.assertNotIn("Last-Modified", response)
+        self.assertIn("private", response["Cache-Control"])
+        etag = response["ETag"]
+
+        self.concept.saved_by.add(self.user)
+
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data["concept_saved"])
+
+    def test_list_etag_tracks_catalog_version(self):
+        """Test concept list ETag changes when a concept is added"""
+        etag = self.client.get(self.list_url)["ETag"]
+
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        Concept.objects.create(
+            title="Backpropagation",
+            description="Long description",
+            one_liner_desc="Short description",
+            level="Medium",
+            preview_image_url="https://example.com/preview.png",
+            author=self.user,
+        )
+
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["total_items"], 2)
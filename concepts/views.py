@@ -1,4 +1,5 @@
 from datetime import datetime
+from operator import attrgetter
 
 from django.core.paginator import Paginator
 from django.shortcuts import get_object_or_404
@@ -16,14 +17,80 @@ from concepts.swagger_schemas import (
     get_filtered_concepts_docs,
     save_concept_docs,
 )
+from ncore.conditional import (
+    catalog_key,
+    conditional_response,
+    get_content_version,
+    normalized_query,
+    user_state_key,
+)
+from ncore.models import TagCount
+from ncore.projection import FieldProjection
+from ncore.utils import filter_by_tags
 from problems.models import DailyContent
 
 
+# Response fields of the concept lists, and the columns they are read from
+CONCEPT_LIST_FIELDS = {
+    "id": attrgetter("id"),
+    "title": attrgetter("title"),
+    "slug": attrgetter("slug"),
+    "preview_image_url": attrgetter("preview_image_url"),
+    "creation_timestamp": attrgetter("creation_timestamp"),
+    "tags": Concept.get_tags_list,
+    "short_description": attrgetter("one_liner_desc"),
+}
+FILTERED_CONCEPT_FIELDS = {
+    "id": attrgetter("id"),
+    "title": attrgetter("title"),
+    "slug": attrgetter("slug"),
+    "creation_timestamp": attrgetter("creation_timestamp"),
+    "tags": Concept.get_tags_list,
+    "description": attrgetter("one_liner_desc"),
+}
+CONCEPT_LIST_COLUMNS = {
+    "tags": ("tag_names",),
+    "short_description": ("one_liner_desc",),
+    "description": ("one_liner_desc",),
+}
+
+
+def concepts_list_validators(request):
+    """ETag parts for the concept list endpoints, no database access needed"""
+    etag_parts = (
+        catalog_key("concepts"),
+        get_content_version(catalog_key("concepts")),
+        request.path,
+        normalized_query(request),
+    )
+    user_id = request.query_params.get("user_id")
+    if user_id:
+        etag_parts += (get_content_version(user_state_key(user_id)),)
+    return etag_parts, None
+
+
+def concept_detail_validators(request, slug):
+    """ETag/Last-Modified for a single concept from its update timestamp"""
+    row = (
+        Concept.objects.filter(slug=slug)
+        .values_list("id", "last_updated_timestamp")
+        .first()
+    )
+    if row is None:
+        return None, None
+    concept_id, last_updated_timestamp = row
+    etag_parts = (Concept._meta.label, concept_id, last_updated_timestamp)
+    return etag_parts, last_updated_timestamp
+
+
 class ConceptsView(GenericAPIView):
     permission_classes = [AllowAny]
+    token_claims_user = True
     serializer_class = None
+    public_cache_catalogs = ("concepts",)
 
     @get_concepts_docs
+    @conditional_response(concepts_list_validators)
     def get(self, request):
         """
         Get a list of all concepts.
@@ -31,20 +98,16 @@ class ConceptsView(GenericAPIView):
         page = request.query_params.get("page", 1)
         page_size = request.query_params.get("page_size", 10)
 
+        projection = FieldProjection.from_request(
+            request, CONCEPT_LIST_FIELDS, CONCEPT_LIST_COLUMNS
+        )
+
         # Fetching concepts with pagination with django paginator
-        concepts = Concept.objects.all().order_by("-creation_timestamp")
+        concepts = projection.apply(Concept.objects.order_by("-creation_timestamp"))
         paginator = Paginator(concepts, page_size)
         page_obj = paginator.get_page(page)
         concepts_data = [
-            {
-                "id": concept.id,
-                "title": concept.title,
-                "slug": concept.slug,
-                "preview_image_url": concept.preview_image_url,
-                "creation_timestamp": concept.creation_timestamp,
-                "tags": concept.get_tags_list(),
-                "short_description": concept.one_liner_desc,
-            }
+            projection.serialize(concept, CONCEPT_LIST_FIELDS)
             for concept in page_obj.object_list
         ]
         response_data = {
@@ -58,9 +121,13 @@ class ConceptsView(GenericAPIView):
 
 class FilteredConceptsView(GenericAPIView):
     permission_classes = [AllowAny]
+    token_claims_user = True
     serializer_class = None
+    public_cache_catalogs = ("concepts",)
+    public_cache_user_params = ("user_id",)
 
     @get_filtered_concepts_docs
+    @conditional_response(concepts_list_validators, per_user=True)
     def get(self, request):
         """
         Get a filtered list of concepts based on tags and date range.
@@ -74,11 +141,14 @@ class FilteredConceptsView(GenericAPIView):
         show_saved_only = request.query_params.get("show_saved_only", False)
         user_id = request.query_params.get("user_id", None)
 
-        concepts = Concept.objects.all()
+        projection = FieldProjection.from_request(
+            request, FILTERED_CONCEPT_FIELDS, CONCEPT_LIST_COLUMNS
+        )
+        concepts = projection.apply(Concept.objects.all())
 
         if tags:
             tags_list = [tag.strip() for tag in tags.split(",")]
-            concepts = concepts.filter(tags__name__in=tags_list).distinct()
+            concepts = filter_by_tags(concepts, tags_list)
 
         if search_query:
             concepts = concepts.filter(title__icontains=search_query)
@@ -99,14 +169,7 @@ class FilteredConceptsView(GenericAPIView):
         page_obj = paginator.get_page(page)
 
         concepts_data = [
-            {
-                "id": concept.id,
-                "title": concept.title,
-                "slug": concept.slug,
-                "creation_timestamp": concept.creation_timestamp,
-                "tags": concept.get_tags_list(),
-                "description": concept.one_liner_desc,
-            }
+            projection.serialize(concept, FILTERED_CONCEPT_FIELDS)
             for concept in page_obj.object_list
         ]
 
@@ -115,6 +178,7 @@ class FilteredConceptsView(GenericAPIView):
             "page": page_obj.number,
             "total_pages": paginator.num_pages,
             "total_items": paginator.count,
+            "tag_counts": TagCount.get_counts(Concept),
         }
 
         return Response(response_data, status=status.HTTP_200_OK)
@@ -122,9 +186,11 @@ class FilteredConceptsView(GenericAPIView):
 
 class ConceptDetailView(GenericAPIView):
     permission_classes = [AllowAny]
+    token_claims_user = True
     serializer_class = None
 
     @get_concept_detail_docs
+    @conditional_response(concept_detail_validators, per_user=True)
     def get(self, request, slug):
         """
         Get details of a specific concept by slug.
@@ -178,6 +244,7 @@ class SaveConceptView(APIView):
 
 class ConceptsByDateView(GenericAPIView):
     permission_classes = [IsAuthenticated]
+    token_claims_user = True
     serializer_class = None
 
     @get_concepts_by_date_docs
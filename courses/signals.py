@@ -0,0 +1,26 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from courses.models import Course
+from ncore.conditional import (
+    bump_content_version,
+    catalog_key,
+    m2m_owner_pks,
+    touch_rows,
+)
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def course_changed(sender, **kwargs):
+    bump_content_version(catalog_key("courses"))
+
+
+@receiver(m2m_changed, sender=Course.likes.through)
+@receiver(m2m_changed, sender=Course.followers.through)
+def course_audience_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    # Course payloads carry likes/followers counts, so treat those as updates.
+    touch_rows(Course, m2m_owner_pks(instance, reverse, pk_set), "updated_at")
+    bump_content_version(catalog_key("courses"))
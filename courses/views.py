@@ -4,6 +4,7 @@ from rest_framework import status
 from rest_framework.generics import GenericAPIView
 from rest_framework.views import APIView
 from courses.models import Course
+from ncore.conditional import conditional_response
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from django.shortcuts import get_object_or_404
 from courses.swagger_schemas import (
@@ -14,10 +15,21 @@ from courses.swagger_schemas import (
 )
 
 
+def course_detail_validators(request, slug):
+    """ETag/Last-Modified for a single course from its update timestamp"""
+    row = Course.objects.filter(slug=slug).values_list("id", "updated_at").first()
+    if row is None:
+        return None, None
+    course_id, updated_at = row
+    return (Course._meta.label, course_id, updated_at), updated_at
+
+
 # Create your views here.
 class CoursesView(GenericAPIView):
     permission_classes = [AllowAny]  # Allow both authenticated and guest users
+    token_claims_user = True
     serializer_class = None  #
+    public_cache_catalogs = ("courses",)
 
     @get_all_courses_docs
     def get(self, request):
@@ -69,9 +81,11 @@ class LikeDislikeCourseView(APIView):
 
 class CourseDetailView(GenericAPIView):
     permission_classes = [AllowAny]  # Allow both authenticated and guest users
+    token_claims_user = True
     serializer_class = None
 
     @single_course_details_docs
+    @conditional_response(course_detail_validators)
     def get(self, request, slug):
         """
         Get details of a specific course.
@@ -13,6 +13,7 @@ echo "Media directory created/verified"
 
 # Apply migrations
 python manage.py migrate
+python manage.py createcachetable
 
 # Load fixture data
 python manage.py loaddata initial_data.json
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class NcoreConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "ncore"
+
+    def ready(self):
+        from ncore.signals import connect_tag_signals
+
+        connect_tag_signals()
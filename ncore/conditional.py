@@ -0,0 +1,154 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.http import http_date, quote_etag
+
+VERSION_KEY_PREFIX = "content-version"
+
+
+def catalog_key(name):
+    """Version key for a whole catalog, e.g. ``catalog_key("problems")``."""
+    return f"catalog:{name}"
+
+
+def user_state_key(user_id):
+    """Version key for the per-user state mixed into catalog responses."""
+    return f"user-state:{user_id}"
+
+
+def get_content_version(key):
+    """
+    Return the version counter stored under ``key``.
+
+    Counters are seeded from the clock, so a counter that was evicted from
+    the cache never comes back with a value that an old ETag was built on.
+    """
+    cache_key = f"{VERSION_KEY_PREFIX}:{key}"
+    version = cache.get(cache_key)
+    if version is None:
+        seed = time.time_ns()
+        cache.add(cache_key, seed, timeout=None)
+        version = cache.get(cache_key, seed)
+    return version
+
+
+def bump_content_version(*keys):
+    """Invalidate every ETag built on top of the given version keys."""
+    for key in keys:
+        cache_key = f"{VERSION_KEY_PREFIX}:{key}"
+        try:
+            cache.incr(cache_key)
+        except ValueError:
+            cache.add(cache_key, time.time_ns(), timeout=None)
+
+
+def touch_rows(model, pks, field):
+    """
+    Bump ``field`` (an ``auto_now`` timestamp) on the given rows without
+    loading them. Used when a related change (tags, likes, ...) alters the
+    representation of a row but does not go through ``Model.save``.
+    """
+    if pks:
+        model.objects.filter(pk__in=pks).update(**{field: timezone.now()})
+
+
+def m2m_owner_pks(instance, reverse, pk_set):
+    """
+    Return the pks of the rows that own the M2M field from an
+    ``m2m_changed`` signal, whichever side of the relation it was sent from.
+    """
+    if reverse:
+        return set(pk_set or ())
+    return {instance.pk}
+
+
+def request_user_state(request):
+    """ETag parts describing the user-specific state of a response."""
+    user = request.user
+    if user is None or not user.is_authenticated:
+        return ("anonymous",)
+    return (user.pk, get_content_version(user_state_key(user.pk)))
+
+
+def make_etag(*parts):
+    digest = hashlib.md5(
+        ":".join(str(part) for part in parts).encode(), usedforsecurity=False
+    ).hexdigest()
+    return quote_etag(digest)
+
+
+def normalized_query(request, ignore=()):
+    """Query string with keys and values sorted, so equivalent URLs match."""
+    items = sorted(
+        (key, value)
+        for key, values in request.GET.lists()
+        if key not in ignore
+        for value in values
+    )
+    return "&".join(f"{key}={value}" for key, value in items)
+
+
+def conditional_response(validators, per_user=False):
+    """
+    Decorator for view methods that answers conditional GET/HEAD requests
+    before the view body (and its serializer) runs.
+
+    ``validators(request, *args, **kwargs)`` must be cheap and return an
+    ``(etag_parts, last_modified)`` pair; ``(None, None)`` means the resource
+    does not exist and the view is left to produce its own response.
+
+    With ``per_user=True`` the response contains fields that depend on the
+    requesting user: their state version is mixed into the ETag and
+    Last-Modified is only sent to anonymous clients, since it cannot
+    describe changes to the user's own data.
+    """
+
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return view_method(self, request, *args, **kwargs)
+
+            etag_parts, last_modified = validators(request, *args, **kwargs)
+            if etag_parts is None and last_modified is None:
+                return view_method(self, request, *args, **kwargs)
+
+            authenticated = bool(request.user and request.user.is_authenticated)
+            etag = None
+            if etag_parts is not None:
+                if per_user:
+                    etag_parts = (*etag_parts, *request_user_state(request))
+                etag = make_etag(*etag_parts)
+            if per_user and authenticated:
+                last_modified = None
+            last_modified = int(last_modified.timestamp()) if last_modified else None
+
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            )
+            if response is None:
+                response = view_method(self, request, *args, **kwargs)
+
+            if response.status_code in (200, 304):
+                if etag and not response.has_header("ETag"):
+                    response.headers["ETag"] = etag
+                if last_modified and not response.has_header("Last-Modified"):
+                    response.headers["Last-Modified"] = http_date(last_modified)
+                if authenticated:
+                    patch_cache_control(response, private=True, no_cache=True)
+                else:
+                    patch_cache_control(response, no_cache=True)
+                patch_vary_headers(response, ("Authorization", "Cookie"))
+            return response
+
+        return wrapper
+
+    return decorator
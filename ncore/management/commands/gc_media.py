@@ -0,0 +1,43 @@
+import time
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from ncore.storage import referenced_media_names
+
+
+class Command(BaseCommand):
+    help = "Delete media files that are no longer referenced by any model"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--min-age",
+            type=float,
+            default=24,
+            help="Only delete files older than this many hours, so uploads "
+            "that are not committed yet are kept",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="List orphaned files without deleting them",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = time.time() - options["min_age"] * 60 * 60
+        referenced = referenced_media_names()
+
+        orphaned = 0
+        for name in default_storage.walk_files():
+            if name in referenced:
+                continue
+            if default_storage.get_modified_time(name).timestamp() > cutoff:
+                continue
+            orphaned += 1
+            if options["dry_run"]:
+                self.stdout.write(name)
+            else:
+                default_storage.delete(name)
+
+        action = "Found" if options["dry_run"] else "Deleted"
+        self.stdout.write(self.style.SUCCESS(f"{action} {orphaned} orphaned files"))
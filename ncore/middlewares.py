@@ -0,0 +1,151 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.deprecation import MiddlewareMixin
+from rest_framework.exceptions import NotAcceptable
+from rest_framework.request import Request
+
+from ncore.conditional import (
+    catalog_key,
+    get_content_version,
+    normalized_query,
+    user_state_key,
+)
+
+CACHED_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Content-Language")
+
+
+class PublicResponseCacheMiddleware(MiddlewareMixin):
+    """
+    Caches full responses of public catalog views for anonymous clients.
+
+    A view opts in by listing the catalogs its output depends on::
+
+        class CoursesView(GenericAPIView):
+            public_cache_catalogs = ("courses",)
+
+    Views whose output also depends on a user named in the query string (e.g.
+    ``?user_id=``) list those parameters in ``public_cache_user_params``.
+
+    The catalog versions are part of the cache key, so saving any content in
+    those catalogs purges the cached responses without touching the cache.
+    So is the format of the renderer the view would negotiate: the browsable
+    API and JSON are separate entries, and responses vary on ``Accept``.
+    Hits are answered from process_view, before authentication, permissions
+    or the view itself run, so they never reach the database.
+    """
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, "cls", None)
+        catalogs = getattr(view_class, "public_cache_catalogs", None)
+        if not catalogs or request.method not in ("GET", "HEAD"):
+            return None
+
+        if not self.is_anonymous(request):
+            request._public_cache_private = True
+            return None
+
+        renderer_format = self.negotiated_format(view_class, request, view_kwargs)
+        if renderer_format is None:
+            return None
+        versions = ":".join(
+            f"{name}={get_content_version(catalog_key(name))}" for name in catalogs
+        )
+        for param in getattr(view_class, "public_cache_user_params", ()):
+            user_id = request.GET.get(param)
+            if user_id:
+                versions += f":{param}={get_content_version(user_state_key(user_id))}"
+        raw_key = (
+            f"{request.path}?{normalized_query(request)}#{versions}#{renderer_format}"
+        )
+        request._public_cache_key = (
+            "public-response:"
+            + hashlib.md5(raw_key.encode(), usedforsecurity=False).hexdigest()
+        )
+
+        cached = cache.get(request._public_cache_key)
+        if cached is None:
+            return None
+
+        status_code, headers, content = cached
+        response = HttpResponse(content, status=status_code)
+        for header, value in headers.items():
+            response.headers[header] = value
+        response = get_conditional_response(
+            request,
+            etag=response.get("ETag"),
+            last_modified=None,
+            response=response,
+        )
+        request._public_cache_hit = True
+        return response
+
+    def process_response(self, request, response):
+        if getattr(request, "_public_cache_private", False):
+            patch_cache_control(response, private=True)
+            patch_vary_headers(response, ("Authorization", "Cookie"))
+            return response
+
+        cache_key = getattr(request, "_public_cache_key", None)
+        if cache_key is None or response.status_code not in (200, 304):
+            return response
+
+        # Anonymous responses are identical for everyone, so let browsers and
+        # the CDN keep them for a short while instead of revalidating.
+        response.headers["Cache-Control"] = (
+            f"public, max-age={settings.PUBLIC_CACHE_MAX_AGE}, "
+            f"s-maxage={settings.PUBLIC_CACHE_CDN_MAX_AGE}"
+        )
+        patch_vary_headers(response, ("Accept", "Authorization", "Cookie"))
+
+        if (
+            getattr(request, "_public_cache_hit", False)
+            or request.method != "GET"
+            or response.status_code != 200
+            or response.streaming
+            or response.cookies
+        ):
+            return response
+
+        headers = {
+            header: response[header]
+            for header in CACHED_HEADERS
+            if response.has_header(header)
+        }
+        cache.set(
+            cache_key,
+            (response.status_code, headers, response.content),
+            settings.PUBLIC_CACHE_TIMEOUT,
+        )
+        return response
+
+    @staticmethod
+    def negotiated_format(view_class, request, view_kwargs):
+        """
+        Format of the renderer the view will pick for ``request``, ``None``
+        if it will refuse it.
+        """
+        view = view_class()
+        renderers = [renderer() for renderer in view.renderer_classes]
+        try:
+            renderer, _ = view.get_content_negotiator().select_renderer(
+                Request(request), renderers, view_kwargs.get("format")
+            )
+        except NotAcceptable:
+            return None
+        return renderer.format
+
+    @staticmethod
+    def is_anonymous(request):
+        """Anonymous means no credentials at all; decided without a DB hit."""
+        return (
+            not request.META.get("HTTP_AUTHORIZATION")
+            and settings.SESSION_COOKIE_NAME not in request.COOKIES
+        )
@@ -0,0 +1,80 @@
+# Generated by Django 5.1.2 on 2026-10-19 10:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+TAGGED_MODELS = (
+    ("concepts", "Concept"),
+    ("problems", "ConceptBasedProblem"),
+    ("problems", "DatasetBasedProblem"),
+)
+
+
+def backfill_tag_counts(apps, schema_editor):
+    ContentType = apps.get_model("contenttypes", "ContentType")
+    TagCount = apps.get_model("ncore", "TagCount")
+    for app_label, model_name in TAGGED_MODELS:
+        model = apps.get_model(app_label, model_name)
+        content_type, _ = ContentType.objects.get_or_create(
+            app_label=app_label, model=model_name.lower()
+        )
+        rows = (
+            model.tags.through.objects.values("tag_id")
+            .annotate(count=Count("pk"))
+            .values_list("tag_id", "count")
+        )
+        TagCount.objects.bulk_create(
+            [
+                TagCount(tag_id=tag_id, content_type=content_type, count=count)
+                for tag_id, count in rows
+            ],
+            batch_size=500,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("ncore", "0001_initial"),
+        ("concepts", "0001_initial"),
+        ("problems", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TagCount",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("count", models.PositiveIntegerField(default=0)),
+                (
+                    "content_type",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="contenttypes.contenttype",
+                    ),
+                ),
+                (
+                    "tag",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="counts",
+                        to="ncore.tag",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("content_type", "tag")},
+            },
+        ),
+        migrations.RunPython(backfill_tag_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 5.1.2 on 2026-10-19 10:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+SLUGGED_MODELS = (
+    ("concepts", "Concept"),
+    ("courses", "Course"),
+    ("problems", "ConceptBasedProblem"),
+    ("problems", "DatasetBasedProblem"),
+)
+
+
+def backfill_slug_counters(apps, schema_editor):
+    ContentType = apps.get_model("contenttypes", "ContentType")
+    SlugCounter = apps.get_model("ncore", "SlugCounter")
+    for app_label, model_name in SLUGGED_MODELS:
+        model = apps.get_model(app_label, model_name)
+        content_type, _ = ContentType.objects.get_or_create(
+            app_label=app_label, model=model_name.lower()
+        )
+        last_index = {}
+        for slug in model.objects.values_list("slug", flat=True).iterator():
+            last_index[slug] = max(last_index.get(slug, 0), 1)
+            base_slug, _, suffix = slug.rpartition("-")
+            if base_slug and suffix.isdigit():
+                last_index[base_slug] = max(last_index.get(base_slug, 0), int(suffix))
+        SlugCounter.objects.bulk_create(
+            [
+                SlugCounter(
+                    content_type=content_type, base_slug=base_slug, last_index=index
+                )
+                for base_slug, index in last_index.items()
+            ],
+            batch_size=500,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("ncore", "0002_tagcount"),
+        ("courses", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SlugCounter",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("base_slug", models.CharField(max_length=255)),
+                ("last_index", models.PositiveIntegerField(default=0)),
+                (
+                    "content_type",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="contenttypes.contenttype",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("content_type", "base_slug")},
+            },
+        ),
+        migrations.RunPython(backfill_slug_counters, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,12 @@
+import re
 import uuid
 
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ValidationError
-from django.db import IntegrityError, models
+from django.db import IntegrityError, connection, models, transaction
+from django.db.models import F, Sum
+from django.db.models.functions import Greatest
 from django.template.defaultfilters import slugify
 from django.utils.translation import gettext_lazy as _
 
@@ -14,22 +17,149 @@ class Tag(models.Model):
     name = models.CharField(max_length=255, unique=True)
 
 
+class TagCount(models.Model):
+    """
+    Precomputed number of rows of one content type carrying a tag, kept up
+    to date incrementally by the receivers in ``ncore.signals``.
+    """
+
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name="counts")
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("content_type", "tag")
+
+    @classmethod
+    def adjust(cls, content_type, deltas):
+        """Apply ``{tag_id: delta}`` to the counts of ``content_type``."""
+        deltas = {tag_id: delta for tag_id, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        cls.objects.bulk_create(
+            [
+                cls(tag_id=tag_id, content_type=content_type)
+                for tag_id, delta in deltas.items()
+                if delta > 0
+            ],
+            ignore_conflicts=True,
+        )
+        tag_ids_by_delta = {}
+        for tag_id, delta in deltas.items():
+            tag_ids_by_delta.setdefault(delta, []).append(tag_id)
+        # Clamped at zero: a count drifted by writes that bypass the signals
+        # (e.g. raw deletes) must not turn a tag edit into an IntegrityError
+        for delta, tag_ids in tag_ids_by_delta.items():
+            cls.objects.filter(content_type=content_type, tag_id__in=tag_ids).update(
+                count=Greatest(F("count") + delta, 0)
+            )
+
+    @classmethod
+    def get_counts(cls, *models):
+        """Return ``{tag_name: count}`` over the given models, largest first."""
+        content_types = ContentType.objects.get_for_models(*models).values()
+        rows = (
+            cls.objects.filter(content_type__in=content_types, count__gt=0)
+            .values("tag__name")
+            .annotate(total=Sum("count"))
+            .order_by("-total", "tag__name")
+        )
+        return {row["tag__name"]: row["total"] for row in rows}
+
+
 class Tagged(models.Model):
+    """
+    Abstract model for taggable content.
+
+    ``tag_names`` is a denormalized copy of the tag names, in the order the
+    tags were attached, so that reading tags never needs a query. It is kept
+    in sync with the ``tags`` M2M by the receivers in ``ncore.signals``.
+    """
+
     tags = models.ManyToManyField(Tag, blank=True)
+    tag_names = models.JSONField(default=list, blank=True, editable=False)
+
+    # Catalog whose responses show the tag names (``ncore.conditional``) and
+    # the timestamp row ETags derive from; renaming or deleting a tag does
+    # not go through the rows' save(), so both are moved by hand
+    tag_catalog = None
+    tag_timestamp_field = "last_updated_timestamp"
 
     def get_tags_list(self):
-        return list(self.tags.values_list("name", flat=True))
+        return list(self.tag_names)
 
     def set_tags_list(self, tags_list):
         """Sets tags from a list."""
-        self.tags.set(
-            [Tag.objects.get_or_create(name=tag.strip())[0] for tag in tags_list]
+        names = list(dict.fromkeys(tag.strip() for tag in tags_list if tag.strip()))
+        Tag.objects.bulk_create(
+            [Tag(name=name) for name in names], ignore_conflicts=True
         )
+        self.tags.set(Tag.objects.filter(name__in=names))
 
     class Meta:
         abstract = True
 
 
+class SlugCounter(models.Model):
+    """
+    Highest index handed out for a base slug of a model: index 1 is the bare
+    slug, index n > 1 is ``<base>-<n>``. Allocating a slug is a single atomic
+    upsert on this table instead of scanning the model's slugs.
+    """
+
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    base_slug = models.CharField(max_length=255)
+    last_index = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("content_type", "base_slug")
+
+    @classmethod
+    def allocate(cls, model, base_slug, count=1):
+        """
+        Reserve ``count`` consecutive indexes for ``base_slug`` in one round
+        trip and return the slugs built from them.
+        """
+        content_type = ContentType.objects.get_for_model(model)
+        qn = connection.ops.quote_name
+        table = qn(cls._meta.db_table)
+        last_index = qn("last_index")
+        sql = (
+            f"INSERT INTO {table} ({qn('content_type_id')}, {qn('base_slug')}, "
+            f"{last_index}) VALUES (%s, %s, %s) "
+            f"ON CONFLICT ({qn('content_type_id')}, {qn('base_slug')}) "
+            f"DO UPDATE SET {last_index} = {table}.{last_index} + EXCLUDED.{last_index} "
+            f"RETURNING {last_index}"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [content_type.pk, base_slug, count])
+            end = cursor.fetchone()[0]
+        return [
+            base_slug if index == 1 else f"{base_slug}-{index}"
+            for index in range(end - count + 1, end + 1)
+        ]
+
+    @classmethod
+    def resync(cls, model, base_slug):
+        """
+        Move the counter past slugs that were written without going through
+        it (fixtures, manual edits, titles that slugify to ``<base>-<n>``).
+        """
+        used = [1] if model.objects.filter(slug=base_slug).exists() else [0]
+        suffixed = model.objects.filter(
+            slug__iregex=r"^{}-[0-9]+$".format(re.escape(base_slug))
+        ).values_list("slug", flat=True)
+        used.extend(int(slug.rsplit("-", 1)[1]) for slug in suffixed)
+
+        content_type = ContentType.objects.get_for_model(model)
+        counter, _ = cls.objects.get_or_create(
+            content_type=content_type, base_slug=base_slug
+        )
+        cls.objects.filter(pk=counter.pk, last_index__lt=max(used)).update(
+            last_index=max(used)
+        )
+
+
 class Slugged(models.Model):
     """
     Abstract model that handles auto-generating slugs.
@@ -72,19 +202,49 @@ class Slugged(models.Model):
         # update key.
         kwargs.pop("update", False)
 
+        # Renaming an existing slug goes through the old scan, which can
+        # exclude the row's own slug; new slugs come from the counter table.
+        use_counter = new_slug and not (self.slug and update_slug)
+
         retry = 0
         max_retry = 3
         while retry < max_retry:
             try:
-                if new_slug:
+                if use_counter:
+                    self.slug = SlugCounter.allocate(concrete_model, self.get_slug())[0]
+                elif new_slug:
                     self.slug = get_unique_slug(
                         concrete_model, self.get_slug(), self.id
                     )
-                super(Slugged, self).save(*args, **kwargs)
+                with transaction.atomic():
+                    super(Slugged, self).save(*args, **kwargs)
                 break
             except IntegrityError as e:
                 print(e)
                 retry += 1
+                if use_counter:
+                    # The slug was taken behind the counter's back.
+                    self.slug = ""
+                    SlugCounter.resync(concrete_model, self.get_slug())
+
+    @classmethod
+    def allocate_slugs(cls, instances):
+        """
+        Assign unique slugs to unsaved instances before a ``bulk_create``,
+        with one counter round trip per distinct base slug.
+        """
+        if not instances:
+            return instances
+        concrete_model = base_concrete_model(Slugged, instances[0])
+        by_base_slug = {}
+        for instance in instances:
+            if not instance.slug:
+                by_base_slug.setdefault(instance.get_slug(), []).append(instance)
+        for base_slug, group in by_base_slug.items():
+            slugs = SlugCounter.allocate(concrete_model, base_slug, len(group))
+            for instance, slug in zip(group, slugs):
+                instance.slug = slug
+        return instances
 
     def get_slug(self):
         """
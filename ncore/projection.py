@@ -0,0 +1,99 @@
+from rest_framework.exceptions import ValidationError
+
+
+def split_names(value):
+    return [name.strip() for name in (value or "").split(",") if name.strip()]
+
+
+class FieldProjection:
+    """
+    Sparse fieldset of a list response, selected with the ``fields=`` and
+    ``exclude=`` query parameters (``?fields=id,title`` or
+    ``?exclude=description``).
+
+    ``available`` lists the response fields in output order. ``columns``
+    maps a response field to the model fields it is built from, so the
+    queryset can load just those; a field missing from it is read from the
+    model field of the same name, and one mapped to ``()`` needs no column.
+    """
+
+    def __init__(self, available, fields=None, exclude=None, columns=None):
+        self.available = list(available)
+        unknown = (set(fields or ()) | set(exclude or ())) - set(self.available)
+        if unknown:
+            raise ValidationError(
+                {"fields": f"Unknown fields: {', '.join(sorted(unknown))}"}
+            )
+        self.fields = [
+            name
+            for name in self.available
+            if (not fields or name in fields) and name not in (exclude or ())
+        ]
+        self.column_map = columns or {}
+
+    @classmethod
+    def from_request(cls, request, available, columns=None):
+        return cls(
+            available,
+            fields=split_names(request.query_params.get("fields")),
+            exclude=split_names(request.query_params.get("exclude")),
+            columns=columns,
+        )
+
+    @classmethod
+    def for_serializer(cls, request, serializer_class):
+        """
+        Projection over ``serializer_class.Meta.fields``, with the column
+        map taken from ``Meta.projection_columns``.
+        """
+        meta = serializer_class.Meta
+        return cls.from_request(
+            request, meta.fields, getattr(meta, "projection_columns", None)
+        )
+
+    def __contains__(self, name):
+        return name in self.fields
+
+    def columns(self):
+        columns = []
+        for name in self.fields:
+            for column in self.column_map.get(name, (name,)):
+                if column not in columns:
+                    columns.append(column)
+        return columns
+
+    def apply(self, queryset, *extra):
+        """
+        Restrict ``queryset`` to the columns of the selected fields, plus
+        ``extra`` columns the view itself relies on (ordering, grouping).
+        """
+        return queryset.only(*self.columns(), *extra)
+
+    def serialize(self, instance, getters):
+        """
+        Build the response dict of ``instance`` from ``getters``, a mapping
+        of response field to a callable; unselected fields are not computed,
+        so they never touch a deferred column.
+        """
+        return {name: getters[name](instance) for name in self.fields}
+
+    def project(self, row):
+        """Narrow a dict (e.g. a ``values()`` row) to the selected fields."""
+        return {name: row[name] for name in self.fields}
+
+
+class ProjectedSerializerMixin:
+    """
+    Serializer mixin that drops the fields outside the ``FieldProjection``
+    passed as ``context["projection"]``. Dropped method fields are never
+    evaluated.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        projection = self.context.get("projection")
+        if projection is not None:
+            for name in list(fields):
+                if name not in projection:
+                    del fields[name]
+        return fields
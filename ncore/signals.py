@@ -0,0 +1,127 @@
+from django.apps import apps
+from django.contrib.contenttypes.models import ContentType
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+
+from ncore.conditional import bump_content_version, catalog_key, touch_rows
+from ncore.models import Tag, TagCount, Tagged
+
+
+def get_tagged_models():
+    """All concrete models that inherit from ``Tagged``."""
+    return [
+        model
+        for model in apps.get_models()
+        if issubclass(model, Tagged) and not model._meta.abstract
+    ]
+
+
+def sync_tag_names(model, pks):
+    """
+    Rebuild ``tag_names`` for the given rows of a tagged model with one read
+    over the through table and one bulk update.
+    """
+    pks = set(pks)
+    if not pks:
+        return {}
+
+    through = model.tags.through
+    owner_field = model.tags.field.m2m_field_name()
+    tag_names = {pk: [] for pk in pks}
+    rows = (
+        through.objects.filter(**{f"{owner_field}__in": pks})
+        .order_by("pk")
+        .values_list(f"{owner_field}_id", "tag__name")
+    )
+    for owner_id, name in rows:
+        tag_names[owner_id].append(name)
+
+    model.objects.bulk_update(
+        [model(pk=pk, tag_names=names) for pk, names in tag_names.items()],
+        ["tag_names"],
+    )
+    return tag_names
+
+
+def tags_changed(sender, instance, action, reverse, model, pk_set, **kwargs):
+    tagged_model = model if reverse else type(instance)
+    owner_field = f"{tagged_model.tags.field.m2m_field_name()}_id"
+    content_type = ContentType.objects.get_for_model(tagged_model)
+
+    if action in ("pre_remove", "pre_clear"):
+        # Remember which links really exist before they are removed, both to
+        # keep the facet counts exact and because clear() sends no pk_set.
+        links = sender.objects.filter(
+            **{"tag_id" if reverse else owner_field: instance.pk}
+        )
+        if action == "pre_remove":
+            links = links.filter(
+                **{f"{owner_field}__in" if reverse else "tag_id__in": pk_set}
+            )
+        instance._removed_tag_links = set(
+            links.values_list(owner_field if reverse else "tag_id", flat=True)
+        )
+        return
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+
+    # post_add only carries the links that were actually created.
+    changed = set(pk_set) if action == "post_add" else instance._removed_tag_links
+    delta = 1 if action == "post_add" else -1
+    if reverse:
+        TagCount.adjust(content_type, {instance.pk: delta * len(changed)})
+        sync_tag_names(tagged_model, changed)
+        return
+
+    TagCount.adjust(content_type, {tag_id: delta for tag_id in changed})
+    tag_names = sync_tag_names(tagged_model, {instance.pk})
+    instance.tag_names = tag_names[instance.pk]
+
+
+def tagged_pre_delete(sender, instance, **kwargs):
+    # Deleting a tagged row cascades to the through table without sending
+    # m2m_changed, so take its tags out of the facet counts here.
+    TagCount.adjust(
+        ContentType.objects.get_for_model(sender),
+        {tag_id: -1 for tag_id in instance.tags.values_list("pk", flat=True)},
+    )
+
+
+def tag_pre_delete(sender, instance, **kwargs):
+    instance._tagged_pks = tagged_pks_for_tag(instance)
+
+
+def tag_changed(sender, instance, created=False, raw=False, **kwargs):
+    if created or raw:
+        return
+    tagged_pks = getattr(instance, "_tagged_pks", None)
+    if tagged_pks is None:
+        tagged_pks = tagged_pks_for_tag(instance)
+    for tagged_model, pks in tagged_pks.items():
+        if not pks:
+            continue
+        sync_tag_names(tagged_model, pks)
+        touch_rows(tagged_model, pks, tagged_model.tag_timestamp_field)
+        if tagged_model.tag_catalog:
+            bump_content_version(catalog_key(tagged_model.tag_catalog))
+
+
+def tagged_pks_for_tag(tag):
+    """Map every tagged model to the pks of its rows carrying ``tag``."""
+    tagged_pks = {}
+    for tagged_model in get_tagged_models():
+        owner_field = tagged_model.tags.field.m2m_field_name()
+        tagged_pks[tagged_model] = set(
+            tagged_model.tags.through.objects.filter(tag=tag).values_list(
+                f"{owner_field}_id", flat=True
+            )
+        )
+    return tagged_pks
+
+
+def connect_tag_signals():
+    for tagged_model in get_tagged_models():
+        m2m_changed.connect(tags_changed, sender=tagged_model.tags.through)
+        pre_delete.connect(tagged_pre_delete, sender=tagged_model)
+    post_save.connect(tag_changed, sender=Tag)
+    pre_delete.connect(tag_pre_delete, sender=Tag)
+    post_delete.connect(tag_changed, sender=Tag)
@@ -0,0 +1,96 @@
+import hashlib
+import os
+import re
+
+from django.core.files.storage import FileSystemStorage
+
+HASH_LENGTH = 16
+
+# "<stem>.<16 hex digits>.<ext>" as written by HashedMediaStorage
+HASHED_NAME_RE = re.compile(r"\.([0-9a-f]{%d})(\.[^./]+)?$" % HASH_LENGTH)
+
+media_reference_providers = []
+
+
+def content_hash(content):
+    """Hex sha256 of a Django ``File``, read in chunks."""
+    sha256 = hashlib.sha256()
+    if hasattr(content, "seek"):
+        content.seek(0)
+    for chunk in content.chunks():
+        sha256.update(chunk)
+    if hasattr(content, "seek"):
+        content.seek(0)
+    return sha256.hexdigest()
+
+
+def is_hashed_name(name):
+    return HASHED_NAME_RE.search(name) is not None
+
+
+class HashedMediaStorage(FileSystemStorage):
+    """
+    File system storage that names every file after its content:
+    ``profile_photos/google_profile_7.jpg`` is stored as
+    ``profile_photos/google_profile_7.<sha256 prefix>.jpg``.
+
+    A name therefore never refers to two different contents, which lets
+    ``ncore.views.serve_media`` mark responses as immutable. Saving content
+    that is already stored returns the existing name instead of a copy.
+    Files that are no longer referenced are removed by ``gc_media``.
+    """
+
+    def _save(self, name, content):
+        digest = content_hash(content)[:HASH_LENGTH]
+        root, ext = os.path.splitext(name)
+        match = HASHED_NAME_RE.search(name)
+        if match:
+            # Re-saving a hashed file must not stack hashes
+            root = name[: match.start()]
+        name = f"{root}.{digest}{ext}"
+        if self.exists(name):
+            return name
+        return super()._save(name, content)
+
+    def get_available_name(self, name, max_length=None):
+        # The name is replaced by a content-hashed one in _save, and an
+        # existing file with that name has the same content.
+        return name
+
+    def walk_files(self, path=""):
+        """Yield the names of all files under ``path``, recursively."""
+        directories, files = self.listdir(path)
+        for file_name in files:
+            yield os.path.join(path, file_name) if path else file_name
+        for directory in directories:
+            yield from self.walk_files(os.path.join(path, directory))
+
+
+def register_media_references(provider):
+    """
+    Register a callable yielding storage names referenced outside of
+    ``FileField`` columns (e.g. names kept in JSON), so ``gc_media`` keeps
+    those files.
+    """
+    media_reference_providers.append(provider)
+    return provider
+
+
+def referenced_media_names():
+    """Storage names referenced by any ``FileField`` or registered provider."""
+    from django.apps import apps
+    from django.db.models import FileField
+
+    names = set()
+    for model in apps.get_models():
+        for field in model._meta.concrete_fields:
+            if isinstance(field, FileField):
+                names.update(
+                    model._default_manager.exclude(**{field.attname: ""})
+                    .exclude(**{f"{field.attname}__isnull": True})
+                    .values_list(field.attname, flat=True)
+                    .iterator()
+                )
+    for provider in media_reference_providers:
+        names.update(provider())
+    return names
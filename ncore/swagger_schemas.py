@@ -0,0 +1,22 @@
+from drf_yasg import openapi
+
+
+def projection_parameters(available):
+    """``fields`` / ``exclude`` query parameters of a ``FieldProjection``"""
+    names = ", ".join(available)
+    return [
+        openapi.Parameter(
+            name="fields",
+            in_=openapi.IN_QUERY,
+            type=openapi.TYPE_STRING,
+            required=False,
+            description=f"Comma separated fields to return, out of {names}. Defaults to all of them.",
+        ),
+        openapi.Parameter(
+            name="exclude",
+            in_=openapi.IN_QUERY,
+            type=openapi.TYPE_STRING,
+            required=False,
+            description=f"Comma separated fields to leave out, out of {names}.",
+        ),
+    ]
@@ -1,3 +1,432 @@
-from django.test import TestCase
+import os
+from io import StringIO
+from tempfile import TemporaryDirectory
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.models import Profile
+from concepts.models import Concept
+from courses.models import Course
+from ncore.conditional import catalog_key, get_content_version
+from ncore.models import SlugCounter, Tag, TagCount
+from problems.models import ConceptBasedProblem
+
+
+# The per-process cache the query-count tests are written against
+LOCMEM_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class PublicResponseCacheMiddlewareTests(APITestCase):
+    """Test cases for the anonymous public response cache"""
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        Course.objects.create(title="Machine Learning", description="Basics")
+        self.url = reverse("courses")
+
+    def test_anonymous_response_cached(self):
+        """Test repeated anonymous requests are served without queries"""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("public", response["Cache-Control"])
+        self.assertIn("s-maxage", response["Cache-Control"])
+        self.assertIn("Cookie", response["Vary"])
+
+        with self.assertNumQueries(0):
+            cached_response = self.client.get(self.url)
+
+        self.assertEqual(cached_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(cached_response.content, response.content)
+
+    def test_query_parameters_normalized(self):
+        """Test reordered query parameters share a cache entry"""
+        self.client.get(self.url + "?a=1&b=2")
+
+        with self.assertNumQueries(0):
+            self.client.get(self.url + "?b=2&a=1")
+
+    def test_renderers_cached_separately(self):
+        """Test a cached browsable API page is never served to JSON clients"""
+        url = reverse("concepts")
+        html_response = self.client.get(url, HTTP_ACCEPT="text/html")
+        self.assertTrue(html_response["Content-Type"].startswith("text/html"))
+        self.assertIn("Accept", html_response["Vary"])
+
+        response = self.client.get(url, HTTP_ACCEPT="application/json")
+        self.assertEqual(response["Content-Type"], "application/json")
+        response.json()
+
+        with self.assertNumQueries(0):
+            cached_response = self.client.get(url, HTTP_ACCEPT="text/html")
+        self.assertEqual(cached_response.content, html_response.content)
+
+    def test_cache_purged_on_save(self):
+        """Test saving content invalidates cached responses"""
+        self.client.get(self.url)
+        Course.objects.create(title="Deep Learning", description="Advanced")
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(len(response.json()), 2)
+
+    def test_authenticated_requests_bypass_cache(self):
+        """Test authenticated requests are not served from or stored in cache"""
+        self.client.get(self.url)
+        user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        access_token = str(RefreshToken.for_user(user).access_token)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access_token}")
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("private", response["Cache-Control"])
+
+
+class TaggedTests(APITestCase):
+    """Test cases for the denormalized tag names on tagged models"""
+
+    def setUp(self):
+        """Set up test data"""
+        user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        self.concept = Concept.objects.create(
+            title="Gradient Descent",
+            description="Long description",
+            one_liner_desc="Short description",
+            level="Easy",
+            preview_image_url="https://example.com/preview.png",
+            author=user,
+        )
+
+    def test_get_tags_list_without_queries(self):
+        """Test tags are read from the denormalized column"""
+        self.concept.set_tags_list(["optimization ", "calculus", "optimization"])
+        concept = Concept.objects.get(pk=self.concept.pk)
+
+        with self.assertNumQueries(0):
+            tags = concept.get_tags_list()
+
+        self.assertEqual(sorted(tags), ["calculus", "optimization"])
+        self.assertEqual(sorted(self.concept.get_tags_list()), sorted(tags))
+
+    def test_tag_names_follow_reverse_changes(self):
+        """Test tag names stay in sync when changed from the Tag side"""
+        tag = Tag.objects.create(name="optimization")
+        tag.concept_set.add(self.concept)
+        self.concept.refresh_from_db()
+        self.assertEqual(self.concept.get_tags_list(), ["optimization"])
+
+        tag.concept_set.clear()
+        self.concept.refresh_from_db()
+        self.assertEqual(self.concept.get_tags_list(), [])
+
+    def test_tag_names_follow_rename_and_delete(self):
+        """Test renaming or deleting a tag updates tagged rows"""
+        self.concept.set_tags_list(["optimization", "calculus"])
+        tag = Tag.objects.get(name="optimization")
+
+        updated_at = Concept.objects.get(pk=self.concept.pk).last_updated_timestamp
+        version = get_content_version(catalog_key("concepts"))
+        tag.name = "optimisation"
+        tag.save()
+        self.concept.refresh_from_db()
+        self.assertIn("optimisation", self.concept.get_tags_list())
+        # Cached responses and ETags showing the old name are invalidated
+        self.assertGreater(self.concept.last_updated_timestamp, updated_at)
+        self.assertNotEqual(get_content_version(catalog_key("concepts")), version)
+
+        tag.delete()
+        self.concept.refresh_from_db()
+        self.assertEqual(self.concept.get_tags_list(), ["calculus"])
+
+
+class TagCountTests(APITestCase):
+    """Test cases for the incrementally maintained tag facet counts"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        self.concepts = [
+            Concept.objects.create(
+                title=title,
+                description="Long description",
+                one_liner_desc="Short description",
+                level="Easy",
+                preview_image_url="https://example.com/preview.png",
+                author=self.user,
+            )
+            for title in ("Gradient Descent", "Backpropagation")
+        ]
+
+    def test_counts_follow_tag_changes(self):
+        """Test counts move with adds, removals, clears and deletes"""
+        first, second = self.concepts
+        first.set_tags_list(["optimization", "calculus"])
+        second.set_tags_list(["optimization"])
+        self.assertEqual(
+            TagCount.get_counts(Concept), {"optimization": 2, "calculus": 1}
+        )
+
+        first.set_tags_list(["calculus"])
+        self.assertEqual(
+            TagCount.get_counts(Concept), {"calculus": 1, "optimization": 1}
+        )
+
+        Tag.objects.get(name="calculus").concept_set.clear()
+        second.delete()
+        self.assertEqual(TagCount.get_counts(Concept), {})
+
+    def test_drifted_counts_do_not_block_tag_edits(self):
+        """Test removing a tag whose count already reached zero"""
+        first, _ = self.concepts
+        first.set_tags_list(["optimization"])
+        TagCount.objects.update(count=0)
+
+        first.set_tags_list([])
+
+        self.assertEqual(first.get_tags_list(), [])
+        self.assertEqual(TagCount.objects.get().count, 0)
+
+    def test_filtered_concepts_by_tags(self):
+        """Test tag filtering and facet counts in the filtered concepts list"""
+        first, second = self.concepts
+        first.set_tags_list(["optimization", "calculus"])
+        second.set_tags_list(["calculus"])
+
+        response = self.client.get(
+            reverse("filtered-concepts"), {"tags": "optimization,calculus"}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["total_items"], 2)
+        self.assertEqual(
+            response.data["tag_counts"], {"calculus": 2, "optimization": 1}
+        )
+
+
+class SluggedTests(APITestCase):
+    """Test cases for counter based unique slug allocation"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+
+    def make_concept(self, title, **kwargs):
+        return Concept(
+            title=title,
+            description="Long description",
+            one_liner_desc="Short description",
+            level="Easy",
+            preview_image_url="https://example.com/preview.png",
+            author=self.user,
+            **kwargs,
+        )
+
+    def test_duplicate_titles_get_suffixes(self):
+        """Test repeated titles are suffixed in order"""
+        slugs = []
+        for _ in range(3):
+            concept = self.make_concept("Gradient Descent")
+            concept.save()
+            slugs.append(concept.slug)
+
+        self.assertEqual(
+            slugs, ["gradient-descent", "gradient-descent-2", "gradient-descent-3"]
+        )
+
+    def test_allocate_single_round_trip(self):
+        """Test allocating a slug costs one query"""
+        SlugCounter.allocate(Concept, "warm-up")
+
+        with self.assertNumQueries(1):
+            slugs = SlugCounter.allocate(Concept, "warm-up", count=2)
+
+        self.assertEqual(slugs, ["warm-up-2", "warm-up-3"])
+
+    def test_resync_after_manual_slug(self):
+        """Test slugs written around the counter are skipped"""
+        self.make_concept("Manual", slug="gradient-descent").save()
+        self.make_concept("Manual", slug="gradient-descent-2").save()
+
+        concept = self.make_concept("Gradient Descent")
+        concept.save()
+
+        self.assertEqual(concept.slug, "gradient-descent-3")
+
+    def test_allocate_slugs_for_bulk_create(self):
+        """Test bulk slug assignment before bulk_create"""
+        self.make_concept("Gradient Descent").save()
+        concepts = [self.make_concept("Gradient Descent") for _ in range(2)]
+        concepts.append(self.make_concept("Backpropagation"))
+
+        Concept.allocate_slugs(concepts)
+        Concept.objects.bulk_create(concepts)
+
+        self.assertEqual(
+            [concept.slug for concept in concepts],
+            ["gradient-descent-2", "gradient-descent-3", "backpropagation"],
+        )
+
+
+class HashedMediaStorageTests(APITestCase):
+    """Test cases for content-hashed media storage and serving"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.media_root = TemporaryDirectory()
+        self.addCleanup(self.media_root.cleanup)
+        settings_override = self.settings(
+            MEDIA_ROOT=self.media_root.name,
+            MEDIA_ACCEL_REDIRECT_PREFIX="",
+            MEDIA_SENDFILE=False,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_names_are_content_hashed(self):
+        """Test saved files are named after their content and deduplicated"""
+        first = default_storage.save("photos/a.jpg", ContentFile(b"one"))
+        second = default_storage.save("photos/a.jpg", ContentFile(b"two"))
+        again = default_storage.save("photos/a.jpg", ContentFile(b"one"))
+
+        self.assertRegex(first, r"^photos/a\.[0-9a-f]{16}\.jpg$")
+        self.assertNotEqual(first, second)
+        self.assertEqual(first, again)
+        self.assertEqual(default_storage.save(first, ContentFile(b"one")), first)
+
+    def test_hashed_media_immutable(self):
+        """Test hashed files are served as immutable and revalidate by ETag"""
+        name = default_storage.save("photos/a.jpg", ContentFile(b"one"))
+        url = default_storage.url(name)
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(b"".join(response.streaming_content), b"one")
+        self.assertIn("immutable", response["Cache-Control"])
+        self.assertIn("max-age=31536000", response["Cache-Control"])
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_accel_redirect_offload(self):
+        """Test the body is left to the web server with X-Accel-Redirect"""
+        name = default_storage.save("photos/a.jpg", ContentFile(b"one"))
+
+        with self.settings(MEDIA_ACCEL_REDIRECT_PREFIX="/protected-media/"):
+            response = self.client.get(default_storage.url(name))
+
+        self.assertEqual(response["X-Accel-Redirect"], f"/protected-media/{name}")
+        self.assertEqual(response.content, b"")
+
+    def test_missing_and_unsafe_paths(self):
+        """Test missing files and paths outside MEDIA_ROOT are not served"""
+        self.assertEqual(
+            self.client.get("/media/photos/missing.jpg").status_code,
+            status.HTTP_404_NOT_FOUND,
+        )
+        self.assertEqual(
+            self.client.get("/media/../manage.py").status_code,
+            status.HTTP_404_NOT_FOUND,
+        )
+
+    def test_gc_media_removes_orphans(self):
+        """Test gc_media keeps referenced files and variants only"""
+        user = User.objects.create_user(username="testuser", email="t@example.com")
+        profile = Profile.objects.create(user=user)
+        profile.profile_photo.save("photo.jpg", ContentFile(b"photo"))
+        variant = default_storage.save("variants/photo_64.webp", ContentFile(b"v"))
+        profile.profile_photo_variants = {"64": {"webp": variant}}
+        profile.save()
+        orphan = default_storage.save("profile_photos/old.jpg", ContentFile(b"old"))
+
+        call_command("gc_media", min_age=0, stdout=StringIO())
+
+        self.assertFalse(default_storage.exists(orphan))
+        self.assertTrue(default_storage.exists(profile.profile_photo.name))
+        self.assertTrue(default_storage.exists(variant))
+        self.assertTrue(os.listdir(self.media_root.name))
+
+
+class FieldProjectionTests(APITestCase):
+    """Test cases for fields= / exclude= sparse fieldsets"""
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        Concept.objects.create(
+            title="Gradient Descent",
+            description="Long description",
+            one_liner_desc="Short description",
+            level="Easy",
+            preview_image_url="https://example.com/preview.png",
+            author=self.user,
+        )
+        ConceptBasedProblem.objects.create(
+            title="Linear Regression",
+            description="Long description",
+            level="easy",
+            author=self.user,
+        )
+        self.problems_url = reverse("public-problems-list")
+
+    def test_problem_list_fields(self):
+        """Test fields= narrows the problem list and the columns loaded"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                self.problems_url, {"problem_type": "concept", "fields": "id,title"}
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data["problems"][0]), {"id", "title"})
+        problem_queries = [
+            query["sql"]
+            for query in queries.captured_queries
+            if 'FROM "problems_conceptbasedproblem"' in query["sql"]
+        ]
+        self.assertTrue(problem_queries)
+        for sql in problem_queries:
+            self.assertNotIn('"description"', sql)
+
+        # Both problem tables are projected when no type is given
+        response = self.client.get(self.problems_url, {"fields": "title,level"})
+        self.assertEqual(
+            response.data["problems"], [{"title": "Linear Regression", "level": "easy"}]
+        )
+
+    def test_concept_list_exclude(self):
+        """Test exclude= drops fields and unknown names are rejected"""
+        response = self.client.get(reverse("concepts"), {"exclude": "tags,slug"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        concept = response.data["concepts"][0]
+        self.assertNotIn("tags", concept)
+        self.assertNotIn("slug", concept)
+        self.assertIn("title", concept)
+
+        response = self.client.get(reverse("concepts"), {"fields": "description"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -1,3 +1,6 @@
+from django.db.models import Exists, OuterRef
+
+
 def base_concrete_model(abstract, instance):
     """
     Used in methods of abstract models to find the super-most concrete
@@ -32,6 +35,20 @@ def base_concrete_model(abstract, instance):
     return instance.__class__
 
 
+def filter_by_tags(queryset, tag_names):
+    """
+    Restrict a queryset of a ``Tagged`` model to rows carrying any of
+    ``tag_names``. This is an EXISTS semi-join on the (indexed) through table,
+    so no DISTINCT is needed over the joined rows.
+    """
+    tags_field = queryset.model.tags.field
+    links = tags_field.remote_field.through.objects.filter(
+        **{tags_field.m2m_field_name(): OuterRef("pk")},
+        tag__name__in=tag_names,
+    )
+    return queryset.filter(Exists(links))
+
+
 def get_unique_slug(Model, slug, pk):
     i = 0
 
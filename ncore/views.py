@@ -1,3 +1,65 @@
-from django.shortcuts import render
+import mimetypes
+import os
 
-# Create your views here.
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from ncore.storage import HASHED_NAME_RE
+
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+
+
+def serve_media(request, path):
+    """
+    Serve a file from MEDIA_ROOT.
+
+    Content-hashed names (see ``ncore.storage.HashedMediaStorage``) are sent
+    with a year-long ``immutable`` Cache-Control and their hash as ETag; any
+    other file must be revalidated. With ``MEDIA_ACCEL_REDIRECT_PREFIX`` set
+    (nginx) or ``MEDIA_SENDFILE`` enabled (Apache/lighttpd) the body is left
+    to the web server.
+    """
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404("Invalid media path")
+    if not os.path.isfile(full_path):
+        raise Http404("Media file not found")
+
+    stat = os.stat(full_path)
+    match = HASHED_NAME_RE.search(path)
+    etag = quote_etag(match.group(1)) if match else None
+
+    response = get_conditional_response(
+        request, etag=etag, last_modified=int(stat.st_mtime)
+    )
+    if response is None:
+        content_type, encoding = mimetypes.guess_type(full_path)
+        content_type = content_type or "application/octet-stream"
+        if settings.MEDIA_ACCEL_REDIRECT_PREFIX:
+            response = HttpResponse(content_type=content_type)
+            response["X-Accel-Redirect"] = (
+                settings.MEDIA_ACCEL_REDIRECT_PREFIX.rstrip("/") + "/" + path
+            )
+        elif settings.MEDIA_SENDFILE:
+            response = HttpResponse(content_type=content_type)
+            response["X-Sendfile"] = full_path
+        else:
+            response = FileResponse(open(full_path, "rb"), content_type=content_type)
+            response["Content-Length"] = stat.st_size
+        if encoding:
+            response["Content-Encoding"] = encoding
+
+    if etag:
+        response["ETag"] = etag
+        patch_cache_control(
+            response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True
+        )
+    else:
+        patch_cache_control(response, public=True, no_cache=True)
+    response["Last-Modified"] = http_date(stat.st_mtime)
+    return response
@@ -2,6 +2,7 @@ import os
 from datetime import timedelta
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -46,6 +47,20 @@ MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 # Ensure media directory exists
 os.makedirs(MEDIA_ROOT, exist_ok=True)
 
+# Uploaded files get content-hashed names so they can be cached forever.
+# Static files keep Django's default storage.
+STORAGES = {
+    "default": {"BACKEND": "ncore.storage.HashedMediaStorage"},
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"
+    },
+}
+
+# Offload media bodies to the web server: an internal nginx location that
+# maps to MEDIA_ROOT (X-Accel-Redirect), or X-Sendfile for Apache/lighttpd.
+MEDIA_ACCEL_REDIRECT_PREFIX = os.getenv("MEDIA_ACCEL_REDIRECT_PREFIX", "")
+MEDIA_SENDFILE = os.getenv("MEDIA_SENDFILE", "False") == "True"
+
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 
@@ -92,6 +107,31 @@ DATABASES = {
     }
 }
 
+# Version counters behind ETags, cached responses, the token blacklist and
+# leaderboards live here, so every worker must share the backend. Outside
+# DEBUG the default is the database cache (manage.py createcachetable), and
+# the per-process LocMemCache is refused.
+LOCMEM_CACHE_BACKEND = "django.core.cache.backends.locmem.LocMemCache"
+DATABASE_CACHE_BACKEND = "django.core.cache.backends.db.DatabaseCache"
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", LOCMEM_CACHE_BACKEND if DEBUG else DATABASE_CACHE_BACKEND
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", "" if DEBUG else "django_cache"),
+    }
+}
+if not DEBUG and CACHES["default"]["BACKEND"] == LOCMEM_CACHE_BACKEND:
+    raise ImproperlyConfigured(
+        "LocMemCache is per process; set CACHE_BACKEND to a shared cache"
+    )
+
+# Anonymous catalog responses: seconds kept server side, by browsers and by
+# the CDN. Server-side entries are purged early whenever content is saved.
+PUBLIC_CACHE_TIMEOUT = int(os.getenv("PUBLIC_CACHE_TIMEOUT", 600))
+PUBLIC_CACHE_MAX_AGE = int(os.getenv("PUBLIC_CACHE_MAX_AGE", 60))
+PUBLIC_CACHE_CDN_MAX_AGE = int(os.getenv("PUBLIC_CACHE_CDN_MAX_AGE", 300))
+
 INSTALLED_APPS = [
     "neurocods",
     "django.contrib.admin",
@@ -122,6 +162,7 @@ MIDDLEWARE = [
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "accounts.middlewares.SwaggerAuthenticationMiddleware",
+    "ncore.middlewares.PublicResponseCacheMiddleware",
 ]
 
 STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
@@ -147,7 +188,7 @@ AUTH_PASSWORD_VALIDATORS = [
 # DRF and JWT Settings
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "accounts.authentication.JWTAuthentication",
         "rest_framework.authentication.SessionAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",),
@@ -167,8 +208,71 @@ SIMPLE_JWT = {
     "AUTH_COOKIE_SAMESITE": "Lax",
     "OUTSTANDING_TOKEN_MODEL": "rest_framework_simplejwt.token_blacklist.models.OutstandingToken",
     "BLACKLISTED_TOKEN_MODEL": "rest_framework_simplejwt.token_blacklist.models.BlacklistedToken",
+    "TOKEN_REFRESH_SERIALIZER": "accounts.serializers.TokenRefreshSerializer",
 }
 
+# reCAPTCHA verification (accounts.utils.verify_recaptcha_token). With
+# RECAPTCHA_FAIL_OPEN, logins are let through when Google cannot be reached.
+# Used tokens are remembered for RECAPTCHA_CACHE_TIMEOUT seconds (Google's token
+# lifetime) so that they cannot be replayed.
+RECAPTCHA_VERIFY_URL = os.getenv(
+    "RECAPTCHA_VERIFY_URL", "https://www.google.com/recaptcha/api/siteverify"
+)
+RECAPTCHA_TIMEOUT = float(os.getenv("RECAPTCHA_TIMEOUT", 3))
+RECAPTCHA_FAIL_OPEN = os.getenv("RECAPTCHA_FAIL_OPEN", "False") == "True"
+RECAPTCHA_CACHE_TIMEOUT = int(os.getenv("RECAPTCHA_CACHE_TIMEOUT", 120))
+RECAPTCHA_MAX_WORKERS = int(os.getenv("RECAPTCHA_MAX_WORKERS", 8))
+
+# Profile photo ingestion (accounts.utils.ingest_profile_photo): photos are
+# downloaded and resized in background threads into square-bounded variants.
+PROFILE_PHOTO_MAX_SIZE = int(os.getenv("PROFILE_PHOTO_MAX_SIZE", 2 * 1024 * 1024))
+PROFILE_PHOTO_VARIANT_SIZES = (64, 256)
+PROFILE_PHOTO_MAX_WORKERS = int(os.getenv("PROFILE_PHOTO_MAX_WORKERS", 2))
+
+# Cached header/user-detail data (accounts.projections); entries are also
+# dropped whenever the User or Profile is saved.
+PROFILE_PROJECTION_TIMEOUT = int(os.getenv("PROFILE_PROJECTION_TIMEOUT", 60 * 60))
+
+# Blacklist lookups (accounts.tokens.BlacklistIndex): how long a "not
+# blacklisted" answer may be served from the shared cache, and how many
+# blacklisted jtis each process keeps in memory.
+TOKEN_BLACKLIST_NEGATIVE_TTL = int(os.getenv("TOKEN_BLACKLIST_NEGATIVE_TTL", 60))
+TOKEN_BLACKLIST_LOCAL_SIZE = int(os.getenv("TOKEN_BLACKLIST_LOCAL_SIZE", 10000))
+
+# Dataset problem files (problems.datasets): relative paths are resolved
+# against DATASET_ROOT, parsed label columns are cached as .npy files under
+# DATASET_CACHE_DIR and each worker keeps up to DATASET_LOADED_MAX of them
+# memory-mapped. CSV files are indexed every DATASET_INDEX_STRIDE rows.
+DATASET_ROOT = os.getenv("DATASET_ROOT", os.path.join(BASE_DIR, "datasets"))
+DATASET_CACHE_DIR = os.getenv(
+    "DATASET_CACHE_DIR", os.path.join(BASE_DIR, "dataset_cache")
+)
+DATASET_INDEX_STRIDE = int(os.getenv("DATASET_INDEX_STRIDE", 10000))
+DATASET_LOADED_MAX = int(os.getenv("DATASET_LOADED_MAX", 16))
+
+# Chunked prediction file uploads (problems.uploads): files are assembled
+# under UPLOAD_ROOT from chunks of at most UPLOAD_CHUNK_MAX_SIZE bytes, and
+# sessions left open for UPLOAD_SESSION_TTL seconds are purged.
+UPLOAD_ROOT = os.getenv("UPLOAD_ROOT", os.path.join(BASE_DIR, "uploads"))
+UPLOAD_CHUNK_MAX_SIZE = int(os.getenv("UPLOAD_CHUNK_MAX_SIZE", 8 * 1024 * 1024))
+UPLOAD_SESSION_TTL = int(os.getenv("UPLOAD_SESSION_TTL", 24 * 60 * 60))
+
+# Dataset submission scoring (problems.evaluation): per-block metric
+# statistics over EVALUATION_BLOCK_ROWS test rows are cached for
+# EVALUATION_CACHE_TTL seconds; EVALUATION_PUBLIC_FRACTION of the test rows
+# form the public split.
+EVALUATION_BLOCK_ROWS = int(os.getenv("EVALUATION_BLOCK_ROWS", 65536))
+EVALUATION_CACHE_TTL = int(os.getenv("EVALUATION_CACHE_TTL", 7 * 24 * 60 * 60))
+EVALUATION_PUBLIC_FRACTION = float(os.getenv("EVALUATION_PUBLIC_FRACTION", 0.3))
+
+# Problem leaderboards (problems.leaderboards): how many per-problem ranked
+# lists each process keeps in memory.
+LEADERBOARD_LOCAL_SIZE = int(os.getenv("LEADERBOARD_LOCAL_SIZE", 64))
+
+# Global user ranking (accounts.rankings): score of each solved problem by
+# level. Run the rebuild_rankings command after changing them.
+RANKING_LEVEL_WEIGHTS = {"easy": 1, "medium": 3, "hard": 5}
+
 EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
 
 RUN_CODE_API_URL = os.getenv("RUN_CODE_API_URL")
@@ -1,13 +1,13 @@
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 from django.contrib.auth.decorators import login_required
 from neurocods.permissions import IsSuperUser
 from rest_framework.authentication import SessionAuthentication
-from django.conf.urls.static import static
 from django.http import JsonResponse
 from django.conf import settings
+from ncore.views import serve_media
 
 
 schema_view = get_schema_view(
@@ -41,6 +41,12 @@ urlpatterns = [
     path("concepts/", include(("concepts.urls"))),
 ]
 
-# Serve media files during development
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+# Media files; in production the web server does the sending (see
+# MEDIA_ACCEL_REDIRECT_PREFIX / MEDIA_SENDFILE)
+urlpatterns += [
+    re_path(
+        r"^%s(?P<path>.*)$" % settings.MEDIA_URL.lstrip("/"),
+        serve_media,
+        name="media",
+    ),
+]
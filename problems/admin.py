@@ -5,8 +5,12 @@ from problems.models import (
     ConceptBasedProblem,
     DailyContent,
     DatasetBasedProblem,
+    DatasetFile,
+    LeaderboardEntry,
     Note,
     Submission,
+    TestcaseSet,
+    UploadSession,
 )
 
 admin.site.register(DatasetBasedProblem)
@@ -15,3 +19,7 @@ admin.site.register(Submission)
 admin.site.register(DailyContent)
 admin.site.register(Note)
 admin.site.register(Comment)
+admin.site.register(TestcaseSet)
+admin.site.register(DatasetFile)
+admin.site.register(UploadSession)
+admin.site.register(LeaderboardEntry)
@@ -0,0 +1,280 @@
+"""
+Registry of the files behind dataset problems.
+
+Test data is a CSV file with a header row, or a ``.npy`` array; the label
+is the last column. Registering a file checksums it, records its row count,
+header and the byte offset of every ``DATASET_INDEX_STRIDE``-th row, and
+stores the label column of CSV files as a ``.npy`` file in
+``DATASET_CACHE_DIR`` named after the checksum. Workers memory-map those
+arrays once and share them between evaluations; ideal metrics JSON is parsed
+once into ``DatasetFile.metrics``.
+"""
+
+import csv
+import hashlib
+import json
+import mmap
+import os
+from functools import lru_cache
+
+import numpy as np
+from django.conf import settings
+from django.core.exceptions import ValidationError
+
+from problems.models import DatasetFile
+
+ROLE_PATH_FIELDS = {
+    DatasetFile.TEST_DATA: "test_data_file_path",
+    DatasetFile.USER_DATA: "data_available_to_user_file_path",
+    DatasetFile.IDEAL_METRICS: "ideal_metrics_json_file_path",
+}
+
+FILE_FORMATS = {".csv": "csv", ".npy": "npy", ".json": "json"}
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def resolve_path(path):
+    return os.path.join(settings.DATASET_ROOT, path)
+
+
+def label_cache_path(sha256):
+    return os.path.join(settings.DATASET_CACHE_DIR, f"{sha256}.labels.npy")
+
+
+def file_sha256(full_path):
+    digest = hashlib.sha256()
+    with open(full_path, "rb") as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def split_csv_line(line):
+    """Fields of one CSV line; the csv module is only used for quoted lines."""
+    line = line.rstrip(b"\r\n")
+    if b'"' not in line:
+        return line.split(b",")
+    return [field.encode() for field in next(csv.reader([line.decode()]))]
+
+
+def encode_labels(values):
+    """
+    Float array of raw label bytes. Non-numeric labels are replaced by their
+    position in the sorted list of classes, which is returned alongside.
+    """
+    raw = np.array(values, dtype=bytes)
+    try:
+        return raw.astype(np.float64), None
+    except ValueError:
+        classes, codes = np.unique(raw, return_inverse=True)
+        return codes.astype(np.float64), [label.decode() for label in classes]
+
+
+def save_array(path, array):
+    """Write ``array`` to ``path`` atomically, so readers never see half a file."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    with open(temporary_path, "wb") as file:
+        np.save(file, array)
+    os.replace(temporary_path, path)
+
+
+def scan_csv(full_path):
+    """
+    One streaming pass over a CSV file: checksum, header, row count, sparse
+    row index and the raw label column.
+    """
+    stride = settings.DATASET_INDEX_STRIDE
+    digest = hashlib.sha256()
+    offsets = []
+    labels = []
+    with open(full_path, "rb") as file:
+        header = file.readline()
+        digest.update(header)
+        columns = [field.decode().strip() for field in split_csv_line(header)]
+        if not any(columns):
+            raise ValidationError(f"{full_path} has no header row")
+        offset = len(header)
+        for row, line in enumerate(file):
+            digest.update(line)
+            if row % stride == 0:
+                offsets.append(offset)
+            offset += len(line)
+            fields = split_csv_line(line)
+            if len(fields) != len(columns):
+                raise ValidationError(
+                    f"{full_path} row {row + 1} has {len(fields)} columns, "
+                    f"expected {len(columns)}"
+                )
+            labels.append(fields[-1].strip())
+    if not labels:
+        raise ValidationError(f"{full_path} has no data rows")
+
+    values, classes = encode_labels(labels)
+    return {
+        "sha256": digest.hexdigest(),
+        "rows": len(labels),
+        "columns": columns,
+        "index": {"stride": stride, "offsets": offsets, "classes": classes},
+    }, values
+
+
+def scan_npy(full_path):
+    try:
+        array = np.load(full_path, mmap_mode="r")
+    except ValueError as error:
+        raise ValidationError(f"{full_path} is not a NumPy array: {error}")
+    if array.ndim not in (1, 2) or not array.shape[0]:
+        raise ValidationError(f"{full_path} must be a non-empty 1-D or 2-D array")
+    return {
+        "sha256": file_sha256(full_path),
+        "rows": array.shape[0],
+        "columns": [],
+        "index": {"dtype": array.dtype.str, "shape": list(array.shape)},
+    }
+
+
+def scan_json(full_path):
+    try:
+        with open(full_path, "rb") as file:
+            metrics = json.load(file)
+    except ValueError as error:
+        raise ValidationError(f"{full_path} is not valid JSON: {error}")
+    if not isinstance(metrics, dict):
+        raise ValidationError(f"{full_path} must hold a metric name to value object")
+    return {"sha256": file_sha256(full_path), "metrics": metrics}
+
+
+def register_file(problem, role, path):
+    """
+    Validate, checksum and index the ``role`` file of ``problem``. A file
+    whose path, size and mtime match its registry entry is not read again.
+    """
+    full_path = resolve_path(path)
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in FILE_FORMATS:
+        raise ValidationError(f"Unsupported dataset file type: {path}")
+    try:
+        stat = os.stat(full_path)
+    except OSError:
+        raise ValidationError(f"Dataset file not found: {path}")
+
+    registered = DatasetFile.objects.filter(problem=problem, role=role).first()
+    if (
+        registered is not None
+        and registered.path == path
+        and registered.size == stat.st_size
+        and registered.mtime == stat.st_mtime
+    ):
+        return registered
+
+    file_format = FILE_FORMATS[extension]
+    if file_format == "csv":
+        fields, labels = scan_csv(full_path)
+        cache_path = label_cache_path(fields["sha256"])
+        if role == DatasetFile.TEST_DATA and not os.path.exists(cache_path):
+            save_array(cache_path, labels)
+    elif file_format == "npy":
+        fields = scan_npy(full_path)
+    else:
+        fields = scan_json(full_path)
+
+    dataset_file, _ = DatasetFile.objects.update_or_create(
+        problem=problem,
+        role=role,
+        defaults={
+            "path": path,
+            "file_format": file_format,
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "rows": None,
+            "columns": [],
+            "index": {},
+            "metrics": None,
+            **fields,
+        },
+    )
+    return dataset_file
+
+
+def register_problem_files(problem):
+    """Register every file path set on ``problem`` and forget cleared ones."""
+    registered = {}
+    for role, field in ROLE_PATH_FIELDS.items():
+        path = getattr(problem, field)
+        if path:
+            registered[role] = register_file(problem, role, path)
+    DatasetFile.objects.filter(problem=problem).exclude(
+        role__in=list(registered)
+    ).delete()
+    return registered
+
+
+def get_dataset_file(problem, role):
+    """Registry entry of the ``role`` file of ``problem``, refreshed if stale."""
+    path = getattr(problem, ROLE_PATH_FIELDS[role])
+    if not path:
+        raise ValidationError(f"Problem {problem.pk} has no {role} file")
+    return register_file(problem, role, path)
+
+
+@lru_cache(maxsize=settings.DATASET_LOADED_MAX)
+def _load_labels(path, file_format, sha256):
+    if file_format == "csv":
+        cache_path = label_cache_path(sha256)
+        if not os.path.exists(cache_path):
+            # The cache directory is disposable: rebuild it from the source
+            fields, labels = scan_csv(resolve_path(path))
+            if fields["sha256"] != sha256:
+                raise ValidationError(f"Dataset file changed while loading: {path}")
+            save_array(cache_path, labels)
+        return np.load(cache_path, mmap_mode="r")
+    array = np.load(resolve_path(path), mmap_mode="r")
+    return array if array.ndim == 1 else array[:, -1]
+
+
+def load_labels(dataset_file):
+    """
+    Read-only, memory-mapped label column of a test data file. Arrays are
+    kept per worker and keyed by checksum, so a changed file is reloaded.
+    """
+    return _load_labels(
+        dataset_file.path, dataset_file.file_format, dataset_file.sha256
+    )
+
+
+def ideal_metrics(problem):
+    """Parsed ideal metrics of ``problem``, empty if it has none."""
+    if not problem.ideal_metrics_json_file_path:
+        return {}
+    return get_dataset_file(problem, DatasetFile.IDEAL_METRICS).metrics or {}
+
+
+def read_rows(dataset_file, start, count):
+    """
+    Rows ``start`` to ``start + count`` of a CSV file as lists of strings,
+    seeking through the row index instead of scanning from the top.
+    """
+    stride = dataset_file.index["stride"]
+    offsets = dataset_file.index["offsets"]
+    block = start // stride
+    if block >= len(offsets):
+        return []
+    with open(resolve_path(dataset_file.path), "rb") as file, mmap.mmap(
+        file.fileno(), 0, access=mmap.ACCESS_READ
+    ) as mapped:
+        position = offsets[block]
+        for _ in range(start - block * stride):
+            position = mapped.find(b"\n", position) + 1
+            if not position:
+                return []
+        rows = []
+        while len(rows) < count and position < len(mapped):
+            end = mapped.find(b"\n", position)
+            end = len(mapped) if end == -1 else end + 1
+            rows.append(
+                [field.decode() for field in split_csv_line(mapped[position:end])]
+            )
+            position = end
+    return rows
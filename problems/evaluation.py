@@ -0,0 +1,448 @@
+"""
+Scoring of dataset problem submissions.
+
+A prediction file is a CSV file with a header row whose last column holds
+one prediction per test row, in test file order. Labels are compared with
+the memory-mapped label column of the registered test data; every metric is
+computed with whole-array NumPy operations, so a file with millions of rows
+is scored in well under a second once parsed.
+
+Metrics are computed from additive sufficient statistics: a confusion
+matrix over the test label classes for classification metrics, and sums of
+errors for regression metrics. The test rows are cut into blocks of
+``EVALUATION_BLOCK_ROWS``; the statistics of each block are cached under the
+checksum of its predictions, so a resubmitted or lightly edited file only
+recomputes the blocks that changed, and the scores of an identical file
+come straight from the cache. A fixed, seeded ``EVALUATION_PUBLIC_FRACTION``
+of the test rows forms the public split and the rest the private split;
+both are scored from the same statistics.
+
+Binary metrics treat the larger label (``1``, or the last class name in
+sorted order) as the positive class; with more classes, precision, recall
+and F1 are macro-averaged over the test label classes. ``auc`` and
+``log_loss`` expect positive class probabilities. AUC depends on the
+ranking of all rows, so it has no per-block statistics and is computed
+from the arrays whenever a file's scores are not cached.
+"""
+
+import hashlib
+from functools import lru_cache
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+
+from problems import datasets
+from problems.models import DatasetFile
+
+EVALUATION_KEY_PREFIX = "evaluation"
+
+# Classification metrics need test labels with at most this many classes
+MAX_CLASSES = 1024
+
+PROBABILITY_EPSILON = 1e-15
+
+SPLITS = ("public", "private")
+
+# Per-metric fields of the evaluation sent to clients (see client_result)
+CLIENT_METRIC_FIELDS = ("public", "threshold", "ideal")
+
+
+def read_predictions(source, classes=None):
+    """
+    Last column of a prediction CSV file (a path or a binary file object)
+    as a float array. With ``classes``, the class names of the test labels,
+    names are replaced by their class code and unknown names by ``-1``.
+    """
+    try:
+        raw = np.loadtxt(
+            source,
+            dtype=bytes,
+            delimiter=",",
+            quotechar='"',
+            skiprows=1,
+            usecols=-1,
+            ndmin=1,
+        )
+    except ValueError as error:
+        raise ValidationError(f"Malformed prediction file: {error}")
+    return parse_labels(raw, classes)
+
+
+def parse_labels(raw, classes=None):
+    """Float array of raw prediction bytes, see ``read_predictions``."""
+    raw = np.char.strip(raw)
+    try:
+        return raw.astype(np.float64)
+    except ValueError:
+        if not classes:
+            raise ValidationError("Predictions must be numeric")
+    names = np.array(classes, dtype=bytes)
+    positions = np.minimum(np.searchsorted(names, raw), len(names) - 1)
+    return np.where(names[positions] == raw, positions, -1).astype(np.float64)
+
+
+class Reference:
+    """
+    Test labels of one test data file and what scoring derives from them:
+    the label classes (``None`` past ``MAX_CLASSES``) and the public split.
+    """
+
+    def __init__(self, sha256, labels, public_fraction):
+        self.sha256 = sha256
+        self.labels = labels
+        classes = np.unique(labels)
+        self.classes = classes if len(classes) <= MAX_CLASSES else None
+        generator = np.random.default_rng(int(sha256[:16], 16))
+        self.public = generator.random(len(labels)) < public_fraction
+        self.key = f"{sha256}:{public_fraction}"
+
+
+@lru_cache(maxsize=settings.DATASET_LOADED_MAX)
+def _reference(path, file_format, sha256, public_fraction):
+    dataset_file = DatasetFile(path=path, file_format=file_format, sha256=sha256)
+    return Reference(sha256, datasets.load_labels(dataset_file), public_fraction)
+
+
+def reference(test_data):
+    """``Reference`` of a test data file, kept per worker like its labels."""
+    return _reference(
+        test_data.path,
+        test_data.file_format,
+        test_data.sha256,
+        settings.EVALUATION_PUBLIC_FRACTION,
+    )
+
+
+def encode(classes, values):
+    """Index of each value in ``classes``; ``len(classes)`` if absent."""
+    positions = np.minimum(np.searchsorted(classes, values), len(classes) - 1)
+    return np.where(classes[positions] == values, positions, len(classes))
+
+
+def confusion_statistic(y_true, y_pred, classes):
+    """
+    Counts of (true class, predicted class) pairs; the extra last column
+    counts predictions that are not a test label class.
+    """
+    size = len(classes)
+    cells = encode(classes, y_true) * (size + 1) + encode(classes, y_pred)
+    counts = np.bincount(cells, minlength=size * (size + 1))
+    return counts.reshape(size, size + 1)
+
+
+def error_statistic(y_true, y_pred, classes):
+    """Row count, squared and absolute error sums, and label sums."""
+    error = y_pred - y_true
+    return np.array(
+        [
+            len(error),
+            np.dot(error, error),
+            np.abs(error).sum(),
+            y_true.sum(),
+            np.dot(y_true, y_true),
+        ]
+    )
+
+
+def log_loss_statistic(y_true, y_pred, classes):
+    """Row count and summed negative log likelihood."""
+    probability = np.clip(y_pred, PROBABILITY_EPSILON, 1 - PROBABILITY_EPSILON)
+    likelihood = np.where(y_true == classes[-1], probability, 1 - probability)
+    return np.array([len(likelihood), -np.log(likelihood).sum()])
+
+
+STATISTICS = {
+    "confusion": confusion_statistic,
+    "errors": error_statistic,
+    "log_loss": log_loss_statistic,
+}
+
+
+def class_scores(matrix):
+    """Precision, recall and F1 of every class of a confusion matrix."""
+    hits = np.diag(matrix).astype(np.float64)
+    actual = matrix.sum(axis=1)
+    predicted = matrix[:, :-1].sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return {
+            "precision": np.nan_to_num(hits / predicted),
+            "recall": np.nan_to_num(hits / actual),
+            "f1": np.nan_to_num(2 * hits / (actual + predicted)),
+        }
+
+
+def averaged(score):
+    def metric(statistics):
+        matrix = statistics["confusion"]
+        scores = class_scores(matrix)[score]
+        return float(scores[-1] if len(matrix) <= 2 else scores.mean())
+
+    metric.__name__ = score
+    return metric
+
+
+def accuracy(statistics):
+    matrix = statistics["confusion"]
+    return float(np.trace(matrix) / matrix.sum())
+
+
+def mse(statistics):
+    rows, squared, _, _, _ = statistics["errors"]
+    return float(squared / rows)
+
+
+def rmse(statistics):
+    return float(np.sqrt(mse(statistics)))
+
+
+def mae(statistics):
+    rows, _, absolute, _, _ = statistics["errors"]
+    return float(absolute / rows)
+
+
+def r2(statistics):
+    rows, squared, _, total, total_squared = statistics["errors"]
+    deviation = total_squared - total * total / rows
+    if deviation <= 0:
+        return 1.0 if not squared else 0.0
+    return float(1 - squared / deviation)
+
+
+def log_loss(statistics):
+    rows, loss = statistics["log_loss"]
+    return float(loss / rows)
+
+
+def average_ranks(values):
+    """1-based ranks of ``values``, ties sharing their average rank."""
+    order = np.argsort(values, kind="stable")
+    ordered = values[order]
+    first = np.empty(len(values), dtype=bool)
+    first[0] = True
+    np.not_equal(ordered[1:], ordered[:-1], out=first[1:])
+    starts = np.flatnonzero(first)
+    sizes = np.diff(np.append(starts, len(values)))
+    ranks = np.empty(len(values))
+    ranks[order] = np.repeat(starts + (sizes + 1) / 2, sizes)
+    return ranks
+
+
+def auc(y_true, y_pred, positive_label):
+    """Area under the ROC curve, from the rank sum of the positive rows."""
+    positive = y_true == positive_label
+    positives = np.count_nonzero(positive)
+    negatives = len(positive) - positives
+    if not positives or not negatives:
+        return None
+    rank_sum = average_ranks(y_pred)[positive].sum()
+    return float((rank_sum - positives * (positives + 1) / 2) / positives / negatives)
+
+
+# Metric name to the statistic it is computed from and its score function;
+# AUC is computed from the arrays
+METRICS = {
+    "accuracy": ("confusion", accuracy),
+    "precision": ("confusion", averaged("precision")),
+    "recall": ("confusion", averaged("recall")),
+    "f1": ("confusion", averaged("f1")),
+    "mse": ("errors", mse),
+    "rmse": ("errors", rmse),
+    "mae": ("errors", mae),
+    "r2": ("errors", r2),
+    "log_loss": ("log_loss", log_loss),
+    "auc": (None, None),
+}
+METRICS["f1_score"] = METRICS["f1"]
+METRICS["roc_auc"] = METRICS["auc"]
+
+# Metrics where a smaller score is better; the threshold is an upper bound
+LOWER_IS_BETTER = {"mse", "rmse", "mae", "log_loss"}
+
+
+def check_metrics(names, reference):
+    """The statistics ``names`` are computed from, if the labels allow them."""
+    unknown = set(names) - set(METRICS)
+    if unknown:
+        raise ValidationError(f"Unknown metrics: {', '.join(sorted(unknown))}")
+    groups = {METRICS[name][0] for name in names} - {None}
+    if groups - {"errors"} and reference.classes is None:
+        raise ValidationError(f"Test labels have more than {MAX_CLASSES} classes")
+    binary = {"log_loss", "auc", "roc_auc"} & set(names)
+    if binary and (reference.classes is None or len(reference.classes) != 2):
+        raise ValidationError(f"{', '.join(sorted(binary))} need two label classes")
+    return sorted(groups)
+
+
+def block_statistics(reference, groups, y_pred, start, stop):
+    """Statistics of rows ``start`` to ``stop`` for each split."""
+    y_true = reference.labels[start:stop]
+    predictions = y_pred[start:stop]
+    public = reference.public[start:stop]
+    return {
+        split: {
+            group: STATISTICS[group](y_true[rows], predictions[rows], reference.classes)
+            for group in groups
+        }
+        for split, rows in zip(SPLITS, (public, ~public))
+    }
+
+
+def split_scores(reference, names, y_pred, statistics):
+    """Scores of ``names`` on all rows and on each split."""
+    statistics = {
+        **statistics,
+        "all": {
+            group: statistics["public"][group] + statistics["private"][group]
+            for group in statistics["public"]
+        },
+    }
+    masks = {"all": slice(None), "public": reference.public}
+    masks["private"] = ~reference.public
+    public_rows = np.count_nonzero(reference.public)
+    counts = {
+        "all": len(reference.labels),
+        "public": public_rows,
+        "private": len(reference.labels) - public_rows,
+    }
+    scores = {}
+    for split, mask in masks.items():
+        scores[split] = {}
+        for name in names:
+            group, score = METRICS[name]
+            if not counts[split]:
+                scores[split][name] = None
+            elif group is None:
+                scores[split][name] = auc(
+                    reference.labels[mask], y_pred[mask], reference.classes[-1]
+                )
+            else:
+                scores[split][name] = score(statistics[split])
+    return scores
+
+
+def score_predictions(reference, names, y_pred):
+    """
+    Checksum of ``y_pred`` and its scores on ``names`` for all rows and for
+    each split, reusing cached file scores and block statistics.
+    """
+    groups = check_metrics(names, reference)
+    block_rows = settings.EVALUATION_BLOCK_ROWS
+    starts = range(0, len(y_pred), block_rows)
+    digests = [
+        hashlib.sha256(
+            np.ascontiguousarray(y_pred[start : start + block_rows])
+        ).hexdigest()
+        for start in starts
+    ]
+    sha256 = hashlib.sha256("".join(digests).encode()).hexdigest()
+
+    prefix = f"{EVALUATION_KEY_PREFIX}:{reference.key}:{block_rows}"
+    scores_key = f"{prefix}:{sha256}:{','.join(sorted(names))}"
+    scores = cache.get(scores_key)
+    if scores is not None:
+        return sha256, scores
+
+    keys = [f"{prefix}:{index}:{digest}" for index, digest in enumerate(digests)]
+    cached = cache.get_many(keys)
+    computed = {}
+    totals = {split: dict.fromkeys(groups, 0) for split in SPLITS}
+    for start, key in zip(starts, keys):
+        block = cached.get(key)
+        if block is None or not set(groups) <= set(block["public"]):
+            block = block_statistics(
+                reference, groups, y_pred, start, start + block_rows
+            )
+            computed[key] = block
+        for split in SPLITS:
+            for group in groups:
+                totals[split][group] = totals[split][group] + block[split][group]
+    cache.set_many(computed, timeout=settings.EVALUATION_CACHE_TTL)
+
+    scores = split_scores(reference, names, y_pred, totals)
+    cache.set(scores_key, scores, timeout=settings.EVALUATION_CACHE_TTL)
+    return sha256, scores
+
+
+def metric_score(name, y_true, y_pred):
+    """Score of one metric on two arrays, without splits or caching."""
+    group, function = METRICS[name]
+    classes = None if group == "errors" else np.unique(y_true)
+    if group is None:
+        return auc(y_true, y_pred, classes[-1])
+    return function({group: STATISTICS[group](y_true, y_pred, classes)})
+
+
+def passes(name, score, threshold):
+    if name in LOWER_IS_BETTER:
+        return score <= threshold
+    return score >= threshold
+
+
+def evaluate(problem, predictions):
+    """
+    Score ``predictions`` for ``problem`` on the metrics of its
+    ``evaluation_metrics_dict``. ``predictions`` is a prediction file (see
+    ``read_predictions``) or an array already parsed against the test labels.
+
+    Each metric passes when its score on all test rows reaches the
+    configured threshold, or the ideal metric when the threshold is null.
+    Returns the predictions checksum, the per-metric breakdown with public
+    and private split scores, and the ``Submission`` verdict: accepted when
+    every metric passes, wrong answer otherwise. Only the public scores are
+    for the client; see ``client_result``.
+    """
+    configured = problem.evaluation_metrics_dict or {}
+    if not configured:
+        raise ValidationError(f"Problem {problem.pk} has no evaluation metrics")
+    test_data = datasets.get_dataset_file(problem, DatasetFile.TEST_DATA)
+    test_reference = reference(test_data)
+    if isinstance(predictions, np.ndarray):
+        y_pred = predictions
+    else:
+        y_pred = read_predictions(predictions, test_data.index.get("classes"))
+    if len(y_pred) != len(test_reference.labels):
+        raise ValidationError(
+            f"Expected {len(test_reference.labels)} predictions, got {len(y_pred)}"
+        )
+
+    names = [name.lower() for name in configured]
+    sha256, scores = score_predictions(test_reference, names, y_pred)
+    ideal = datasets.ideal_metrics(problem)
+    metrics = {}
+    for name, key in zip(names, configured):
+        threshold = configured[key]
+        if threshold is None:
+            threshold = ideal.get(key)
+        if threshold is None:
+            raise ValidationError(f"Metric {key} has no threshold or ideal value")
+        metrics[key] = {
+            "score": scores["all"][name],
+            "public": scores["public"][name],
+            "private": scores["private"][name],
+            "threshold": threshold,
+            "ideal": ideal.get(key),
+            "passed": passes(name, scores["all"][name], threshold),
+        }
+
+    accepted = all(metric["passed"] for metric in metrics.values())
+    return {
+        "verdict": 3 if accepted else 4,
+        "rows": len(y_pred),
+        "sha256": sha256,
+        "metrics": metrics,
+    }
+
+
+def client_result(result):
+    """
+    ``result`` of ``evaluate`` as sent to the client. The score on all rows
+    and its pass flag are left out along with the private split score, as
+    either would give the private score away together with the public one.
+    """
+    metrics = {
+        key: {field: metric[field] for field in CLIENT_METRIC_FIELDS}
+        for key, metric in result["metrics"].items()
+    }
+    return {**result, "metrics": metrics}
@@ -1,6 +1,8 @@
 from django.db.models import Q
 from rest_framework import filters
 
+from ncore.utils import filter_by_tags
+
 from .models import ConceptBasedProblem, DatasetBasedProblem
 
 
@@ -10,18 +12,30 @@ class ProblemFilterBackend(filters.BaseFilterBackend):
     def filter_queryset(self, request, queryset, view=None):
         """Apply all filters to the queryset"""
         if queryset is None:
-            return self._filter_mixed_queryset(request, queryset)
+            return self._filter_mixed_queryset(request, queryset, view)
 
         queryset = self._apply_filters_to_queryset(request, queryset)
-        return queryset
+        return self._apply_projection(queryset, view)
+
+    def _apply_projection(self, queryset, view):
+        """Load only the columns of the fields the view's projection selects"""
+        projection = getattr(view, "projection", None)
+        if projection is None:
+            return queryset
+        # Ordering and the difficulty counts read these on every row
+        return projection.apply(queryset, "creation_timestamp", "level")
 
-    def _filter_mixed_queryset(self, request, _):
+    def _filter_mixed_queryset(self, request, _, view=None):
         """Handle filtering for mixed queryset (concept + dataset)"""
-        concept_qs = ConceptBasedProblem.objects.all()
-        dataset_qs = DatasetBasedProblem.objects.all()
+        concept_qs = ConceptBasedProblem.objects.for_list()
+        dataset_qs = DatasetBasedProblem.objects.for_list()
 
-        concept_filtered = self._apply_filters_to_queryset(request, concept_qs)
-        dataset_filtered = self._apply_filters_to_queryset(request, dataset_qs)
+        concept_filtered = self._apply_projection(
+            self._apply_filters_to_queryset(request, concept_qs), view
+        )
+        dataset_filtered = self._apply_projection(
+            self._apply_filters_to_queryset(request, dataset_qs), view
+        )
 
         all_problems = list(concept_filtered) + list(dataset_filtered)
         all_problems.sort(key=lambda x: x.creation_timestamp, reverse=True)
@@ -42,7 +56,7 @@ class ProblemFilterBackend(filters.BaseFilterBackend):
         tags = request.query_params.get("tags", "")
         if tags:
             tags_list = [tag.strip() for tag in tags.split(",")]
-            queryset = queryset.filter(tags__name__in=tags_list).distinct()
+            queryset = filter_by_tags(queryset, tags_list)
 
         course_slug = request.query_params.get("course_slug")
         if course_slug:
@@ -0,0 +1,186 @@
+"""
+Per-problem leaderboards over ``LeaderboardEntry``.
+
+Each process keeps the sorted rank keys of recently read leaderboards in
+memory, so a user's rank is a binary search and a page of the top entries a
+slice. A leaderboard is loaded with one query walking the rank index, and
+is tagged with a content version (``ncore.conditional``) that is bumped
+whenever a transaction changing an entry commits; a process whose copy is
+behind reloads it on the next read. The process that recorded the change
+updates its copy in place.
+"""
+
+import threading
+from bisect import bisect_left, insort
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import F
+
+from ncore.conditional import bump_content_version, get_content_version
+from problems.models import LeaderboardEntry, Submission
+
+
+def leaderboard_key(content_type_id, object_id):
+    """Version key of the leaderboard of one problem."""
+    return f"leaderboard:{content_type_id}:{object_id}"
+
+
+class Leaderboard:
+    """Rank keys of the entries of one problem, best first."""
+
+    def __init__(self, version, rows):
+        self.version = version
+        self.keys = []
+        self.user_keys = {}
+        for *key, user_id in rows:
+            key = tuple(key)
+            self.keys.append(key)
+            self.user_keys[user_id] = key
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __getitem__(self, index):
+        """Entry ids in rank order; slicing gives a page of them."""
+        if isinstance(index, slice):
+            return [key[-1] for key in self.keys[index]]
+        return self.keys[index][-1]
+
+    def rank(self, user_id):
+        """1-based rank of ``user_id``, ``None`` without an entry."""
+        key = self.user_keys.get(user_id)
+        if key is None:
+            return None
+        return bisect_left(self.keys, key) + 1
+
+    def update(self, entry):
+        old_key = self.user_keys.get(entry.user_id)
+        if old_key is not None:
+            del self.keys[bisect_left(self.keys, old_key)]
+        key = tuple(getattr(entry, field) for field in LeaderboardEntry.RANK_ORDER)
+        insort(self.keys, key)
+        self.user_keys[entry.user_id] = key
+
+
+class LeaderboardIndex:
+    """
+    Bounded per-process cache of ``Leaderboard`` objects, checked against
+    their shared version on every read.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.boards = OrderedDict()
+        self.lock = threading.Lock()
+
+    def clear_local(self):
+        with self.lock:
+            self.boards.clear()
+
+    def get(self, content_type_id, object_id):
+        key = (content_type_id, object_id)
+        version = get_content_version(leaderboard_key(*key))
+        with self.lock:
+            board = self.boards.get(key)
+            if board is not None and board.version == version:
+                self.boards.move_to_end(key)
+                return board
+
+        rows = (
+            LeaderboardEntry.objects.filter(
+                content_type_id=content_type_id, object_id=object_id
+            )
+            .order_by(*LeaderboardEntry.RANK_ORDER)
+            .values_list(*LeaderboardEntry.RANK_ORDER, "user_id")
+        )
+        board = Leaderboard(version, rows)
+        with self.lock:
+            self.boards[key] = board
+            self.boards.move_to_end(key)
+            while len(self.boards) > self.max_size:
+                self.boards.popitem(last=False)
+        return board
+
+    def for_problem(self, problem):
+        content_type = ContentType.objects.get_for_model(problem)
+        return self.get(content_type.id, problem.id)
+
+    def changed(self, entry):
+        """
+        Publish a changed ``entry`` once the current transaction commits.
+        Bumped any earlier, the version could be read by a process that then
+        loads the leaderboard without the entry and keeps it as current.
+        """
+        transaction.on_commit(lambda: self.publish(entry))
+
+    def publish(self, entry):
+        """Bump the leaderboard version of ``entry``, updating the local copy."""
+        key = (entry.content_type_id, entry.object_id)
+        bump_content_version(leaderboard_key(*key))
+        version = get_content_version(leaderboard_key(*key))
+        with self.lock:
+            board = self.boards.get(key)
+            if board is not None and board.version + 1 == version:
+                board.update(entry)
+                board.version = version
+
+    def record(self, submission):
+        """Rank an accepted ``submission`` if it is its user's best."""
+        entry = LeaderboardEntry.record(submission)
+        if entry is not None:
+            self.changed(entry)
+        return entry
+
+    def forget(self, submission):
+        """
+        Rank the next best accepted submission of the user of a deleted
+        ``submission`` if the deleted one was their entry.
+        """
+        owner = {
+            "content_type_id": submission.content_type_id,
+            "object_id": submission.object_id,
+            "user_id": submission.user_id,
+        }
+        if LeaderboardEntry.objects.filter(**owner).exists():
+            return
+        next_best = (
+            Submission.objects.filter(verdict=3, **owner)
+            .order_by(
+                F("time_taken").asc(nulls_first=True),
+                F("memory_taken").asc(nulls_first=True),
+                "created_timestamp",
+            )
+            .first()
+        )
+        if next_best is not None:
+            self.record(next_best)
+        else:
+            key = leaderboard_key(submission.content_type_id, submission.object_id)
+            transaction.on_commit(lambda: bump_content_version(key))
+
+
+leaderboard_index = LeaderboardIndex(settings.LEADERBOARD_LOCAL_SIZE)
+
+
+def leaderboard_page(entry_ids, start_rank):
+    """Rows of a page of leaderboard entries, ranked from ``start_rank``."""
+    entries = LeaderboardEntry.objects.filter(pk__in=entry_ids).select_related("user")
+    by_id = {entry.pk: entry for entry in entries}
+    return [
+        leaderboard_row(by_id[entry_id], rank)
+        for rank, entry_id in enumerate(entry_ids, start_rank)
+        if entry_id in by_id
+    ]
+
+
+def leaderboard_row(entry, rank):
+    return {
+        "rank": rank,
+        "username": entry.user.username,
+        "time_taken": entry.time_taken,
+        "memory_taken": entry.memory_taken,
+        "achieved_at": entry.achieved_at,
+    }
@@ -0,0 +1,120 @@
+import hashlib
+import os
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from problems.evaluation import (
+    Reference,
+    metric_score,
+    read_predictions,
+    score_predictions,
+)
+
+CLASSIFICATION_METRICS = ["accuracy", "precision", "recall", "f1"]
+BINARY_METRICS = ["auc", "log_loss"]
+REGRESSION_METRICS = ["mse", "rmse", "mae", "r2"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Time prediction file parsing, every evaluation metric and cached "
+        "rescoring of resubmitted files on synthetic labels"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            type=int,
+            default=1_000_000,
+            help="Rows in the synthetic test set (default: 1000000)",
+        )
+        parser.add_argument(
+            "--classes",
+            type=int,
+            default=2,
+            help="Classes of the classification labels (default: 2)",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=3,
+            help="Runs per measurement; the fastest is reported (default: 3)",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rows = options["rows"]
+        repeat = options["repeat"]
+        generator = np.random.default_rng(options["seed"])
+
+        labels = generator.integers(0, options["classes"], rows).astype(np.float64)
+        noise = generator.random(rows) < 0.1
+        predicted = np.where(noise, (labels + 1) % options["classes"], labels)
+        binary = (labels == labels.max()).astype(np.float64)
+        scores = np.clip(binary * 0.6 + generator.random(rows) * 0.4, 0, 1)
+        values = generator.normal(size=rows)
+        estimates = values + generator.normal(scale=0.1, size=rows)
+
+        self.stdout.write(f"{rows} rows, best of {repeat} runs")
+        with TemporaryDirectory() as directory:
+            path = os.path.join(directory, "predictions.csv")
+            with open(path, "w") as file:
+                file.write("id,label\n")
+                file.writelines(
+                    f"{row},{int(label)}\n" for row, label in enumerate(predicted)
+                )
+            size = os.path.getsize(path) / 1024 / 1024
+            self.report(
+                f"read_predictions ({size:.1f} MiB)", repeat, read_predictions, path
+            )
+
+        for name in CLASSIFICATION_METRICS:
+            self.report(name, repeat, metric_score, name, labels, predicted)
+        for name in BINARY_METRICS:
+            self.report(name, repeat, metric_score, name, binary, scores)
+        for name in REGRESSION_METRICS:
+            self.report(name, repeat, metric_score, name, values, estimates)
+
+        # A reference no earlier run has cached statistics for
+        reference = Reference(
+            hashlib.sha256(os.urandom(16)).hexdigest(),
+            labels,
+            settings.EVALUATION_PUBLIC_FRACTION,
+        )
+        self.stdout.write(f"Scoring {', '.join(CLASSIFICATION_METRICS)} with splits")
+        self.report(
+            "first submission",
+            1,
+            score_predictions,
+            reference,
+            CLASSIFICATION_METRICS,
+            predicted,
+        )
+        self.report(
+            "identical resubmission",
+            repeat,
+            score_predictions,
+            reference,
+            CLASSIFICATION_METRICS,
+            predicted,
+        )
+
+        def edited():
+            resubmitted = predicted.copy()
+            row = generator.integers(rows)
+            resubmitted[row] = (resubmitted[row] + 1) % options["classes"]
+            score_predictions(reference, CLASSIFICATION_METRICS, resubmitted)
+
+        self.report("resubmission with one row changed", repeat, edited)
+
+    def report(self, name, repeat, function, *args):
+        timings = []
+        for _ in range(repeat):
+            start = perf_counter()
+            function(*args)
+            timings.append(perf_counter() - start)
+        self.stdout.write(f"{name:<32} {min(timings) * 1000:>10.1f} ms")
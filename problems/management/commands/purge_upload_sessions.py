@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from problems.models import UploadSession
+from problems.uploads import remove_files
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired prediction uploads that were never completed, with "
+        "their files. Meant to be run periodically (e.g. from cron)."
+    )
+
+    def handle(self, *args, **options):
+        expired = UploadSession.objects.filter(expires_at__lte=timezone.now()).exclude(
+            status=UploadSession.COMPLETE
+        )
+        purged = 0
+        for session in expired.only("id").iterator():
+            remove_files(session)
+            session.delete()
+            purged += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Purged {purged} expired uploads"))
@@ -0,0 +1,28 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand
+
+from problems.datasets import register_problem_files
+from problems.models import DatasetBasedProblem
+
+
+class Command(BaseCommand):
+    help = (
+        "Validate, checksum and index the files of every dataset problem, "
+        "re-reading only files that changed since they were registered"
+    )
+
+    def handle(self, *args, **kwargs):
+        problems = DatasetBasedProblem.objects.only(
+            "id",
+            "test_data_file_path",
+            "data_available_to_user_file_path",
+            "ideal_metrics_json_file_path",
+        )
+        registered = 0
+        for problem in problems.iterator():
+            try:
+                registered += len(register_problem_files(problem))
+            except ValidationError as e:
+                self.stderr.write(f"Problem {problem.pk}: {'; '.join(e.messages)}")
+
+        self.stdout.write(self.style.SUCCESS(f"Registered {registered} dataset files"))
@@ -0,0 +1,36 @@
+from django.db import models
+
+
+class ProblemQuerySet(models.QuerySet):
+    """
+    Querysets for the problem tables that leave out the large text and JSON
+    columns (``Model.HEAVY_FIELDS``) a use case does not read.
+
+    A deferred column is still loaded on access, with one query per row, so
+    pick the queryset that matches what the caller reads.
+    """
+
+    def lean(self, *keep):
+        """Defer every heavy column except the ``keep`` ones."""
+        return self.defer(
+            *(name for name in self.model.HEAVY_FIELDS if name not in keep)
+        )
+
+    def for_list(self):
+        """Tables, counters and generic relation lookups."""
+        return self.lean()
+
+    def for_detail(self):
+        """The problem statement page."""
+        return self.lean("description")
+
+    def for_judge(self):
+        """
+        Running and judging code. Submission testcases are read from
+        ``TestcaseSet``, not from the problem row.
+        """
+        return self.lean(
+            "ideal_solution_code",
+            "validation_testcases",
+            "evaluation_metrics_dict",
+        )
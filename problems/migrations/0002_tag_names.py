@@ -0,0 +1,42 @@
+# Generated by Django 5.1.2 on 2026-10-19 10:13
+
+from django.db import migrations, models
+
+
+def backfill_tag_names(apps, schema_editor):
+    for model_name in ("ConceptBasedProblem", "DatasetBasedProblem"):
+        model = apps.get_model("problems", model_name)
+        through = model.tags.through
+        owner_field = model.tags.field.m2m_field_name()
+        tag_names = {}
+        rows = through.objects.order_by("pk").values_list(
+            f"{owner_field}_id", "tag__name"
+        )
+        for owner_id, name in rows:
+            tag_names.setdefault(owner_id, []).append(name)
+        model.objects.bulk_update(
+            [model(pk=pk, tag_names=names) for pk, names in tag_names.items()],
+            ["tag_names"],
+            batch_size=500,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("problems", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="conceptbasedproblem",
+            name="tag_names",
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.AddField(
+            model_name="datasetbasedproblem",
+            name="tag_names",
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.RunPython(backfill_tag_names, migrations.RunPython.noop),
+    ]
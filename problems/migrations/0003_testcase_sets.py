@@ -0,0 +1,105 @@
+# Generated by Django 5.1.2 on 2026-10-19 10:51
+
+import gzip
+import hashlib
+import json
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_testcase_sets(apps, schema_editor):
+    ConceptBasedProblem = apps.get_model("problems", "ConceptBasedProblem")
+    TestcaseBlob = apps.get_model("problems", "TestcaseBlob")
+    TestcaseSet = apps.get_model("problems", "TestcaseSet")
+
+    problems = ConceptBasedProblem.objects.only("id", "submission_testcases")
+    for problem in problems.iterator():
+        testcases = list(problem.submission_testcases or [])
+        lines = b"".join(
+            json.dumps(testcase, sort_keys=True, separators=(",", ":")).encode() + b"\n"
+            for testcase in testcases
+        )
+        digest = hashlib.sha256(lines).hexdigest()
+        if not TestcaseBlob.objects.filter(sha256=digest).exists():
+            TestcaseBlob.objects.create(
+                sha256=digest,
+                data=gzip.compress(lines, mtime=0),
+                count=len(testcases),
+                size=len(lines),
+            )
+        TestcaseSet.objects.create(problem=problem, version=1, blob_id=digest)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("problems", "0002_tag_names"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TestcaseBlob",
+            fields=[
+                (
+                    "sha256",
+                    models.CharField(max_length=64, primary_key=True, serialize=False),
+                ),
+                ("data", models.BinaryField()),
+                ("count", models.PositiveIntegerField()),
+                (
+                    "size",
+                    models.PositiveIntegerField(help_text="Uncompressed size in bytes"),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="TestcaseSet",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("version", models.PositiveIntegerField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "blob",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        to="problems.testcaseblob",
+                    ),
+                ),
+                (
+                    "problem",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="testcase_sets",
+                        to="problems.conceptbasedproblem",
+                    ),
+                ),
+            ],
+            options={
+                "get_latest_by": "version",
+                "unique_together": {("problem", "version")},
+            },
+        ),
+        migrations.AddField(
+            model_name="submission",
+            name="testcase_set",
+            field=models.ForeignKey(
+                blank=True,
+                help_text="Testcase set version the submission was judged against",
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="submissions",
+                to="problems.testcaseset",
+            ),
+        ),
+        migrations.RunPython(backfill_testcase_sets, migrations.RunPython.noop),
+    ]
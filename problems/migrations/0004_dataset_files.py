@@ -0,0 +1,73 @@
+# Generated by Django 5.1.2 on 2026-10-19 10:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("problems", "0003_testcase_sets"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DatasetFile",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "role",
+                    models.CharField(
+                        choices=[
+                            ("test_data", "Test data"),
+                            ("user_data", "Data available to user"),
+                            ("ideal_metrics", "Ideal metrics"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("path", models.CharField(max_length=500)),
+                (
+                    "file_format",
+                    models.CharField(
+                        choices=[("csv", "CSV"), ("npy", "NumPy"), ("json", "JSON")],
+                        max_length=10,
+                    ),
+                ),
+                ("sha256", models.CharField(max_length=64)),
+                ("size", models.PositiveBigIntegerField()),
+                ("mtime", models.FloatField()),
+                ("rows", models.PositiveBigIntegerField(blank=True, null=True)),
+                ("columns", models.JSONField(blank=True, default=list)),
+                (
+                    "index",
+                    models.JSONField(
+                        blank=True,
+                        default=dict,
+                        help_text="Byte offsets of every stride-th row and label classes",
+                    ),
+                ),
+                ("metrics", models.JSONField(blank=True, null=True)),
+                ("validated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "problem",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="dataset_files",
+                        to="problems.datasetbasedproblem",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("problem", "role")},
+            },
+        ),
+    ]
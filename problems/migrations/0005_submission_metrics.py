@@ -0,0 +1,22 @@
+# Generated by Django 5.1.2 on 2026-10-19 10:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("problems", "0004_dataset_files"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="submission",
+            name="metrics",
+            field=models.JSONField(
+                blank=True,
+                help_text="Per-metric scores of a dataset problem submission",
+                null=True,
+            ),
+        ),
+    ]
@@ -0,0 +1,102 @@
+# Generated by Django 5.1.2 on 2026-10-19 11:02
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("problems", "0005_submission_metrics"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UploadSession",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("open", "Open"),
+                            ("complete", "Complete"),
+                            ("failed", "Failed"),
+                        ],
+                        default="open",
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "size",
+                    models.PositiveBigIntegerField(
+                        default=0, help_text="Bytes received"
+                    ),
+                ),
+                (
+                    "rows",
+                    models.PositiveBigIntegerField(
+                        default=0, help_text="Data rows parsed"
+                    ),
+                ),
+                ("expected_rows", models.PositiveBigIntegerField()),
+                ("columns", models.JSONField(blank=True, default=list)),
+                ("classes", models.JSONField(blank=True, null=True)),
+                (
+                    "pending",
+                    models.BinaryField(
+                        default=b"",
+                        help_text="Unterminated last line of the received bytes",
+                    ),
+                ),
+                (
+                    "chunks",
+                    models.JSONField(
+                        blank=True,
+                        default=list,
+                        help_text="[offset, size, sha256] of each chunk",
+                    ),
+                ),
+                ("error", models.TextField(blank=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("expires_at", models.DateTimeField()),
+                (
+                    "problem",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="upload_sessions",
+                        to="problems.datasetbasedproblem",
+                    ),
+                ),
+                (
+                    "submission",
+                    models.OneToOneField(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to="problems.submission",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="upload_sessions",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+    ]
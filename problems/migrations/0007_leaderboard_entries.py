@@ -0,0 +1,116 @@
+# Generated by Django 5.1.2 on 2026-10-19 11:11
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_leaderboard_entries(apps, schema_editor):
+    Submission = apps.get_model("problems", "Submission")
+    LeaderboardEntry = apps.get_model("problems", "LeaderboardEntry")
+
+    best = {}
+    accepted = Submission.objects.filter(verdict=3).values(
+        "id",
+        "content_type_id",
+        "object_id",
+        "user_id",
+        "time_taken",
+        "memory_taken",
+        "created_timestamp",
+    )
+    for row in accepted.iterator():
+        group = (row["content_type_id"], row["object_id"], row["user_id"])
+        key = (
+            row["time_taken"] or 0,
+            row["memory_taken"] or 0,
+            row["created_timestamp"],
+        )
+        if group not in best or key < best[group][0]:
+            best[group] = (key, row["id"])
+
+    LeaderboardEntry.objects.bulk_create(
+        [
+            LeaderboardEntry(
+                content_type_id=content_type_id,
+                object_id=object_id,
+                user_id=user_id,
+                submission_id=pk,
+                time_taken=key[0],
+                memory_taken=key[1],
+                achieved_at=key[2],
+            )
+            for (content_type_id, object_id, user_id), (key, pk) in best.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("problems", "0006_upload_sessions"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LeaderboardEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("object_id", models.PositiveIntegerField()),
+                ("time_taken", models.FloatField(default=0)),
+                ("memory_taken", models.FloatField(default=0)),
+                ("achieved_at", models.DateTimeField()),
+                (
+                    "content_type",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="contenttypes.contenttype",
+                    ),
+                ),
+                (
+                    "submission",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="problems.submission",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="leaderboard_entries",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=[
+                            "content_type",
+                            "object_id",
+                            "time_taken",
+                            "memory_taken",
+                            "achieved_at",
+                            "id",
+                        ],
+                        name="leaderboard_rank_idx",
+                    )
+                ],
+                "unique_together": {("content_type", "object_id", "user")},
+            },
+        ),
+        migrations.RunPython(backfill_leaderboard_entries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.1.2 on 2026-10-19 11:35
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_entry_credit(apps, schema_editor):
+    ContentType = apps.get_model("contenttypes", "ContentType")
+    LeaderboardEntry = apps.get_model("problems", "LeaderboardEntry")
+
+    for model_name in ("conceptbasedproblem", "datasetbasedproblem"):
+        content_type = ContentType.objects.filter(
+            app_label="problems", model=model_name
+        ).first()
+        if content_type is None:
+            continue
+        problems = apps.get_model("problems", model_name).objects
+        for level, weight in settings.RANKING_LEVEL_WEIGHTS.items():
+            LeaderboardEntry.objects.filter(
+                content_type=content_type,
+                object_id__in=problems.filter(level=level).values("id"),
+            ).update(level=level, weight=weight)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("problems", "0007_leaderboard_entries"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="leaderboardentry",
+            name="level",
+            field=models.CharField(blank=True, max_length=10),
+        ),
+        migrations.AddField(
+            model_name="leaderboardentry",
+            name="weight",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_entry_credit, migrations.RunPython.noop),
+    ]
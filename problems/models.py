@@ -1,11 +1,18 @@
+import gzip
+import hashlib
+import json
+import uuid
+from io import BytesIO
+
 from django.contrib.auth.models import User
 from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
 
 from concepts.models import Concept
 from courses.models import Course
 from ncore.models import GenericRelation, Slugged, Tagged
+from problems.managers import ProblemQuerySet
 
 
 class BaseProblem(Tagged, Slugged, models.Model):
@@ -34,6 +41,12 @@ class BaseProblem(Tagged, Slugged, models.Model):
         Course, on_delete=models.SET_NULL, null=True, blank=True
     )
 
+    # Large columns left out by ``ProblemQuerySet`` unless a use case needs them
+    HEAVY_FIELDS = ("description", "editorial_description")
+    tag_catalog = "problems"
+
+    objects = ProblemQuerySet.as_manager()
+
     @property
     def acceptance_rate(self):
         if self.accepted_submissions == 0:
@@ -52,6 +65,8 @@ class DatasetBasedProblem(BaseProblem):
         max_length=500, null=True, blank=True
     )
 
+    HEAVY_FIELDS = BaseProblem.HEAVY_FIELDS + ("evaluation_metrics_dict",)
+
 
 class ConceptBasedProblem(BaseProblem):
     code_editor_template = models.TextField(null=True, blank=True)
@@ -59,6 +74,172 @@ class ConceptBasedProblem(BaseProblem):
     validation_testcases = models.JSONField(null=True, blank=True)
     submission_testcases = models.JSONField(null=True, blank=True)
 
+    HEAVY_FIELDS = BaseProblem.HEAVY_FIELDS + (
+        "code_editor_template",
+        "ideal_solution_code",
+        "validation_testcases",
+        "submission_testcases",
+    )
+
+
+class TestcaseBlob(models.Model):
+    """
+    Gzip compressed JSON-lines encoding of a list of testcases, stored once
+    per distinct content and keyed by the SHA-256 of the uncompressed lines.
+    """
+
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    data = models.BinaryField()
+    count = models.PositiveIntegerField()
+    size = models.PositiveIntegerField(help_text="Uncompressed size in bytes")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    @staticmethod
+    def encode(testcases):
+        """JSON-lines bytes of ``testcases`` and their SHA-256 hex digest."""
+        lines = b"".join(
+            json.dumps(testcase, sort_keys=True, separators=(",", ":")).encode() + b"\n"
+            for testcase in testcases
+        )
+        return lines, hashlib.sha256(lines).hexdigest()
+
+    @classmethod
+    def store(cls, testcases):
+        """Blob holding ``testcases``, reusing an existing one with equal content."""
+        testcases = list(testcases or [])
+        lines, digest = cls.encode(testcases)
+        blob = cls.objects.filter(sha256=digest).defer("data").first()
+        if blob is None:
+            cls.objects.bulk_create(
+                [
+                    cls(
+                        sha256=digest,
+                        data=gzip.compress(lines, mtime=0),
+                        count=len(testcases),
+                        size=len(lines),
+                    )
+                ],
+                ignore_conflicts=True,
+            )
+            blob = cls.objects.defer("data").get(sha256=digest)
+        return blob
+
+    def iter_testcases(self):
+        """
+        Yield the testcases one at a time, decompressing as it goes, so the
+        whole set is never held decoded in memory.
+        """
+        with gzip.GzipFile(fileobj=BytesIO(self.data)) as lines:
+            for line in lines:
+                yield json.loads(line)
+
+
+class TestcaseSet(models.Model):
+    """
+    Version ``version`` of a problem's submission testcases. A new version is
+    recorded whenever ``submission_testcases`` changes; submissions keep the
+    version they were judged against.
+    """
+
+    problem = models.ForeignKey(
+        ConceptBasedProblem, on_delete=models.CASCADE, related_name="testcase_sets"
+    )
+    version = models.PositiveIntegerField()
+    blob = models.ForeignKey(TestcaseBlob, on_delete=models.PROTECT)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ("problem", "version")
+        get_latest_by = "version"
+
+    def __str__(self):
+        return f"{self.problem_id} v{self.version}"
+
+    @classmethod
+    def record(cls, problem, testcases):
+        """
+        Make ``testcases`` the current set of ``problem``, adding a version
+        only when the content differs from the current one.
+        """
+        blob = TestcaseBlob.store(testcases)
+        with transaction.atomic():
+            # Serialize version allocation per problem
+            list(
+                ConceptBasedProblem.objects.select_for_update()
+                .filter(pk=problem.pk)
+                .values_list("pk")
+            )
+            current = cls.objects.filter(problem=problem).order_by("-version").first()
+            if current is not None and current.blob_id == blob.pk:
+                return current
+            return cls.objects.create(
+                problem=problem,
+                version=current.version + 1 if current else 1,
+                blob=blob,
+            )
+
+    @classmethod
+    def current(cls, problem):
+        """Latest set of ``problem``, recorded from the problem row if missing."""
+        testcase_set = (
+            cls.objects.filter(problem=problem)
+            .select_related("blob")
+            .order_by("-version")
+            .first()
+        )
+        if testcase_set is None:
+            recorded = cls.record(problem, problem.submission_testcases)
+            testcase_set = cls.objects.select_related("blob").get(pk=recorded.pk)
+        return testcase_set
+
+
+class DatasetFile(models.Model):
+    """
+    Registry entry for one file of a dataset problem: its checksum, shape
+    and a sparse row index. Entries are built and refreshed by
+    ``problems.datasets``; ``size`` and ``mtime`` tell when the file on disk
+    no longer matches the entry.
+    """
+
+    TEST_DATA = "test_data"
+    USER_DATA = "user_data"
+    IDEAL_METRICS = "ideal_metrics"
+    ROLE_CHOICES = [
+        (TEST_DATA, "Test data"),
+        (USER_DATA, "Data available to user"),
+        (IDEAL_METRICS, "Ideal metrics"),
+    ]
+    FORMAT_CHOICES = [
+        ("csv", "CSV"),
+        ("npy", "NumPy"),
+        ("json", "JSON"),
+    ]
+
+    problem = models.ForeignKey(
+        DatasetBasedProblem, on_delete=models.CASCADE, related_name="dataset_files"
+    )
+    role = models.CharField(max_length=20, choices=ROLE_CHOICES)
+    path = models.CharField(max_length=500)
+    file_format = models.CharField(max_length=10, choices=FORMAT_CHOICES)
+    sha256 = models.CharField(max_length=64)
+    size = models.PositiveBigIntegerField()
+    mtime = models.FloatField()
+    rows = models.PositiveBigIntegerField(null=True, blank=True)
+    columns = models.JSONField(default=list, blank=True)
+    index = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Byte offsets of every stride-th row and label classes",
+    )
+    metrics = models.JSONField(null=True, blank=True)
+    validated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("problem", "role")
+
+    def __str__(self):
+        return f"{self.problem_id} {self.role}: {self.path}"
+
 
 class Submission(GenericRelation, models.Model):
     STATUS_CHOICES = [
@@ -81,6 +262,19 @@ class Submission(GenericRelation, models.Model):
     time_taken = models.FloatField(null=True, blank=True)
     memory_taken = models.FloatField(null=True, blank=True)
     failed_testcase_info = models.JSONField(null=True, blank=True)
+    testcase_set = models.ForeignKey(
+        TestcaseSet,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="submissions",
+        help_text="Testcase set version the submission was judged against",
+    )
+    metrics = models.JSONField(
+        null=True,
+        blank=True,
+        help_text="Per-metric scores of a dataset problem submission",
+    )
 
     def clean(self):
         super().clean()
@@ -98,19 +292,168 @@ class Submission(GenericRelation, models.Model):
     def save(self, *args, **kwargs):
         super().save(*args, **kwargs)
 
-        # Get the problem instance
-        problem = self.content_object
+        # Get the problem instance; without the heavy columns when it has to
+        # be fetched, since only the counters are read and written
+        if Submission.content_object.is_cached(self):
+            problem = self.content_object
+        else:
+            problem = (
+                self.content_type.model_class()
+                .objects.for_list()
+                .get(pk=self.object_id)
+            )
 
         # Update submission counts
         problem.total_submissions += 1
         if self.verdict == 3:  # 3 is "Accepted" in STATUS_CHOICES
             problem.accepted_submissions += 1
-        problem.save()
+        problem.save(
+            update_fields=[
+                "total_submissions",
+                "accepted_submissions",
+                "last_updated_timestamp",
+            ]
+        )
 
     def __str__(self):
         return f"{self.user.username} - {self.content_object.slug} - {self.verdict}"
 
 
+class UploadSession(models.Model):
+    """
+    Resumable, chunked upload of a prediction file for a dataset problem.
+
+    Chunks are appended in order to a file under ``UPLOAD_ROOT`` and parsed
+    as they arrive (see ``problems.uploads``); the prediction column is kept
+    alongside as raw float64 values, so a complete upload is evaluated
+    without reading the CSV file again. ``size`` and ``rows`` are the
+    committed state: anything on disk past them is from a failed request.
+    """
+
+    OPEN = "open"
+    COMPLETE = "complete"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (OPEN, "Open"),
+        (COMPLETE, "Complete"),
+        (FAILED, "Failed"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="upload_sessions"
+    )
+    problem = models.ForeignKey(
+        DatasetBasedProblem, on_delete=models.CASCADE, related_name="upload_sessions"
+    )
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=OPEN)
+    size = models.PositiveBigIntegerField(default=0, help_text="Bytes received")
+    rows = models.PositiveBigIntegerField(default=0, help_text="Data rows parsed")
+    expected_rows = models.PositiveBigIntegerField()
+    columns = models.JSONField(default=list, blank=True)
+    classes = models.JSONField(null=True, blank=True)
+    pending = models.BinaryField(
+        default=b"", help_text="Unterminated last line of the received bytes"
+    )
+    chunks = models.JSONField(
+        default=list, blank=True, help_text="[offset, size, sha256] of each chunk"
+    )
+    error = models.TextField(blank=True)
+    submission = models.OneToOneField(
+        Submission, on_delete=models.SET_NULL, null=True, blank=True
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    expires_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.user_id} - {self.problem_id} - {self.status}"
+
+
+class LeaderboardEntry(GenericRelation, models.Model):
+    """
+    Best accepted submission of one user to one problem, kept up to date as
+    submissions are accepted so that leaderboards never scan ``Submission``.
+
+    Entries rank by ``RANK_ORDER``: fastest first, then least memory, then
+    earliest; the covering index answers rank and top-N queries.
+    """
+
+    RANK_ORDER = ("time_taken", "memory_taken", "achieved_at", "id")
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="leaderboard_entries"
+    )
+    submission = models.ForeignKey(
+        Submission, on_delete=models.CASCADE, related_name="+"
+    )
+    time_taken = models.FloatField(default=0)
+    memory_taken = models.FloatField(default=0)
+    achieved_at = models.DateTimeField()
+    # Problem level and weight the user's ranking was credited with for this
+    # entry (accounts.rankings), debited again when the entry is removed
+    level = models.CharField(max_length=10, blank=True)
+    weight = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("content_type", "object_id", "user")
+        indexes = [
+            models.Index(
+                fields=[
+                    "content_type",
+                    "object_id",
+                    "time_taken",
+                    "memory_taken",
+                    "achieved_at",
+                    "id",
+                ],
+                name="leaderboard_rank_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.object_id} - {self.time_taken}"
+
+    @staticmethod
+    def submission_key(submission):
+        return (
+            submission.time_taken or 0,
+            submission.memory_taken or 0,
+            submission.created_timestamp,
+        )
+
+    @classmethod
+    def record(cls, submission):
+        """
+        Make accepted ``submission`` its user's entry if it beats the
+        current one. Returns the entry if it changed, else ``None``.
+        """
+        time_taken, memory_taken, achieved_at = cls.submission_key(submission)
+        with transaction.atomic():
+            entry, created = cls.objects.select_for_update().get_or_create(
+                content_type_id=submission.content_type_id,
+                object_id=submission.object_id,
+                user_id=submission.user_id,
+                defaults={
+                    "submission": submission,
+                    "time_taken": time_taken,
+                    "memory_taken": memory_taken,
+                    "achieved_at": achieved_at,
+                },
+            )
+            if created:
+                return entry
+            current = (entry.time_taken, entry.memory_taken, entry.achieved_at)
+            if (time_taken, memory_taken, achieved_at) >= current:
+                return None
+            entry.submission = submission
+            entry.time_taken = time_taken
+            entry.memory_taken = memory_taken
+            entry.achieved_at = achieved_at
+            entry.save()
+        return entry
+
+
 class Note(GenericRelation, models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
 
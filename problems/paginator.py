@@ -10,7 +10,7 @@ class ProblemListPagination(PageNumberPagination):
     max_page_size = 100
 
     def get_paginated_response(
-        self, data, difficulty_counts=None, total_problems_solved=None
+        self, data, difficulty_counts=None, total_problems_solved=None, tag_counts=None
     ):
         """Return paginated response with additional metadata"""
         return Response(
@@ -21,5 +21,14 @@ class ProblemListPagination(PageNumberPagination):
                 "current_page": self.page.number,
                 "total_problems": self.page.paginator.count,
                 "total_problems_solved": total_problems_solved or 0,
+                "tag_counts": tag_counts or {},
             }
         )
+
+
+class LeaderboardPagination(PageNumberPagination):
+    """Pagination class for problem leaderboards"""
+
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
@@ -1,11 +1,13 @@
 from django.contrib.contenttypes.models import ContentType
 from rest_framework import serializers
 
+from ncore.projection import ProjectedSerializerMixin
+
 from .models import ConceptBasedProblem, DatasetBasedProblem, Note, Submission
 from .utils import get_problem_by_type_and_slug
 
 
-class ProblemListSerializer(serializers.ModelSerializer):
+class ProblemListSerializer(ProjectedSerializerMixin, serializers.ModelSerializer):
     """Serializer for listing problems in the table view"""
 
     status = serializers.SerializerMethodField()
@@ -30,6 +32,16 @@ class ProblemListSerializer(serializers.ModelSerializer):
             "submissions",
             "type",
         ]
+        # Model columns behind each field, for ``FieldProjection``
+        projection_columns = {
+            "acceptance_rate": ("accepted_submissions", "total_submissions"),
+            "status": (),
+            "problem_type": (),
+            "tags": ("tag_names",),
+            "notes_id": (),
+            "submissions": ("total_submissions",),
+            "type": ("problem_type",),
+        }
 
     def get_status(self, obj):
         user = self.context.get("user")
@@ -134,9 +146,9 @@ class RunCodeSerializer(serializers.Serializer):
         # Validate that the problem exists
         try:
             if problem_type == "concept":
-                problem = ConceptBasedProblem.objects.get(id=problem_id)
+                problem = ConceptBasedProblem.objects.for_judge().get(id=problem_id)
             else:
-                problem = DatasetBasedProblem.objects.get(id=problem_id)
+                problem = DatasetBasedProblem.objects.for_judge().get(id=problem_id)
         except (ConceptBasedProblem.DoesNotExist, DatasetBasedProblem.DoesNotExist):
             raise serializers.ValidationError("Problem not found.")
 
@@ -144,6 +156,39 @@ class RunCodeSerializer(serializers.Serializer):
         return attrs
 
 
+class DatasetSubmissionSerializer(serializers.Serializer):
+    """Serializer for handling prediction file submissions"""
+
+    problem_id = serializers.IntegerField(required=True)
+    predictions = serializers.FileField(required=True, allow_empty_file=False)
+
+    def validate(self, attrs):
+        """Validate the complete data"""
+        try:
+            attrs["problem"] = DatasetBasedProblem.objects.for_judge().get(
+                id=attrs["problem_id"]
+            )
+        except DatasetBasedProblem.DoesNotExist:
+            raise serializers.ValidationError("Problem not found.")
+        return attrs
+
+
+class UploadSessionSerializer(serializers.Serializer):
+    """Serializer for handling prediction upload session creation"""
+
+    problem_id = serializers.IntegerField(required=True)
+
+    def validate(self, attrs):
+        """Validate the complete data"""
+        try:
+            attrs["problem"] = DatasetBasedProblem.objects.for_list().get(
+                id=attrs["problem_id"]
+            )
+        except DatasetBasedProblem.DoesNotExist:
+            raise serializers.ValidationError("Problem not found.")
+        return attrs
+
+
 class CommentSerializer(serializers.Serializer):
     """Serializer for handling comment validation"""
 
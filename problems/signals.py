@@ -0,0 +1,79 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from ncore.conditional import (
+    bump_content_version,
+    catalog_key,
+    m2m_owner_pks,
+    touch_rows,
+    user_state_key,
+)
+from problems.leaderboards import leaderboard_index
+from problems.models import (
+    ConceptBasedProblem,
+    DailyContent,
+    DatasetBasedProblem,
+    Note,
+    Submission,
+    TestcaseSet,
+)
+
+PROBLEM_MODELS = (ConceptBasedProblem, DatasetBasedProblem)
+
+
+@receiver(post_save, sender=ConceptBasedProblem)
+@receiver(post_save, sender=DatasetBasedProblem)
+@receiver(post_delete, sender=ConceptBasedProblem)
+@receiver(post_delete, sender=DatasetBasedProblem)
+@receiver(post_save, sender=DailyContent)
+@receiver(post_delete, sender=DailyContent)
+def problem_changed(sender, **kwargs):
+    bump_content_version(catalog_key("problems"))
+
+
+def problem_tags_changed(sender, instance, action, reverse, model, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    # Tag changes do not go through Problem.save, so move the timestamp the
+    # detail ETag and Last-Modified are derived from by hand.
+    problem_model = model if reverse else type(instance)
+    touch_rows(
+        problem_model,
+        m2m_owner_pks(instance, reverse, pk_set),
+        "last_updated_timestamp",
+    )
+    bump_content_version(catalog_key("problems"))
+
+
+for problem_model in PROBLEM_MODELS:
+    m2m_changed.connect(problem_tags_changed, sender=problem_model.tags.through)
+
+
+@receiver(post_save, sender=Submission)
+@receiver(post_save, sender=Note)
+@receiver(post_delete, sender=Submission)
+@receiver(post_delete, sender=Note)
+def user_problem_state_changed(sender, instance, **kwargs):
+    bump_content_version(user_state_key(instance.user_id))
+
+
+@receiver(post_save, sender=ConceptBasedProblem)
+def record_testcase_set(sender, instance, update_fields=None, **kwargs):
+    # Counter updates and lean instances do not carry the testcases
+    if update_fields is not None and "submission_testcases" not in update_fields:
+        return
+    if "submission_testcases" in instance.get_deferred_fields():
+        return
+    TestcaseSet.record(instance, instance.submission_testcases)
+
+
+@receiver(post_save, sender=Submission)
+def rank_accepted_submission(sender, instance, created, **kwargs):
+    if created and instance.verdict == 3:
+        leaderboard_index.record(instance)
+
+
+@receiver(post_delete, sender=Submission)
+def unrank_deleted_submission(sender, instance, **kwargs):
+    if instance.verdict == 3:
+        leaderboard_index.forget(instance)
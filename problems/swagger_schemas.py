@@ -1,6 +1,8 @@
 # your_app/swagger_schemas.py
 from drf_yasg import openapi
-from drf_yasg.utils import swagger_auto_schema
+from drf_yasg.utils import no_body, swagger_auto_schema
+
+from ncore.swagger_schemas import projection_parameters
 
 monthly_content_view_swagger_schema = swagger_auto_schema(
     operation_description="Get Calender data also same response will be used for concept of the day and problem of the day",
@@ -262,6 +264,21 @@ problems_table_view_swagger_schema = swagger_auto_schema(
             type=openapi.TYPE_INTEGER,
             required=False,
         ),
+        *projection_parameters(
+            [
+                "id",
+                "title",
+                "slug",
+                "level",
+                "acceptance_rate",
+                "status",
+                "problem_type",
+                "tags",
+                "notes_id",
+                "submissions",
+                "type",
+            ]
+        ),
     ],
     responses={
         200: openapi.Response(
@@ -291,7 +308,14 @@ problems_table_view_swagger_schema = swagger_auto_schema(
                                 "notes": openapi.Schema(type=openapi.TYPE_STRING),
                             },
                         ),
-                    )
+                    ),
+                    "tag_counts": openapi.Schema(
+                        type=openapi.TYPE_OBJECT,
+                        description="Number of problems per tag, largest first",
+                        additional_properties=openapi.Schema(
+                            type=openapi.TYPE_INTEGER
+                        ),
+                    ),
                 },
             ),
             examples={
@@ -307,7 +331,8 @@ problems_table_view_swagger_schema = swagger_auto_schema(
                             "tags": ["Array", "Hash Table"],
                             "notes": "Use a hash map to store indices of the numbers.",
                         },
-                    ]
+                    ],
+                    "tag_counts": {"Array": 12, "Hash Table": 7},
                 }
             },
         ),
@@ -545,6 +570,232 @@ run_code_post_swagger_schema = swagger_auto_schema(
 )
 
 
+submit_predictions_post_swagger_schema = swagger_auto_schema(
+    manual_parameters=[
+        openapi.Parameter(
+            "problem_id",
+            openapi.IN_FORM,
+            description="Dataset problem ID",
+            type=openapi.TYPE_INTEGER,
+            required=True,
+        ),
+        openapi.Parameter(
+            "predictions",
+            openapi.IN_FORM,
+            description=(
+                "CSV file with a header row; the last column holds one "
+                "prediction per test row, in test file order"
+            ),
+            type=openapi.TYPE_FILE,
+            required=True,
+        ),
+    ],
+    responses={
+        200: openapi.Response(
+            description="Predictions evaluated successfully",
+            schema=openapi.Schema(
+                type=openapi.TYPE_OBJECT,
+                properties={
+                    "verdict": openapi.Schema(type=openapi.TYPE_INTEGER),
+                    "rows": openapi.Schema(type=openapi.TYPE_INTEGER),
+                    "sha256": openapi.Schema(
+                        type=openapi.TYPE_STRING,
+                        description="Checksum of the parsed predictions",
+                    ),
+                    "metrics": openapi.Schema(
+                        type=openapi.TYPE_OBJECT,
+                        description=(
+                            "Public split score, threshold and ideal value "
+                            "of each metric"
+                        ),
+                    ),
+                },
+            ),
+        ),
+        400: openapi.Response(description="Bad Request - Invalid prediction file"),
+    },
+)
+
+
+upload_session_schema = openapi.Schema(
+    type=openapi.TYPE_OBJECT,
+    properties={
+        "id": openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_UUID),
+        "status": openapi.Schema(
+            type=openapi.TYPE_STRING, enum=["open", "complete", "failed"]
+        ),
+        "offset": openapi.Schema(
+            type=openapi.TYPE_INTEGER, description="Offset of the next chunk"
+        ),
+        "rows": openapi.Schema(type=openapi.TYPE_INTEGER),
+        "expected_rows": openapi.Schema(type=openapi.TYPE_INTEGER),
+        "error": openapi.Schema(type=openapi.TYPE_STRING),
+        "expires_at": openapi.Schema(
+            type=openapi.TYPE_STRING, format=openapi.FORMAT_DATETIME
+        ),
+    },
+)
+
+upload_session_post_swagger_schema = swagger_auto_schema(
+    request_body=openapi.Schema(
+        type=openapi.TYPE_OBJECT,
+        properties={
+            "problem_id": openapi.Schema(
+                type=openapi.TYPE_INTEGER, description="Dataset problem ID"
+            ),
+        },
+    ),
+    responses={
+        201: openapi.Response(
+            description="Upload session opened", schema=upload_session_schema
+        ),
+        400: openapi.Response(description="Bad Request - Invalid parameters"),
+    },
+)
+
+upload_session_get_swagger_schema = swagger_auto_schema(
+    responses={
+        200: openapi.Response(
+            description="Upload session retrieved successfully",
+            schema=upload_session_schema,
+        ),
+        404: openapi.Response(description="Not Found - Upload not found"),
+    },
+)
+
+upload_chunk_put_swagger_schema = swagger_auto_schema(
+    operation_description=(
+        "Append the raw request body to the upload. Chunks are sent in order; "
+        "resend from the returned offset after a 409."
+    ),
+    manual_parameters=[
+        openapi.Parameter(
+            "Upload-Offset",
+            openapi.IN_HEADER,
+            description="Byte offset of the chunk in the file",
+            type=openapi.TYPE_INTEGER,
+            required=True,
+        ),
+        openapi.Parameter(
+            "Chunk-SHA256",
+            openapi.IN_HEADER,
+            description="Hex SHA-256 checksum of the chunk",
+            type=openapi.TYPE_STRING,
+            required=True,
+        ),
+    ],
+    responses={
+        200: openapi.Response(description="Chunk stored", schema=upload_session_schema),
+        400: openapi.Response(
+            description="Bad Request - Checksum mismatch or invalid rows"
+        ),
+        404: openapi.Response(description="Not Found - Upload not found"),
+        409: openapi.Response(description="Conflict - Chunk offset out of order"),
+        413: openapi.Response(description="Chunk too large"),
+    },
+)
+
+upload_complete_post_swagger_schema = swagger_auto_schema(
+    request_body=no_body,
+    responses={
+        200: openapi.Response(
+            description="Upload evaluated and submitted",
+            schema=upload_session_schema,
+        ),
+        400: openapi.Response(description="Bad Request - Incomplete or invalid file"),
+        404: openapi.Response(description="Not Found - Upload not found"),
+    },
+)
+
+
+leaderboard_row_schema = openapi.Schema(
+    type=openapi.TYPE_OBJECT,
+    properties={
+        "rank": openapi.Schema(type=openapi.TYPE_INTEGER),
+        "username": openapi.Schema(type=openapi.TYPE_STRING),
+        "time_taken": openapi.Schema(type=openapi.TYPE_NUMBER),
+        "memory_taken": openapi.Schema(type=openapi.TYPE_NUMBER),
+        "achieved_at": openapi.Schema(
+            type=openapi.TYPE_STRING, format=openapi.FORMAT_DATETIME
+        ),
+    },
+)
+
+problem_path_parameters = [
+    openapi.Parameter(
+        "type",
+        openapi.IN_PATH,
+        description="Problem type ('concept' or 'dataset')",
+        type=openapi.TYPE_STRING,
+        required=True,
+    ),
+    openapi.Parameter(
+        "slug",
+        openapi.IN_PATH,
+        description="Problem slug",
+        type=openapi.TYPE_STRING,
+        required=True,
+    ),
+]
+
+leaderboard_get_swagger_schema = swagger_auto_schema(
+    operation_description=(
+        "Best accepted submission of each user, fastest first, then least "
+        "memory, then earliest"
+    ),
+    manual_parameters=[
+        *problem_path_parameters,
+        openapi.Parameter(
+            "page",
+            openapi.IN_QUERY,
+            description="Page number",
+            type=openapi.TYPE_INTEGER,
+        ),
+        openapi.Parameter(
+            "page_size",
+            openapi.IN_QUERY,
+            description="Entries per page (max 100)",
+            type=openapi.TYPE_INTEGER,
+        ),
+    ],
+    responses={
+        200: openapi.Response(
+            description="Leaderboard page retrieved successfully",
+            schema=openapi.Schema(
+                type=openapi.TYPE_OBJECT,
+                properties={
+                    "count": openapi.Schema(type=openapi.TYPE_INTEGER),
+                    "next": openapi.Schema(type=openapi.TYPE_STRING),
+                    "previous": openapi.Schema(type=openapi.TYPE_STRING),
+                    "results": openapi.Schema(
+                        type=openapi.TYPE_ARRAY, items=leaderboard_row_schema
+                    ),
+                },
+            ),
+        ),
+        404: openapi.Response(description="Not Found - Problem not found"),
+    },
+)
+
+my_rank_get_swagger_schema = swagger_auto_schema(
+    manual_parameters=problem_path_parameters,
+    responses={
+        200: openapi.Response(
+            description="Rank of the current user, null without an accepted submission",
+            schema=openapi.Schema(
+                type=openapi.TYPE_OBJECT,
+                properties={
+                    "rank": openapi.Schema(type=openapi.TYPE_INTEGER),
+                    "total": openapi.Schema(type=openapi.TYPE_INTEGER),
+                    "entry": leaderboard_row_schema,
+                },
+            ),
+        ),
+        404: openapi.Response(description="Not Found - Problem not found"),
+    },
+)
+
+
 submission_get_swagger_schema = swagger_auto_schema(
     manual_parameters=[
         openapi.Parameter(
@@ -561,6 +812,16 @@ submission_get_swagger_schema = swagger_auto_schema(
             type=openapi.TYPE_STRING,
             required=True,
         ),
+        *projection_parameters(
+            [
+                "verdict",
+                "time_taken",
+                "memory_taken",
+                "created_timestamp",
+                "code_submitted",
+                "failed_testcase_info",
+            ]
+        ),
     ],
     responses={
         200: openapi.Response(description="Submissions retrieved successfully"),
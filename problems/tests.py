@@ -1,3 +1,771 @@
-from django.test import TestCase
+import base64
+import hashlib
+import json
+import os
+from datetime import timedelta
+from io import StringIO
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
 
-# Create your tests here.
+import numpy as np
+
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from ncore.conditional import bump_content_version, get_content_version
+from problems import datasets, evaluation
+from problems.leaderboards import leaderboard_index, leaderboard_key
+from problems.models import (
+    ConceptBasedProblem,
+    DatasetBasedProblem,
+    DatasetFile,
+    LeaderboardEntry,
+    Submission,
+    TestcaseBlob,
+    TestcaseSet,
+    UploadSession,
+)
+
+
+class ProblemQuerySetTests(APITestCase):
+    """Test cases for the lean problem querysets"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        self.problems = [
+            ConceptBasedProblem.objects.create(
+                title=f"Problem {index}",
+                description="Long description",
+                level="easy",
+                author=self.user,
+                ideal_solution_code="print(1)",
+                submission_testcases=[{"input": "", "output": "1"}],
+            )
+            for index in range(3)
+        ]
+
+    def test_querysets_defer_heavy_columns(self):
+        """Test each use case loads only the heavy columns it reads"""
+        problem = ConceptBasedProblem.objects.for_list().get(pk=self.problems[0].pk)
+        self.assertEqual(
+            problem.get_deferred_fields(), set(ConceptBasedProblem.HEAVY_FIELDS)
+        )
+
+        problem = ConceptBasedProblem.objects.for_detail().get(pk=self.problems[0].pk)
+        self.assertNotIn("description", problem.get_deferred_fields())
+        self.assertIn("submission_testcases", problem.get_deferred_fields())
+
+        problem = ConceptBasedProblem.objects.for_judge().get(pk=self.problems[0].pk)
+        self.assertNotIn("ideal_solution_code", problem.get_deferred_fields())
+        self.assertIn("description", problem.get_deferred_fields())
+
+    def test_submission_updates_counters_only(self):
+        """Test a submission neither reads nor rewrites the heavy columns"""
+        problem = self.problems[0]
+        with CaptureQueriesContext(connection) as queries:
+            Submission.objects.create(
+                user=self.user,
+                content_type=ContentType.objects.get_for_model(problem),
+                object_id=problem.id,
+                verdict=3,
+            )
+
+        problem_sql = [
+            query["sql"]
+            for query in queries.captured_queries
+            if '"problems_conceptbasedproblem"' in query["sql"]
+        ]
+        self.assertTrue(problem_sql)
+        for sql in problem_sql:
+            self.assertNotIn('"submission_testcases"', sql)
+            self.assertNotIn('"description"', sql)
+
+        problem.refresh_from_db()
+        self.assertEqual(
+            (problem.total_submissions, problem.accepted_submissions), (1, 1)
+        )
+
+    def test_dashboard_submissions_resolve_problems_in_bulk(self):
+        """Test submission problems are fetched in one lean query"""
+        for problem in self.problems:
+            Submission.objects.create(user=self.user, content_object=problem, verdict=1)
+        url = reverse("dashboard-submissions", args=[self.user.username])
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 3)
+        problem_sql = [
+            query["sql"]
+            for query in queries.captured_queries
+            if 'FROM "problems_conceptbasedproblem"' in query["sql"]
+        ]
+        self.assertEqual(len(problem_sql), 1)
+        self.assertNotIn('"description"', problem_sql[0])
+
+
+class TestcaseSetTests(APITestCase):
+    """Test cases for versioned, deduplicated testcase storage"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        self.testcases = [{"input": f"{n}", "output": f"{n * n}"} for n in range(5)]
+        self.problem = ConceptBasedProblem.objects.create(
+            title="Square",
+            level="easy",
+            author=self.user,
+            ideal_solution_code="print(int(input()) ** 2)",
+            submission_testcases=self.testcases,
+        )
+
+    def test_versions_follow_content_changes(self):
+        """Test a version is added only when the testcases change"""
+        self.assertEqual(TestcaseSet.current(self.problem).version, 1)
+
+        self.problem.title = "Square numbers"
+        self.problem.save()
+        self.assertEqual(self.problem.testcase_sets.count(), 1)
+
+        self.problem.submission_testcases = self.testcases[:2]
+        self.problem.save()
+        self.assertEqual(TestcaseSet.current(self.problem).version, 2)
+
+        # Identical content is stored once across problems and versions
+        self.problem.submission_testcases = self.testcases
+        self.problem.save()
+        other = ConceptBasedProblem.objects.create(
+            title="Square again",
+            level="easy",
+            author=self.user,
+            submission_testcases=self.testcases,
+        )
+        self.assertEqual(TestcaseSet.current(self.problem).version, 3)
+        self.assertEqual(
+            TestcaseSet.current(other).blob_id,
+            TestcaseSet.current(self.problem).blob_id,
+        )
+        self.assertEqual(TestcaseBlob.objects.count(), 2)
+
+    def test_testcases_streamed_from_blob(self):
+        """Test the stored set decodes back to the original testcases"""
+        blob = TestcaseSet.current(self.problem).blob
+        self.assertEqual(blob.count, 5)
+        self.assertLess(len(blob.data), blob.size + 32)
+        self.assertEqual(list(blob.iter_testcases()), self.testcases)
+
+    @patch("problems.views.execute_code")
+    def test_submission_records_testcase_set(self, execute_code):
+        """Test run-code judges against and records the current set"""
+        execute_code.side_effect = lambda code, input_data, expected_output=None: {
+            "status": {"id": 3, "description": "Accepted"},
+            "stdout": base64.b64encode(expected_output.encode()).decode(),
+            "stderr": "",
+            "time": "0.01",
+            "memory": "100",
+        }
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+        response = self.client.post(
+            reverse("authenticated-problems-run-code"),
+            {
+                "code": "print(int(input()) ** 2)",
+                "problem_id": self.problem.id,
+                "problem_type": "concept",
+                "run_only": False,
+            },
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            (response.data["passed_count"], response.data["total_count"]), (5, 5)
+        )
+        self.assertEqual(execute_code.call_count, 5)
+        submission = Submission.objects.get()
+        self.assertEqual(submission.testcase_set, TestcaseSet.current(self.problem))
+
+
+class DatasetRegistryTests(APITestCase):
+    """Test cases for the dataset file registry"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.root = TemporaryDirectory()
+        self.addCleanup(self.root.cleanup)
+        override = override_settings(
+            DATASET_ROOT=self.root.name,
+            DATASET_CACHE_DIR=os.path.join(self.root.name, "cache"),
+            DATASET_INDEX_STRIDE=4,
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        datasets._load_labels.cache_clear()
+
+        self.write(
+            "test.csv", "id,label\n" + "".join(f"{n},{n % 3}\n" for n in range(10))
+        )
+        self.write("train.csv", 'id,text,label\n1,"a, b",cat\n2,c,dog\n3,d,cat\n')
+        self.write("ideal.json", json.dumps({"accuracy": 0.9}))
+        np.save(os.path.join(self.root.name, "test.npy"), np.arange(12.0).reshape(6, 2))
+
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        self.problem = DatasetBasedProblem.objects.create(
+            title="Iris",
+            level="easy",
+            author=self.user,
+            evaluation_metrics_dict={"accuracy": 0.8},
+            test_data_file_path="test.csv",
+            data_available_to_user_file_path="train.csv",
+            ideal_metrics_json_file_path="ideal.json",
+        )
+
+    def write(self, name, content):
+        with open(os.path.join(self.root.name, name), "w") as file:
+            file.write(content)
+
+    def test_register_problem_files(self):
+        """Test files are checksummed, indexed and their labels cached"""
+        registered = datasets.register_problem_files(self.problem)
+
+        test_data = registered[DatasetFile.TEST_DATA]
+        self.assertEqual(test_data.rows, 10)
+        self.assertEqual(test_data.columns, ["id", "label"])
+        self.assertEqual(len(test_data.index["offsets"]), 3)
+        self.assertEqual(
+            test_data.sha256,
+            datasets.file_sha256(os.path.join(self.root.name, "test.csv")),
+        )
+        labels = datasets.load_labels(test_data)
+        self.assertIsInstance(labels, np.memmap)
+        self.assertEqual(labels.tolist(), [n % 3 for n in range(10)])
+        self.assertIs(datasets.load_labels(test_data), labels)
+
+        user_data = registered[DatasetFile.USER_DATA]
+        self.assertEqual(user_data.index["classes"], ["cat", "dog"])
+        self.assertEqual(datasets.ideal_metrics(self.problem), {"accuracy": 0.9})
+
+    def test_missing_label_cache_rebuilt(self):
+        """Test labels are recomputed from the CSV when their cache is gone"""
+        test_data = datasets.get_dataset_file(self.problem, DatasetFile.TEST_DATA)
+        os.remove(datasets.label_cache_path(test_data.sha256))
+
+        labels = datasets.load_labels(test_data)
+
+        self.assertEqual(labels.tolist(), [n % 3 for n in range(10)])
+        self.assertTrue(os.path.exists(datasets.label_cache_path(test_data.sha256)))
+
+    def test_read_rows_through_index(self):
+        """Test rows are read from the middle of a file via the index"""
+        test_data = datasets.get_dataset_file(self.problem, DatasetFile.TEST_DATA)
+        self.assertEqual(
+            datasets.read_rows(test_data, 5, 3), [["5", "2"], ["6", "0"], ["7", "1"]]
+        )
+        self.assertEqual(datasets.read_rows(test_data, 9, 5), [["9", "0"]])
+
+    def test_changed_and_invalid_files(self):
+        """Test changed files are rescanned and bad files rejected"""
+        test_data = datasets.get_dataset_file(self.problem, DatasetFile.TEST_DATA)
+        self.write("test.csv", "id,label\n1,1\n")
+        os.utime(os.path.join(self.root.name, "test.csv"), (1, 1))
+        rescanned = datasets.get_dataset_file(self.problem, DatasetFile.TEST_DATA)
+        self.assertEqual(rescanned.rows, 1)
+        self.assertNotEqual(rescanned.sha256, test_data.sha256)
+
+        self.problem.test_data_file_path = "test.npy"
+        test_data = datasets.get_dataset_file(self.problem, DatasetFile.TEST_DATA)
+        self.assertEqual(datasets.load_labels(test_data).tolist(), [1, 3, 5, 7, 9, 11])
+
+        self.write("broken.csv", "id,label\n1,2,3\n")
+        self.problem.test_data_file_path = "broken.csv"
+        with self.assertRaises(ValidationError):
+            datasets.get_dataset_file(self.problem, DatasetFile.TEST_DATA)
+        self.problem.test_data_file_path = "missing.csv"
+        with self.assertRaises(ValidationError):
+            datasets.get_dataset_file(self.problem, DatasetFile.TEST_DATA)
+
+
+class EvaluationTests(APITestCase):
+    """Test cases for scoring dataset problem submissions"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.root = TemporaryDirectory()
+        self.addCleanup(self.root.cleanup)
+        override = override_settings(
+            DATASET_ROOT=self.root.name,
+            DATASET_CACHE_DIR=os.path.join(self.root.name, "cache"),
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        datasets._load_labels.cache_clear()
+        evaluation._reference.cache_clear()
+
+        self.labels = ["cat", "dog", "dog", "cat", "dog"]
+        with open(os.path.join(self.root.name, "test.csv"), "w") as file:
+            file.write("id,label\n")
+            file.writelines(f"{n},{label}\n" for n, label in enumerate(self.labels))
+        with open(os.path.join(self.root.name, "ideal.json"), "w") as file:
+            json.dump({"accuracy": 1.0, "f1_score": 0.9}, file)
+
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        self.problem = DatasetBasedProblem.objects.create(
+            title="Pets",
+            level="easy",
+            author=self.user,
+            evaluation_metrics_dict={"accuracy": 0.8, "f1_score": None},
+            test_data_file_path="test.csv",
+            ideal_metrics_json_file_path="ideal.json",
+        )
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def submit(self, predictions):
+        content = "id,prediction\n" + "".join(
+            f"{n},{label}\n" for n, label in enumerate(predictions)
+        )
+        return self.client.post(
+            reverse("authenticated-problems-submit-predictions"),
+            {
+                "problem_id": self.problem.id,
+                "predictions": SimpleUploadedFile("predictions.csv", content.encode()),
+            },
+            format="multipart",
+        )
+
+    def test_metrics_match_reference_values(self):
+        """Test the vectorized metrics against hand-computed values"""
+        score = evaluation.metric_score
+        y_true = np.array([0.0, 1, 1, 0, 1])
+        y_pred = np.array([0.0, 1, 0, 0, 1])
+        self.assertEqual(score("accuracy", y_true, y_pred), 0.8)
+        self.assertEqual(score("precision", y_true, y_pred), 1.0)
+        self.assertAlmostEqual(score("recall", y_true, y_pred), 2 / 3)
+        self.assertAlmostEqual(score("f1_score", y_true, y_pred), 0.8)
+
+        # Macro average over three classes: F1 of 1, 0 and 0.8
+        y_true = np.array([0.0, 1, 2, 2])
+        self.assertAlmostEqual(score("f1", y_true, np.array([0.0, 2, 2, 2])), 0.6)
+        self.assertAlmostEqual(
+            score("f1", y_true + 10, np.array([10.0, 12, 12, 12])), 0.6
+        )
+
+        # Tied scores count as half a correctly ordered pair
+        y_true = np.array([0.0, 1, 0, 1])
+        scores = np.array([0.2, 0.2, 0.1, 0.9])
+        self.assertAlmostEqual(score("roc_auc", y_true, scores), 0.875)
+        self.assertAlmostEqual(
+            score("log_loss", y_true, scores),
+            -np.log([0.8, 0.2, 0.9, 0.9]).mean(),
+        )
+
+        y_true = np.array([1.0, 2, 3])
+        y_pred = np.array([1.0, 2, 5])
+        self.assertAlmostEqual(score("rmse", y_true, y_pred), np.sqrt(4 / 3))
+        self.assertAlmostEqual(score("mae", y_true, y_pred), 2 / 3)
+        self.assertAlmostEqual(score("r2", y_true, y_pred), -1.0)
+
+    def test_class_name_predictions(self):
+        """Test class names map to the test label codes"""
+        source = StringIO('id,label\n1,dog\n2,"cat"\n3, bird\n')
+        self.assertEqual(
+            evaluation.read_predictions(source, ["cat", "dog"]).tolist(),
+            [1, 0, -1],
+        )
+        with self.assertRaises(ValidationError):
+            evaluation.read_predictions(StringIO("id,label\n1,dog\n"))
+
+    @override_settings(EVALUATION_BLOCK_ROWS=10)
+    def test_resubmissions_reuse_block_statistics(self):
+        """Test only changed blocks are recomputed, with split scores"""
+        cache.clear()
+        labels = np.arange(100.0) % 3
+        reference = evaluation.Reference("ab" * 32, labels, 0.3)
+        predictions = labels.copy()
+        predictions[:20] = 0
+
+        with patch.object(
+            evaluation, "block_statistics", wraps=evaluation.block_statistics
+        ) as block_statistics:
+            sha256, scores = evaluation.score_predictions(
+                reference, ["accuracy"], predictions
+            )
+            self.assertEqual(block_statistics.call_count, 10)
+            self.assertEqual(
+                evaluation.score_predictions(reference, ["accuracy"], predictions),
+                (sha256, scores),
+            )
+            self.assertEqual(block_statistics.call_count, 10)
+
+            predictions[55] += 1
+            edited_sha256, edited = evaluation.score_predictions(
+                reference, ["accuracy"], predictions
+            )
+            self.assertEqual(block_statistics.call_count, 11)
+
+        self.assertNotEqual(edited_sha256, sha256)
+        self.assertAlmostEqual(scores["all"]["accuracy"], 0.87)
+        self.assertAlmostEqual(edited["all"]["accuracy"], 0.86)
+        public = np.count_nonzero(reference.public)
+        self.assertAlmostEqual(
+            scores["public"]["accuracy"] * public
+            + scores["private"]["accuracy"] * (100 - public),
+            87,
+        )
+
+    def test_submit_predictions_verdicts(self):
+        """Test submissions are accepted only when every metric passes"""
+        response = self.submit(self.labels)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["verdict"], 3)
+        f1_score = response.data["metrics"]["f1_score"]
+        self.assertEqual(
+            (f1_score["public"], f1_score["threshold"], f1_score["ideal"]),
+            (1.0, 0.9, 0.9),
+        )
+
+        # 4 of 5 right passes the accuracy threshold but not the ideal F1
+        response = self.submit(["cat", "dog", "cat", "cat", "dog"])
+        self.assertEqual(response.data["verdict"], 4)
+
+        submissions = Submission.objects.order_by("id")
+        self.assertEqual([s.verdict for s in submissions], [3, 4])
+        self.assertEqual(submissions[1].metrics["accuracy"]["score"], 0.8)
+        self.assertTrue(submissions[1].metrics["accuracy"]["passed"])
+        self.assertFalse(submissions[1].metrics["f1_score"]["passed"])
+        # The held-out split score is kept with the submission only
+        self.assertIn("private", submissions[1].metrics["accuracy"])
+        self.problem.refresh_from_db()
+        self.assertEqual(
+            (self.problem.accepted_submissions, self.problem.total_submissions),
+            (1, 2),
+        )
+
+    def test_private_scores_not_exposed(self):
+        """Test only public split scores of a submission reach the client"""
+        response = self.submit(["cat", "dog", "cat", "cat", "dog"])
+
+        stored = Submission.objects.get().metrics
+        for key, metric in response.data["metrics"].items():
+            # With the score on all rows or its pass flag, the private score
+            # follows from the public one and the split sizes
+            self.assertEqual(set(metric), {"public", "threshold", "ideal"})
+            self.assertEqual(metric["public"], stored[key]["public"])
+
+    def test_invalid_predictions_rejected(self):
+        """Test a prediction file of the wrong length is not judged"""
+        response = self.submit(self.labels[:3])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("Expected 5 predictions", response.data["message"])
+        self.assertFalse(Submission.objects.exists())
+
+    def test_binary_metrics_need_class_labels(self):
+        """Test AUC on continuous labels is rejected, not a server error"""
+        rows = evaluation.MAX_CLASSES + 1
+        with open(os.path.join(self.root.name, "values.csv"), "w") as file:
+            file.write("id,value\n")
+            file.writelines(f"{n},{n / 7}\n" for n in range(rows))
+        self.problem.test_data_file_path = "values.csv"
+        self.problem.evaluation_metrics_dict = {"auc": 0.5}
+        self.problem.save()
+
+        response = self.submit([n / 7 for n in range(rows)])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("need two label classes", response.data["message"])
+
+    def test_benchmark_command(self):
+        """Test the benchmark times parsing and every metric"""
+        output = StringIO()
+        call_command("benchmark_evaluation", rows=1000, repeat=1, stdout=output)
+        for name in ["read_predictions", "accuracy", "f1", "auc", "rmse"]:
+            self.assertIn(name, output.getvalue())
+
+
+class UploadSessionTests(APITestCase):
+    """Test cases for chunked prediction file uploads"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.root = TemporaryDirectory()
+        self.addCleanup(self.root.cleanup)
+        override = override_settings(
+            DATASET_ROOT=self.root.name,
+            DATASET_CACHE_DIR=os.path.join(self.root.name, "cache"),
+            UPLOAD_ROOT=os.path.join(self.root.name, "uploads"),
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        datasets._load_labels.cache_clear()
+
+        self.labels = [n % 2 for n in range(50)]
+        with open(os.path.join(self.root.name, "test.csv"), "w") as file:
+            file.write("id,label\n")
+            file.writelines(f"{n},{label}\n" for n, label in enumerate(self.labels))
+
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        self.problem = DatasetBasedProblem.objects.create(
+            title="Parity",
+            level="easy",
+            author=self.user,
+            evaluation_metrics_dict={"accuracy": 0.9},
+            test_data_file_path="test.csv",
+        )
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+        self.content = (
+            "id,prediction\n"
+            + "".join(f"{n},{label}\n" for n, label in enumerate(self.labels))
+        ).encode()
+        response = self.client.post(
+            reverse("upload-sessions-list"), {"problem_id": self.problem.id}
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.session_id = response.data["id"]
+
+    def put(self, offset, data, checksum=None):
+        return self.client.put(
+            reverse("upload-sessions-detail", args=[self.session_id]),
+            data,
+            content_type="application/octet-stream",
+            HTTP_UPLOAD_OFFSET=str(offset),
+            HTTP_CHUNK_SHA256=checksum or hashlib.sha256(data).hexdigest(),
+        )
+
+    def complete(self):
+        return self.client.post(
+            reverse("upload-sessions-complete", args=[self.session_id])
+        )
+
+    def test_chunked_upload_is_evaluated(self):
+        """Test chunks split mid-line are validated, assembled and judged"""
+        cuts = [0, 7, 200, len(self.content)]
+        for start, end in zip(cuts, cuts[1:]):
+            response = self.put(start, self.content[start:end])
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.data["offset"], end)
+        self.assertEqual(response.data["rows"], 50)
+        path = os.path.join(self.root.name, "uploads", f"{self.session_id}.csv")
+        with open(path, "rb") as file:
+            self.assertEqual(file.read(), self.content)
+
+        response = self.complete()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["verdict"], 3)
+        self.assertNotIn("private", response.data["metrics"]["accuracy"])
+        self.assertNotIn("score", response.data["metrics"]["accuracy"])
+        self.assertEqual(response.data["metrics"]["accuracy"]["public"], 1.0)
+        session = UploadSession.objects.get()
+        self.assertEqual(session.status, UploadSession.COMPLETE)
+        self.assertEqual(session.submission.verdict, 3)
+        self.assertEqual(os.listdir(os.path.join(self.root.name, "uploads")), [])
+
+    def test_retried_and_out_of_order_chunks(self):
+        """Test retries are acknowledged and gaps report the resume offset"""
+        first = self.content[:100]
+        self.assertEqual(self.put(0, first).data["offset"], 100)
+        response = self.put(0, first)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["offset"], 100)
+
+        response = self.put(150, self.content[150:])
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data["offset"], 100)
+
+        response = self.put(100, self.content[100:], checksum="0" * 64)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(UploadSession.objects.get().size, 100)
+
+        self.assertEqual(self.put(100, self.content[100:]).status_code, 200)
+        self.assertEqual(self.complete().data["verdict"], 3)
+
+    def test_invalid_rows_fail_upload(self):
+        """Test a row with the wrong column count fails the upload"""
+        response = self.put(0, b"id,prediction\n0,0\n1,1,1\n")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["status"], UploadSession.FAILED)
+        self.assertIn("columns", response.data["error"])
+        self.assertEqual(self.put(0, self.content).status_code, 400)
+        self.assertFalse(Submission.objects.exists())
+
+    def test_incomplete_upload_rejected_and_purged(self):
+        """Test completing a short file fails, and expired uploads are purged"""
+        self.put(0, self.content[: self.content.index(b"\n20,") + 1])
+        response = self.complete()
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("Expected 50 rows", response.data["error"])
+
+        UploadSession.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        call_command("purge_upload_sessions", stdout=StringIO())
+        self.assertFalse(UploadSession.objects.exists())
+
+
+class LeaderboardTests(APITestCase):
+    """Test cases for per-problem leaderboards"""
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        leaderboard_index.clear_local()
+        self.users = [
+            User.objects.create_user(
+                username=f"user{index}",
+                email=f"user{index}@example.com",
+                password="testpass123",
+            )
+            for index in range(4)
+        ]
+        self.problem = ConceptBasedProblem.objects.create(
+            title="Sum",
+            description="Add two numbers",
+            level="easy",
+            author=self.users[0],
+        )
+
+    def submit(self, user, time_taken, verdict=3, memory_taken=10.0):
+        # Leaderboard changes are published when the transaction commits
+        with self.captureOnCommitCallbacks(execute=True):
+            return Submission.objects.create(
+                user=user,
+                content_object=self.problem,
+                verdict=verdict,
+                time_taken=time_taken,
+                memory_taken=memory_taken,
+            )
+
+    def leaderboard(self, **params):
+        return self.client.get(
+            reverse("public-problems-leaderboard", args=["concept", self.problem.slug]),
+            params,
+        )
+
+    def my_rank(self, user):
+        token = RefreshToken.for_user(user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        return self.client.get(
+            reverse(
+                "authenticated-problems-my-rank", args=["concept", self.problem.slug]
+            )
+        )
+
+    def test_entry_keeps_best_accepted_submission(self):
+        """Test only faster accepted submissions replace a user's entry"""
+        first = self.submit(self.users[0], 0.5)
+        self.submit(self.users[0], 0.8)
+        self.submit(self.users[0], 0.1, verdict=4)
+        entry = LeaderboardEntry.objects.get(user=self.users[0])
+        self.assertEqual(entry.submission, first)
+
+        best = self.submit(self.users[0], 0.2)
+        entry.refresh_from_db()
+        self.assertEqual(entry.submission, best)
+        self.assertEqual(entry.time_taken, 0.2)
+        self.assertEqual(LeaderboardEntry.objects.count(), 1)
+
+    def test_leaderboard_pages_are_ranked(self):
+        """Test the leaderboard lists users fastest first with their ranks"""
+        for user, time_taken in zip(self.users, [0.4, 0.1, 0.3, 0.2]):
+            self.submit(user, time_taken)
+
+        response = self.leaderboard(page_size=2, page=2)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 4)
+        self.assertEqual(
+            [(row["rank"], row["username"]) for row in response.data["results"]],
+            [(3, "user2"), (4, "user0")],
+        )
+
+        response = self.my_rank(self.users[3])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["rank"], 2)
+        self.assertEqual(response.data["total"], 4)
+        self.assertEqual(response.data["entry"]["time_taken"], 0.2)
+
+    def test_ranks_follow_new_submissions(self):
+        """Test a cached leaderboard reflects later improvements"""
+        self.submit(self.users[0], 0.2)
+        self.submit(self.users[1], 0.3)
+        self.assertEqual(self.my_rank(self.users[1]).data["rank"], 2)
+
+        self.submit(self.users[1], 0.1)
+        self.assertEqual(self.my_rank(self.users[1]).data["rank"], 1)
+
+        # Another process wrote the change: the shared version forces a reload
+        LeaderboardEntry.objects.filter(user=self.users[0]).update(time_taken=0.05)
+        content_type = ContentType.objects.get_for_model(self.problem)
+        bump_content_version(leaderboard_key(content_type.id, self.problem.id))
+        self.assertEqual(self.my_rank(self.users[1]).data["rank"], 2)
+
+    def test_changes_published_on_commit(self):
+        """Test the leaderboard version is bumped only once the entry commits"""
+        content_type = ContentType.objects.get_for_model(self.problem)
+        key = leaderboard_key(content_type.id, self.problem.id)
+        version = get_content_version(key)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Submission.objects.create(
+                user=self.users[0], content_object=self.problem, verdict=3
+            )
+            # A process reloading now would not see the entry yet
+            self.assertEqual(get_content_version(key), version)
+
+        self.assertEqual(get_content_version(key), version + 1)
+
+    def test_my_rank_without_entry(self):
+        """Test users without an accepted submission have no rank"""
+        self.submit(self.users[0], 0.2)
+        response = self.my_rank(self.users[1])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(response.data["rank"])
+        self.assertEqual(response.data["total"], 1)
+
+    def test_deleting_best_submission_promotes_next_best(self):
+        """Test deleting an entry's submission ranks the user's next best"""
+        best = self.submit(self.users[0], 0.1)
+        runner_up = self.submit(self.users[0], 0.3)
+        self.submit(self.users[1], 0.2)
+        self.assertEqual(self.my_rank(self.users[0]).data["rank"], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            best.delete()
+        entry = LeaderboardEntry.objects.get(user=self.users[0])
+        self.assertEqual(entry.submission, runner_up)
+        self.assertEqual(self.my_rank(self.users[0]).data["rank"], 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            runner_up.delete()
+        self.assertFalse(LeaderboardEntry.objects.filter(user=self.users[0]).exists())
+        response = self.leaderboard()
+        self.assertEqual(response.data["count"], 1)
+
+    def test_unknown_problem(self):
+        """Test leaderboards of unknown problems are not found"""
+        response = self.client.get(
+            reverse("public-problems-leaderboard", args=["concept", "missing"])
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
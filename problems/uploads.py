@@ -0,0 +1,207 @@
+"""
+Chunked, resumable uploads of dataset problem prediction files.
+
+A client opens an ``UploadSession`` and sends the file in order, one chunk
+per request, each with its byte offset and SHA-256 checksum. A chunk is
+verified before anything is written; a retried chunk that is already stored
+is acknowledged without being written again, and one at any other offset is
+refused with the offset to resume from.
+
+Chunks are validated as they arrive: their complete lines are parsed, the
+column count checked against the header and the row count against the test
+data, and the prediction column is appended to a raw float64 file, which is
+what ``finish_upload`` evaluates. Fields containing line breaks are not
+supported.
+"""
+
+import hashlib
+import os
+from datetime import timedelta
+from io import BytesIO
+
+import numpy as np
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from problems import datasets
+from problems.datasets import split_csv_line
+from problems.evaluation import evaluate, parse_labels
+from problems.models import DatasetFile, Submission, UploadSession
+
+# Longest line accepted; a longer unterminated line fails the upload
+MAX_LINE_SIZE = 1024 * 1024
+
+
+class OffsetMismatch(Exception):
+    """A chunk was sent for an offset other than the end of the upload."""
+
+    def __init__(self, offset):
+        super().__init__(f"Upload continues at offset {offset}")
+        self.offset = offset
+
+
+def data_path(session):
+    return os.path.join(settings.UPLOAD_ROOT, f"{session.pk}.csv")
+
+
+def predictions_path(session):
+    return os.path.join(settings.UPLOAD_ROOT, f"{session.pk}.f8")
+
+
+def write_at(path, position, data):
+    """
+    Write ``data`` at ``position``, dropping anything past it left by a
+    request that failed after writing.
+    """
+    with open(path, "ab") as file:
+        file.truncate(position)
+        file.write(data)
+
+
+def remove_files(session):
+    for path in (data_path(session), predictions_path(session)):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def open_upload(user, problem):
+    """Start an upload of predictions for the test data of ``problem``."""
+    test_data = datasets.get_dataset_file(problem, DatasetFile.TEST_DATA)
+    os.makedirs(settings.UPLOAD_ROOT, exist_ok=True)
+    return UploadSession.objects.create(
+        user=user,
+        problem=problem,
+        expected_rows=test_data.rows,
+        classes=test_data.index.get("classes"),
+        expires_at=timezone.now() + timedelta(seconds=settings.UPLOAD_SESSION_TTL),
+    )
+
+
+def parse_chunk(session, data, final=False):
+    """
+    Parse the lines completed by ``data`` and return their predictions.
+    The header and the unterminated last line are kept on ``session``;
+    ``final`` parses that last line too.
+    """
+    block = bytes(session.pending) + data
+    cut = len(block) if final else block.rfind(b"\n") + 1
+    lines, session.pending = block[:cut], block[cut:]
+    if len(session.pending) > MAX_LINE_SIZE:
+        raise ValidationError(
+            f"Row {session.rows + 1} is longer than {MAX_LINE_SIZE} bytes"
+        )
+
+    if not session.columns and lines:
+        header, _, lines = lines.partition(b"\n")
+        columns = [
+            field.decode(errors="replace").strip() for field in split_csv_line(header)
+        ]
+        if not any(columns):
+            raise ValidationError("Prediction file has no header row")
+        session.columns = columns
+    if not lines.strip():
+        return np.empty(0)
+
+    try:
+        table = np.loadtxt(
+            BytesIO(lines), dtype=bytes, delimiter=",", quotechar='"', ndmin=2
+        )
+    except ValueError as error:
+        raise ValidationError(f"Malformed rows after row {session.rows}: {error}")
+    if table.shape[1] != len(session.columns):
+        raise ValidationError(
+            f"Rows after row {session.rows} have {table.shape[1]} columns, "
+            f"expected {len(session.columns)}"
+        )
+    if session.rows + len(table) > session.expected_rows:
+        raise ValidationError(f"Expected {session.expected_rows} rows, got more")
+
+    predictions = parse_labels(table[:, -1], session.classes)
+    session.rows += len(table)
+    return predictions
+
+
+def fail(session, error):
+    session.status = UploadSession.FAILED
+    session.error = "; ".join(error.messages)
+    session.pending = b""
+    session.save()
+    remove_files(session)
+    return session
+
+
+def append_chunk(session_id, user, offset, checksum, data):
+    """
+    Append ``data`` at ``offset`` to an open upload of ``user``. Returns
+    the session, which is failed if the received rows are invalid.
+    """
+    with transaction.atomic():
+        session = UploadSession.objects.select_for_update().get(
+            pk=session_id, user=user
+        )
+        if session.status != UploadSession.OPEN:
+            raise ValidationError(f"Upload is {session.status}")
+        chunk = [offset, len(data), checksum.lower()]
+        if offset != session.size:
+            if chunk in session.chunks:
+                return session
+            raise OffsetMismatch(session.size)
+        if hashlib.sha256(data).hexdigest() != chunk[2]:
+            raise ValidationError("Chunk checksum does not match its content")
+
+        rows = session.rows
+        try:
+            predictions = parse_chunk(session, data)
+        except ValidationError as error:
+            return fail(session, error)
+        write_at(data_path(session), session.size, data)
+        write_at(predictions_path(session), rows * 8, predictions.tobytes())
+        session.size += len(data)
+        session.chunks.append(chunk)
+        session.save()
+    return session
+
+
+def finish_upload(session_id, user):
+    """
+    Close an open upload of ``user``, evaluate it and record the submission.
+    Returns the session and the evaluation result, ``None`` if it failed.
+    """
+    with transaction.atomic():
+        session = (
+            UploadSession.objects.select_for_update()
+            .select_related("problem")
+            .get(pk=session_id, user=user)
+        )
+        if session.status != UploadSession.OPEN:
+            raise ValidationError(f"Upload is {session.status}")
+
+        rows = session.rows
+        try:
+            tail = parse_chunk(session, b"", final=True)
+            if session.rows != session.expected_rows:
+                raise ValidationError(
+                    f"Expected {session.expected_rows} rows, got {session.rows}"
+                )
+            write_at(predictions_path(session), rows * 8, tail.tobytes())
+            predictions = np.fromfile(
+                predictions_path(session), dtype=np.float64, count=session.rows
+            )
+            result = evaluate(session.problem, predictions)
+        except ValidationError as error:
+            return fail(session, error), None
+
+        session.submission = Submission.objects.create(
+            user=user,
+            content_object=session.problem,
+            verdict=result["verdict"],
+            metrics=result["metrics"],
+        )
+        session.status = UploadSession.COMPLETE
+        session.save()
+    remove_files(session)
+    return session, result
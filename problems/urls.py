@@ -1,22 +1,27 @@
 from django.urls import include, path
-from rest_framework.routers import DefaultRouter
+from rest_framework.routers import DefaultRouter, SimpleRouter
 
 from problems.views import (
     AuthenticatedProblemsViewSet,
     PublicProblemsViewSet,
+    UploadSessionViewSet,
 )
 
 # Create router instances
 public_router = DefaultRouter()
 authenticated_router = DefaultRouter()
+upload_router = SimpleRouter()
 
 # Register viewsets with routers
 public_router.register(r"", PublicProblemsViewSet, basename="public-problems")
 authenticated_router.register(
     r"", AuthenticatedProblemsViewSet, basename="authenticated-problems"
 )
+upload_router.register(r"uploads", UploadSessionViewSet, basename="upload-sessions")
 
 urlpatterns = [
+    # Prediction file uploads, ahead of the public "<type>/<slug>" routes
+    path("", include(upload_router.urls)),
     # Public problem endpoints
     path("", include(public_router.urls)),
     # Authenticated problem endpoints
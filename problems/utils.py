@@ -3,6 +3,7 @@ import base64
 import requests
 from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
+from django.contrib.contenttypes.prefetch import GenericPrefetch
 
 from problems.models import (
     ConceptBasedProblem,
@@ -13,6 +14,20 @@ from problems.models import (
 )
 
 
+def problem_prefetch(lookup="content_object"):
+    """
+    Prefetch resolving the problems behind a generic relation with one lean
+    query per problem table, instead of one full row fetch per object.
+    """
+    return GenericPrefetch(
+        lookup,
+        [
+            ConceptBasedProblem.objects.for_list(),
+            DatasetBasedProblem.objects.for_list(),
+        ],
+    )
+
+
 def get_filtered_problems(problem_type):
     return (
         ConceptBasedProblem.objects.all()
@@ -84,18 +99,36 @@ def get_content_progress_data(user, content):
     return 0, 0, submission_status
 
 
-def get_problem_by_type_and_slug(problem_type, slug):
-    """Get a problem by type and slug, handling both concept and dataset problems"""
+def get_problem_by_type_and_slug(problem_type, slug, *keep):
+    """
+    Get a problem by type and slug, handling both concept and dataset problems.
+    Of the heavy columns only the ``keep`` ones are loaded up front.
+    """
     try:
         if problem_type == "concept":
-            return ConceptBasedProblem.objects.get(slug=slug)
+            return ConceptBasedProblem.objects.lean(*keep).get(slug=slug)
         else:
-            problem = DatasetBasedProblem.objects.get(slug=slug)
+            problem = DatasetBasedProblem.objects.lean(*keep).get(slug=slug)
             return problem
     except (ConceptBasedProblem.DoesNotExist, DatasetBasedProblem.DoesNotExist):
         return None
 
 
+def get_problem_validators(request, type, slug):
+    """Cheap ETag/Last-Modified validators for the problem detail endpoint"""
+    model = ConceptBasedProblem if type == "concept" else DatasetBasedProblem
+    row = (
+        model.objects.filter(slug=slug)
+        .values_list("id", "last_updated_timestamp")
+        .first()
+    )
+    if row is None:
+        return None, None
+    problem_id, last_updated_timestamp = row
+    etag_parts = (model._meta.label, problem_id, last_updated_timestamp)
+    return etag_parts, last_updated_timestamp
+
+
 def map_verdict_id(status_id):
     """Map Judge0 status IDs to internal verdict IDs."""
     if 7 <= status_id <= 14:
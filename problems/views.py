@@ -1,15 +1,23 @@
 import base64
 from calendar import monthrange
 from datetime import datetime
+from operator import attrgetter
 
+from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ValidationError
 from rest_framework import status
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet, ViewSet
 
 from concepts.models import ConceptsRead
+from ncore.conditional import conditional_response
+from ncore.models import TagCount
+from ncore.projection import FieldProjection
+from problems.evaluation import client_result, evaluate
 from problems.filters import ProblemFilterBackend
 from problems.models import (
     Comment,
@@ -18,27 +26,39 @@ from problems.models import (
     DatasetBasedProblem,
     Note,
     Submission,
+    TestcaseSet,
+    UploadSession,
 )
-from problems.paginator import ProblemListPagination
+from problems.leaderboards import leaderboard_index, leaderboard_page
+from problems.paginator import LeaderboardPagination, ProblemListPagination
 from problems.serializers import (
     CommentReactionSerializer,
     CommentSerializer,
+    DatasetSubmissionSerializer,
     NotesSerializer,
     ProblemListSerializer,
     RunCodeSerializer,
+    UploadSessionSerializer,
 )
 from problems.swagger_schemas import (
     code_editor_get_swagger_schema,
     comment_get_swagger_schema,
     comment_post_swagger_schema,
+    leaderboard_get_swagger_schema,
     like_comment_post_swagger_schema,
     monthly_content_view_swagger_schema,
+    my_rank_get_swagger_schema,
     notes_get_swagger_schema,
     notes_post_swagger_schema,
     problem_view_swagger_schema,
     problems_table_view_swagger_schema,
     run_code_post_swagger_schema,
     submission_get_swagger_schema,
+    submit_predictions_post_swagger_schema,
+    upload_chunk_put_swagger_schema,
+    upload_complete_post_swagger_schema,
+    upload_session_get_swagger_schema,
+    upload_session_post_swagger_schema,
     user_history_view_swagger_schema,
 )
 from problems.utils import (
@@ -47,35 +67,51 @@ from problems.utils import (
     get_difficulty_counts,
     get_notes,
     get_problem_by_type_and_slug,
+    get_problem_validators,
     get_solved_problems_count,
     get_submission_status,
     get_submissions_count,
     map_verdict_id,
+    problem_prefetch,
 )
+from problems.uploads import OffsetMismatch, append_chunk, finish_upload, open_upload
+
+# Response fields of a user's submissions to one problem
+SUBMISSION_FIELDS = {
+    "verdict": attrgetter("verdict"),
+    "time_taken": attrgetter("time_taken"),
+    "memory_taken": attrgetter("memory_taken"),
+    "created_timestamp": attrgetter("created_timestamp"),
+    "code_submitted": attrgetter("code"),
+    "failed_testcase_info": attrgetter("failed_testcase_info"),
+}
 
 
 class PublicProblemsViewSet(GenericViewSet):
     """ViewSet for public problem endpoints that don't require authentication"""
 
     permission_classes = [AllowAny]
+    token_claims_user = True
     serializer_class = ProblemListSerializer
     filter_backends = (ProblemFilterBackend,)
     pagination_class = ProblemListPagination
+    public_cache_catalogs = ("problems", "concepts")
 
     def get_queryset(self):
         """Get the appropriate queryset based on problem_type"""
         problem_type = self.request.query_params.get("problem_type")
 
         if problem_type == "concept":
-            return ConceptBasedProblem.objects.all()
+            return ConceptBasedProblem.objects.for_list()
         elif problem_type == "dataset":
-            return DatasetBasedProblem.objects.all()
+            return DatasetBasedProblem.objects.for_list()
         else:
             return None
 
     @problems_table_view_swagger_schema
     def list(self, request):
         """List problems with filtering, searching, and pagination"""
+        self.projection = FieldProjection.for_serializer(request, self.serializer_class)
         queryset = self.get_queryset()
         filtered_problems = self.filter_queryset(queryset)
 
@@ -89,17 +125,27 @@ class PublicProblemsViewSet(GenericViewSet):
 
         if page is None:
             serializer = self.serializer_class(
-                filtered_problems, many=True, context={"user": request.user}
+                filtered_problems,
+                many=True,
+                context={"user": request.user, "projection": self.projection},
             )
             return Response(serializer.data)
 
         serializer = self.serializer_class(
-            page, many=True, context={"user": request.user}
+            page,
+            many=True,
+            context={"user": request.user, "projection": self.projection},
+        )
+        problem_models = (
+            [queryset.model]
+            if queryset is not None
+            else [ConceptBasedProblem, DatasetBasedProblem]
         )
         return self.paginator.get_paginated_response(
             serializer.data,
             difficulty_counts=difficulty_counts,
             total_problems_solved=problems_solved,
+            tag_counts=TagCount.get_counts(*problem_models),
         )
 
     @action(
@@ -118,8 +164,13 @@ class PublicProblemsViewSet(GenericViewSet):
             "percentage_solved": 0,
         }
 
-        contents = DailyContent.objects.filter(
-            date__year=year, date__month=month, date__lte=datetime.now()
+        contents = (
+            DailyContent.objects.filter(
+                date__year=year, date__month=month, date__lte=datetime.now()
+            )
+            .select_related("concept")
+            .defer("concept__description")
+            .prefetch_related(problem_prefetch())
         )
         if not contents.exists():
             return Response(response_data)
@@ -169,6 +220,27 @@ class PublicProblemsViewSet(GenericViewSet):
 
         return Response(response_data)
 
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path=r"(?P<type>[^/.]+)/(?P<slug>[^/.]+)/leaderboard",
+        url_name="leaderboard",
+    )
+    @leaderboard_get_swagger_schema
+    def leaderboard(self, request, type, slug):
+        problem = get_problem_by_type_and_slug(type, slug)
+        if not problem:
+            return Response(
+                {"message": "Problem not found"}, status=status.HTTP_404_NOT_FOUND
+            )
+
+        board = leaderboard_index.for_problem(problem)
+        paginator = LeaderboardPagination()
+        entry_ids = paginator.paginate_queryset(board, request)
+        return paginator.get_paginated_response(
+            leaderboard_page(entry_ids, paginator.page.start_index())
+        )
+
     @action(
         detail=False,
         methods=["get"],
@@ -176,8 +248,9 @@ class PublicProblemsViewSet(GenericViewSet):
         url_name="problem-detail",
     )
     @problem_view_swagger_schema
+    @conditional_response(get_problem_validators, per_user=True)
     def problem_detail(self, request, type, slug):
-        problem = get_problem_by_type_and_slug(type, slug)
+        problem = get_problem_by_type_and_slug(type, slug, "description")
         if not problem:
             return Response(
                 {"message": "Problem not found"}, status=status.HTTP_404_NOT_FOUND
@@ -219,6 +292,7 @@ class AuthenticatedProblemsViewSet(ViewSet):
     """ViewSet for authenticated problem endpoints that require authentication"""
 
     permission_classes = [IsAuthenticated]
+    token_claims_user = True
 
     @action(
         detail=False,
@@ -228,7 +302,13 @@ class AuthenticatedProblemsViewSet(ViewSet):
     )
     @code_editor_get_swagger_schema
     def code_editor(self, request, type, slug):
-        problem = get_problem_by_type_and_slug(type, slug)
+        problem = get_problem_by_type_and_slug(
+            type,
+            slug,
+            "code_editor_template",
+            "validation_testcases",
+            "evaluation_metrics_dict",
+        )
         if not problem:
             return Response(
                 {"message": "Problem not found"}, status=status.HTTP_404_NOT_FOUND
@@ -268,7 +348,7 @@ class AuthenticatedProblemsViewSet(ViewSet):
         url_name="editorial",
     )
     def editorial(self, request, type, slug):
-        problem = get_problem_by_type_and_slug(type, slug)
+        problem = get_problem_by_type_and_slug(type, slug, "editorial_description")
         if not problem:
             return Response(
                 {"message": "Provided problem type and slug do not match any problem"},
@@ -299,9 +379,11 @@ class AuthenticatedProblemsViewSet(ViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        submissions = Submission.objects.filter(
-            user=request.user, created_timestamp__date=date
-        ).order_by("-created_timestamp")
+        submissions = (
+            Submission.objects.filter(user=request.user, created_timestamp__date=date)
+            .prefetch_related(problem_prefetch())
+            .order_by("-created_timestamp")
+        )
 
         # Dictionary to store the latest submission for each (problem, status) pair
         latest_submissions = {}
@@ -447,8 +529,9 @@ class AuthenticatedProblemsViewSet(ViewSet):
                 {"ordered_testcases": ordered_testcases}, status=status.HTTP_200_OK
             )
 
-        # Else, run code for official submission testcases
-        submission_testcases = problem.submission_testcases
+        # Else, run code for official submission testcases, streamed one at a
+        # time from the problem's current testcase set
+        testcase_set = TestcaseSet.current(problem)
         verdict_id = 3
         stdout = ""
         stderr = ""
@@ -457,7 +540,7 @@ class AuthenticatedProblemsViewSet(ViewSet):
         testcase_passed = 0
         failed_testcase_info = {}
 
-        for tc in submission_testcases:
+        for tc in testcase_set.blob.iter_testcases():
             testcase_input = tc.get("input", "")
             expected_output = tc.get("output", "")
             user_result = execute_code(
@@ -500,12 +583,13 @@ class AuthenticatedProblemsViewSet(ViewSet):
             time_taken=time_taken,
             memory_taken=memory_taken,
             failed_testcase_info=failed_testcase_info,
+            testcase_set=testcase_set,
         )
 
         data = {
             "verdict": verdict_id,
             "passed_count": testcase_passed,
-            "total_count": len(submission_testcases),
+            "total_count": testcase_set.blob.count,
             "stdout": stdout,
             "stderr": stderr,
             "time_taken": time_taken,
@@ -518,6 +602,65 @@ class AuthenticatedProblemsViewSet(ViewSet):
 
         return Response(data, status=status.HTTP_200_OK)
 
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="submit-predictions",
+        url_name="submit-predictions",
+        parser_classes=[MultiPartParser],
+    )
+    @submit_predictions_post_swagger_schema
+    def submit_predictions(self, request):
+        serializer = DatasetSubmissionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        problem = serializer.validated_data["problem"]
+
+        try:
+            result = evaluate(problem, serializer.validated_data["predictions"])
+        except ValidationError as e:
+            return Response(
+                {"message": "; ".join(e.messages)}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        Submission.objects.create(
+            user=request.user,
+            content_object=problem,
+            verdict=result["verdict"],
+            metrics=result["metrics"],
+        )
+
+        data = {
+            **client_result(result),
+            "problem_accepted": problem.accepted_submissions,
+            "problem_total_submissions": problem.total_submissions,
+            "problem_acceptance_rate": problem.acceptance_rate,
+        }
+        return Response(data, status=status.HTTP_200_OK)
+
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path=r"(?P<type>[^/.]+)/(?P<slug>[^/.]+)/leaderboard/me",
+        url_name="my-rank",
+    )
+    @my_rank_get_swagger_schema
+    def my_rank(self, request, type, slug):
+        problem = get_problem_by_type_and_slug(type, slug)
+        if not problem:
+            return Response(
+                {"message": "Problem not found"}, status=status.HTTP_404_NOT_FOUND
+            )
+
+        board = leaderboard_index.for_problem(problem)
+        rank = board.rank(request.user.id)
+        entry = None
+        if rank is not None:
+            entry = leaderboard_page([board[rank - 1]], rank)[0]
+        return Response(
+            {"rank": rank, "total": len(board), "entry": entry},
+            status=status.HTTP_200_OK,
+        )
+
     @action(
         detail=False,
         methods=["get"],
@@ -533,23 +676,20 @@ class AuthenticatedProblemsViewSet(ViewSet):
                 {"message": "Problem not found"}, status=status.HTTP_404_NOT_FOUND
             )
 
-        submissions = Submission.objects.filter(
-            content_type=ContentType.objects.get_for_model(problem),
-            object_id=problem.id,
-            user=request.user,
+        projection = FieldProjection.from_request(
+            request, SUBMISSION_FIELDS, {"code_submitted": ("code",)}
         )
-        submissions_data = []
-        for submission in submissions:
-            submissions_data.append(
-                {
-                    "verdict": submission.verdict,
-                    "time_taken": submission.time_taken,
-                    "memory_taken": submission.memory_taken,
-                    "created_timestamp": submission.created_timestamp,
-                    "code_submitted": submission.code,
-                    "failed_testcase_info": submission.failed_testcase_info,
-                }
+        submissions = projection.apply(
+            Submission.objects.filter(
+                content_type=ContentType.objects.get_for_model(problem),
+                object_id=problem.id,
+                user=request.user,
             )
+        )
+        submissions_data = [
+            projection.serialize(submission, SUBMISSION_FIELDS)
+            for submission in submissions
+        ]
 
         return Response(submissions_data, status=status.HTTP_200_OK)
 
@@ -658,3 +798,116 @@ class AuthenticatedProblemsViewSet(ViewSet):
             comment.like_by_users.remove(request.user)
 
         return Response({"message": f"Comment {action}d successfully"}, status=200)
+
+
+def upload_session_data(session):
+    return {
+        "id": session.id,
+        "status": session.status,
+        "offset": session.size,
+        "rows": session.rows,
+        "expected_rows": session.expected_rows,
+        "error": session.error,
+        "expires_at": session.expires_at,
+    }
+
+
+class UploadSessionViewSet(ViewSet):
+    """
+    Chunked, resumable prediction file uploads for dataset problems.
+
+    Chunks are sent in order as raw request bodies with ``PUT``, so no
+    upload is ever buffered whole in memory.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    @upload_session_post_swagger_schema
+    def create(self, request):
+        serializer = UploadSessionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            session = open_upload(request.user, serializer.validated_data["problem"])
+        except ValidationError as e:
+            return Response(
+                {"message": "; ".join(e.messages)}, status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(upload_session_data(session), status=status.HTTP_201_CREATED)
+
+    @upload_session_get_swagger_schema
+    def retrieve(self, request, pk=None):
+        session = UploadSession.objects.filter(pk=pk, user=request.user).first()
+        if not session:
+            return Response(
+                {"message": "Upload not found"}, status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(upload_session_data(session), status=status.HTTP_200_OK)
+
+    @upload_chunk_put_swagger_schema
+    def update(self, request, pk=None):
+        try:
+            offset = int(request.headers["Upload-Offset"])
+            checksum = request.headers["Chunk-SHA256"]
+        except (KeyError, ValueError):
+            return Response(
+                {"message": "Upload-Offset and Chunk-SHA256 headers are required"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        max_size = settings.UPLOAD_CHUNK_MAX_SIZE
+        if int(request.headers.get("Content-Length") or 0) > max_size:
+            return Response(
+                {"message": f"Chunks are limited to {max_size} bytes"},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            )
+        data = request.stream.read(max_size) if request.stream else b""
+
+        try:
+            session = append_chunk(pk, request.user, offset, checksum, data)
+        except UploadSession.DoesNotExist:
+            return Response(
+                {"message": "Upload not found"}, status=status.HTTP_404_NOT_FOUND
+            )
+        except OffsetMismatch as e:
+            return Response(
+                {"message": str(e), "offset": e.offset},
+                status=status.HTTP_409_CONFLICT,
+            )
+        except ValidationError as e:
+            return Response(
+                {"message": "; ".join(e.messages)}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if session.status == UploadSession.FAILED:
+            return Response(
+                upload_session_data(session), status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(upload_session_data(session), status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=["post"], url_path="complete", url_name="complete")
+    @upload_complete_post_swagger_schema
+    def complete(self, request, pk=None):
+        try:
+            session, result = finish_upload(pk, request.user)
+        except UploadSession.DoesNotExist:
+            return Response(
+                {"message": "Upload not found"}, status=status.HTTP_404_NOT_FOUND
+            )
+        except ValidationError as e:
+            return Response(
+                {"message": "; ".join(e.messages)}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if result is None:
+            return Response(
+                upload_session_data(session), status=status.HTTP_400_BAD_REQUEST
+            )
+        problem = session.problem
+        data = {
+            **upload_session_data(session),
+            **client_result(result),
+            "problem_accepted": problem.accepted_submissions,
+            "problem_total_submissions": problem.total_submissions,
+            "problem_acceptance_rate": problem.acceptance_rate,
+        }
+        return Response(data, status=status.HTTP_200_OK)
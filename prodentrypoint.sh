@@ -9,6 +9,7 @@ echo "PostgreSQL started"
 
 # Apply migrations
 python manage.py migrate
+python manage.py createcachetable
 python manage.py collectstatic --noinput
 
 # Load fixture data